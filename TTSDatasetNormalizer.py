@@ -1,19 +1,254 @@
 #!/usr/bin/env python3
+import argparse
 import csv
+import hashlib
+import json
 import logging
 import os
 import re
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
 from num2words import num2words
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Bump whenever a change to the normalization rules alters output, so
+# incremental runs re-normalize every row instead of reusing stale text
+NORMALIZER_VERSION = '1'
+
+# Matches integers and comma/period separated numbers such as 1,000 or 3.5
+NUMBER_PATTERN = re.compile(r'\b\d+(?:[,.]\d+)*\b')
+
+
+class NumberExpander:
+    """Expand number tokens to words with a precompiled pattern and a bounded LRU cache."""
+    
+    def __init__(self,
+                 max_size: int = 100_000,
+                 cache_path: Optional[str] = None,
+                 lang: str = 'en',
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize the expander, loading a persisted cache if one exists.
+        
+        Args:
+            max_size: Maximum number of cached tokens before least recently used ones are evicted
+            cache_path: Optional JSON file to load the cache from and save it to
+            lang: num2words language code
+            logger: Logger for conversion warnings
+        """
+        self.max_size = max_size
+        self.cache_path = cache_path
+        self.lang = lang
+        self.logger = logger or logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+        # Worker processes record what they compute so the parent can merge it
+        self.record_new_entries = False
+        self._new_entries: Dict[str, str] = {}
+        
+        if cache_path and os.path.exists(cache_path):
+            self.load()
+
+    def convert_token(self, token: str) -> str:
+        """
+        Convert a single number token to words.
+        
+        Args:
+            token: Number as matched by NUMBER_PATTERN
+            
+        Returns:
+            Word representation, or the token unchanged if it cannot be converted
+        """
+        words = self._cache.get(token)
+        if words is not None:
+            self.hits += 1
+            self._cache.move_to_end(token)
+            return words
+        
+        self.misses += 1
+        try:
+            # Remove commas and convert to float
+            words = num2words(float(token.replace(',', '')), lang=self.lang)
+        except ValueError as e:
+            self.logger.warning(f"Failed to convert number '{token}': {e}")
+            return token
+        
+        self._store(token, words)
+        if self.record_new_entries:
+            self._new_entries[token] = words
+        return words
+
+    def expand(self, text: str) -> str:
+        """Replace every number in text with its word representation."""
+        return NUMBER_PATTERN.sub(self._convert_match, text)
+
+    def _convert_match(self, match: 're.Match') -> str:
+        return self.convert_token(match.group(0))
+
+    def _store(self, token: str, words: str) -> None:
+        self._cache[token] = words
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def pop_new_entries(self) -> Dict[str, str]:
+        """Return and forget the entries computed since the last call."""
+        entries, self._new_entries = self._new_entries, {}
+        return entries
+
+    def merge(self, entries: Dict[str, str], hits: int = 0, misses: int = 0) -> None:
+        """Merge entries and counters gathered by another expander, e.g. in a worker process."""
+        for token, words in entries.items():
+            self._store(token, words)
+        self.hits += hits
+        self.misses += misses
+
+    def cache_info(self) -> Dict[str, int]:
+        """Return hit/miss counters and current cache size."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._cache),
+            'max_size': self.max_size
+        }
+
+    def load(self) -> int:
+        """
+        Load cached entries from cache_path.
+        
+        Returns:
+            Number of entries loaded
+        """
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable number cache {self.cache_path}: {e}")
+            return 0
+        
+        if data.get('lang') != self.lang:
+            self.logger.info(f"Number cache {self.cache_path} is for another language, starting cold")
+            return 0
+        
+        for token, words in data.get('entries', []):
+            self._store(token, words)
+        return len(self._cache)
+
+    def save(self) -> bool:
+        """
+        Write the cache to cache_path, least recently used entries first.
+        
+        Returns:
+            bool: True if the cache was written, False otherwise
+        """
+        try:
+            cache_dir = os.path.dirname(self.cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'lang': self.lang, 'entries': list(self._cache.items())}, f)
+            os.replace(tmp_path, self.cache_path)
+            return True
+        except OSError as e:
+            self.logger.error(f"Failed to save number cache {self.cache_path}: {e}")
+            return False
+
+
+class NormalizationManifest:
+    """Sidecar record of (ID, transcription hash, normalizer version) -> normalized text."""
+    
+    def __init__(self, path: str, version: str, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the manifest, loading previous entries if they match version.
+        
+        Args:
+            path: JSON file holding the manifest
+            version: Normalizer version; entries written by another version are discarded
+            logger: Logger for load/save problems
+        """
+        self.path = path
+        self.version = version
+        self.logger = logger or logging.getLogger(__name__)
+        self.previous: Dict[str, List[str]] = {}
+        self.current: Dict[str, List[str]] = {}
+        
+        if os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def text_hash(text: Optional[str]) -> str:
+        """Stable hash of a transcription."""
+        return hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+
+    def lookup(self, row_id: str, transcription: Optional[str]) -> Optional[str]:
+        """Return the stored normalized text if the row is unchanged since the last run."""
+        entry = self.previous.get(row_id)
+        if entry is not None and entry[0] == self.text_hash(transcription):
+            return entry[1]
+        return None
+
+    def record(self, row_id: str, transcription: Optional[str], normalized: str) -> None:
+        """Record a row written in this run."""
+        self.current[row_id] = [self.text_hash(transcription), normalized]
+
+    @property
+    def dropped(self) -> int:
+        """Number of IDs present last run but not in this one."""
+        return len(self.previous.keys() - self.current.keys())
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+            return
+        
+        if data.get('version') != self.version:
+            self.logger.info(f"Manifest {self.path} was written by normalizer version "
+                             f"{data.get('version')}, re-normalizing all rows")
+            return
+        self.previous = data.get('rows', {})
+
+    def save(self) -> bool:
+        """Atomically replace the manifest with the rows recorded in this run."""
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'rows': self.current}, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            self.logger.error(f"Failed to save manifest {self.path}: {e}")
+            return False
+
 
 class TTSDatasetNormalizer:
     """A class to normalize TTS dataset transcriptions by expanding numbers and cleaning file IDs."""
     
-    def __init__(self, log_level: int = logging.INFO):
-        """Initialize the normalizer with logging configuration."""
+    def __init__(self,
+                 log_level: int = logging.INFO,
+                 number_cache_path: Optional[str] = None,
+                 number_cache_size: int = 100_000):
+        """
+        Initialize the normalizer with logging configuration.
+        
+        Args:
+            log_level: Logging level to use
+            number_cache_path: Optional file used to persist expanded numbers between runs
+            number_cache_size: Maximum number of cached number tokens
+        """
         self.logger = self._setup_logging(log_level)
         self.fieldnames = ['ID', 'Transcription', 'Normalized Transcription']
+        self.number_expander = NumberExpander(
+            max_size=number_cache_size,
+            cache_path=number_cache_path,
+            logger=self.logger
+        )
     
     @staticmethod
     def _setup_logging(log_level: int) -> logging.Logger:
@@ -35,30 +270,138 @@ class TTSDatasetNormalizer:
             Text with numbers converted to words
         """
         try:
-            # Enhanced pattern to handle more number formats
-            pattern = re.compile(r'\b\d+(?:[,.]\d+)*\b')
-            
-            def convert_match(match):
-                try:
-                    number = match.group(0)
-                    # Remove commas and convert to float
-                    clean_number = float(number.replace(',', ''))
-                    return num2words(clean_number, lang='en')
-                except ValueError as e:
-                    self.logger.warning(f"Failed to convert number '{match.group(0)}': {e}")
-                    return match.group(0)
-            
-            return pattern.sub(convert_match, text)
+            return self.number_expander.expand(text)
             
         except Exception as e:
             self.logger.error(f"Error expanding numbers in text: {e}")
             return text
 
+    def save_number_cache(self) -> bool:
+        """Persist the number cache if a cache path was configured."""
+        if not self.number_expander.cache_path:
+            return False
+        return self.number_expander.save()
+
+    def _normalize_row(self, row: Dict[str, str], remove_wav: bool) -> Dict[str, str]:
+        """
+        Normalize a single metadata row.
+        
+        Args:
+            row: Row with 'ID' and 'Transcription' fields
+            remove_wav: Whether to remove .wav extensions from IDs
+            
+        Returns:
+            Output row with all three fieldnames populated
+        """
+        # Normalize transcription
+        normalized_text = self.expand_numbers(row['Transcription'])
+        
+        return {
+            'ID': self._clean_id(row['ID'], remove_wav),
+            'Transcription': row['Transcription'],
+            'Normalized Transcription': normalized_text
+        }
+
+    @staticmethod
+    def _clean_id(row_id: str, remove_wav: bool) -> str:
+        """Remove .wav extensions from an ID if requested."""
+        return row_id.replace('.wav', '') if remove_wav else row_id
+
+    @property
+    def version(self) -> str:
+        """Identifier of the normalization rules, used to key incremental manifests."""
+        return f"{NORMALIZER_VERSION}:{self.number_expander.lang}"
+
+    def normalize_rows(self,
+                       rows: List[Dict[str, str]],
+                       remove_wav: bool = True) -> List[Tuple[Optional[Dict[str, str]], Optional[str]]]:
+        """
+        Normalize a batch of rows, capturing per-row failures instead of raising.
+        
+        Args:
+            rows: Rows read from the metadata file
+            remove_wav: Whether to remove .wav extensions from IDs
+            
+        Returns:
+            One (output_row, error) pair per input row, in input order. Exactly
+            one of the two is set.
+        """
+        results = []
+        for row in rows:
+            try:
+                results.append((self._normalize_row(row, remove_wav), None))
+            except Exception as e:
+                results.append((None, f"Error processing row {row.get('ID', 'unknown')}: {e}"))
+        return results
+
+    def _iter_normalized(self,
+                         reader: Iterable[Dict[str, str]],
+                         remove_wav: bool,
+                         workers: int,
+                         chunk_size: int,
+                         lookup: Optional[Callable[[Dict[str, str]], Optional[Dict[str, str]]]] = None
+                         ) -> Iterator[Tuple[Optional[Dict[str, str]], Optional[str]]]:
+        """
+        Yield normalized rows in input order, optionally using a process pool.
+        
+        Rows are read in chunks of ``chunk_size`` and at most ``2 * workers``
+        chunks are in flight at once, so memory stays bounded regardless of
+        the size of the input file. Rows for which ``lookup`` returns an output
+        row are passed through without being normalized again.
+        """
+        chunks = _chunked(reader, chunk_size)
+        
+        if workers <= 1:
+            for chunk in chunks:
+                cached, rows = self._split_cached(chunk, lookup)
+                yield from _merge_cached(cached, self.normalize_rows(rows, remove_wav))
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.logger.getEffectiveLevel(),
+                                           self.number_expander.cache_path,
+                                           self.number_expander.max_size)) as executor:
+            pending = deque()
+            for chunk in chunks:
+                cached, rows = self._split_cached(chunk, lookup)
+                future = executor.submit(_normalize_chunk, rows, remove_wav) if rows else None
+                pending.append((cached, future))
+                if len(pending) >= 2 * workers:
+                    yield from self._collect_chunk(*pending.popleft())
+            while pending:
+                yield from self._collect_chunk(*pending.popleft())
+
+    @staticmethod
+    def _split_cached(chunk: List[Dict[str, str]],
+                      lookup: Optional[Callable[[Dict[str, str]], Optional[Dict[str, str]]]]
+                      ) -> Tuple[List[Optional[Dict[str, str]]], List[Dict[str, str]]]:
+        """Split a chunk into per-row cached outputs (None when missing) and rows still to normalize."""
+        if lookup is None:
+            return [None] * len(chunk), chunk
+        cached = [lookup(row) for row in chunk]
+        return cached, [row for row, hit in zip(chunk, cached) if hit is None]
+
+    def _collect_chunk(self,
+                       cached: List[Optional[Dict[str, str]]],
+                       future: Optional[Future]) -> Iterator[Tuple[Optional[Dict[str, str]], Optional[str]]]:
+        """Wait for a worker chunk and fold its number cache updates into ours."""
+        results = []
+        if future is not None:
+            results, entries, hits, misses = future.result()
+            self.number_expander.merge(entries, hits, misses)
+        return _merge_cached(cached, results)
+
     def process_file(self, 
                     input_path: str, 
                     output_path: str, 
                     remove_wav: bool = True,
-                    delimiter: str = '|') -> bool:
+                    delimiter: str = '|',
+                    workers: int = 1,
+                    chunk_size: int = 1000,
+                    incremental: bool = False,
+                    manifest_path: Optional[str] = None,
+                    header: bool = True) -> bool:
         """
         Process the input file to normalize transcriptions and optionally remove .wav extensions.
         
@@ -67,6 +410,14 @@ class TTSDatasetNormalizer:
             output_path: Path to output CSV file
             remove_wav: Whether to remove .wav extensions from IDs
             delimiter: CSV delimiter character
+            workers: Number of worker processes; 1 processes rows in this process
+            chunk_size: Number of rows sent to a worker at a time
+            incremental: Reuse normalized text for rows whose transcription is
+                unchanged since the last incremental run
+            manifest_path: Sidecar manifest for incremental runs
+                (default: output_path + '.manifest.json')
+            header: Whether to write the column names first; training reads
+                metadata.csv as headerless LJSpeech
             
         Returns:
             bool: True if processing succeeded, False otherwise
@@ -82,6 +433,29 @@ class TTSDatasetNormalizer:
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
             
+            manifest = None
+            lookup = None
+            reused = 0
+            if incremental:
+                manifest = NormalizationManifest(
+                    manifest_path or f"{output_path}.manifest.json",
+                    self.version,
+                    self.logger
+                )
+                
+                def lookup(row: Dict[str, str]) -> Optional[Dict[str, str]]:
+                    nonlocal reused
+                    row_id = self._clean_id(row['ID'], remove_wav)
+                    normalized_text = manifest.lookup(row_id, row['Transcription'])
+                    if normalized_text is None:
+                        return None
+                    reused += 1
+                    return {
+                        'ID': row_id,
+                        'Transcription': row['Transcription'],
+                        'Normalized Transcription': normalized_text
+                    }
+            
             # Process the file
             with open(input_path, 'r', encoding='utf-8') as f_in, \
                  open(output_path, 'w', encoding='utf-8', newline='') as f_out:
@@ -89,39 +463,100 @@ class TTSDatasetNormalizer:
                 reader = csv.DictReader(f_in, delimiter=delimiter, fieldnames=self.fieldnames[:2])
                 writer = csv.DictWriter(f_out, delimiter=delimiter, fieldnames=self.fieldnames)
                 
-                # Write header
-                writer.writeheader()
+                if header:
+                    writer.writeheader()
                 
-                # Process each row
-                for row in reader:
-                    try:
-                        # Clean ID if requested
-                        if remove_wav:
-                            row['ID'] = row['ID'].replace('.wav', '')
-                        
-                        # Normalize transcription
-                        normalized_text = self.expand_numbers(row['Transcription'])
-                        
-                        # Write the processed row
-                        writer.writerow({
-                            'ID': row['ID'],
-                            'Transcription': row['Transcription'],
-                            'Normalized Transcription': normalized_text
-                        })
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error processing row {row.get('ID', 'unknown')}: {e}")
+                # Rows come back in input order whether or not a pool is used,
+                # and are always written from this process
+                for output_row, error in self._iter_normalized(reader, remove_wav, workers,
+                                                               chunk_size, lookup):
+                    if error is not None:
+                        self.logger.error(error)
                         continue
+                    writer.writerow(output_row)
+                    if manifest is not None:
+                        manifest.record(output_row['ID'], output_row['Transcription'],
+                                        output_row['Normalized Transcription'])
+            
+            if manifest is not None:
+                manifest.save()
+                self.logger.info(f"Incremental run: reused {reused} rows, "
+                                 f"normalized {len(manifest.current) - reused}, "
+                                 f"dropped {manifest.dropped} deleted IDs")
                         
             self.logger.info(f"Successfully processed {input_path} to {output_path}")
+            self.logger.info(f"Number cache: {self.number_expander.cache_info()}")
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to process file: {e}")
             return False
 
-def main():
+
+def _chunked(rows: Iterable[Dict[str, str]], chunk_size: int) -> Iterator[List[Dict[str, str]]]:
+    """Group rows into lists of at most ``chunk_size`` items."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, max(chunk_size, 1)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _merge_cached(cached: List[Optional[Dict[str, str]]],
+                  results: List[Tuple[Optional[Dict[str, str]], Optional[str]]]
+                  ) -> Iterator[Tuple[Optional[Dict[str, str]], Optional[str]]]:
+    """Interleave freshly normalized results back into the slots left empty by the cache."""
+    fresh = iter(results)
+    for hit in cached:
+        yield (hit, None) if hit is not None else next(fresh)
+
+
+# Per-process normalizer used by pool workers
+_worker_normalizer: Optional[TTSDatasetNormalizer] = None
+
+
+def _init_worker(log_level: int,
+                 number_cache_path: Optional[str],
+                 number_cache_size: int) -> None:
+    """Create the normalizer once per worker process, warm from the persisted number cache."""
+    global _worker_normalizer
+    _worker_normalizer = TTSDatasetNormalizer(log_level, number_cache_path, number_cache_size)
+    _worker_normalizer.number_expander.record_new_entries = True
+
+
+def _normalize_chunk(rows: List[Dict[str, str]], remove_wav: bool) -> Tuple[
+        List[Tuple[Optional[Dict[str, str]], Optional[str]]], Dict[str, str], int, int]:
+    """
+    Normalize a chunk of rows inside a worker process.
+    
+    Returns:
+        The per-row results plus the number cache entries and hit/miss counts
+        produced by this chunk, so the parent can persist a warm cache.
+    """
+    expander = _worker_normalizer.number_expander
+    hits, misses = expander.hits, expander.misses
+    results = _worker_normalizer.normalize_rows(rows, remove_wav)
+    return results, expander.pop_new_entries(), expander.hits - hits, expander.misses - misses
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Normalize TTS dataset transcriptions.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes (default: 1)")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="Rows per worker task when --workers > 1 (default: 1000)")
+    parser.add_argument('--number-cache', default=None,
+                        help="JSON file used to persist expanded numbers between runs")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-normalize rows that changed since the last incremental run")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
     """Main entry point for the script."""
+    args = parse_args(argv)
+    
     # Configure paths
     base_dir = Path("./MyTTSDataset")
     input_path = base_dir / "metadata.csv"
@@ -129,18 +564,23 @@ def main():
     final_path = base_dir / "metadata_normalized_no_wav.csv"
     
     # Initialize normalizer
-    normalizer = TTSDatasetNormalizer()
+    normalizer = TTSDatasetNormalizer(number_cache_path=args.number_cache)
     
     # Process the file in one pass (combines both original scripts' functionality)
     success = normalizer.process_file(
         input_path=str(input_path),
         output_path=str(final_path),
-        remove_wav=True
+        remove_wav=True,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        incremental=args.incremental
     )
     
     if not success:
         logging.error("Failed to process the dataset")
         exit(1)
+    
+    normalizer.save_number_cache()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,7 +1,28 @@
 import os
+import sys
+import json
+import shlex
+import shutil
+import hashlib
+import argparse
 import subprocess
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import FileHasher
+
+# Placeholders: {corpus} shard input, {output} shard output, {temp} shard scratch directory
+DEFAULT_ALIGNER = ('mfa align --clean --single_speaker --temporary_directory {temp} '
+                   '{corpus} {dictionary} {acoustic_model} {output}')
+
+_print_lock = threading.Lock()
+
+
+def log(message, error=False):
+    """Print a progress line; shards run in threads, so lines are never interleaved."""
+    with _print_lock:
+        print(message, file=sys.stderr if error else sys.stdout, flush=True)
+
 
 def start_new_mfa_server():
     start = 'mfa server start'
@@ -21,8 +42,205 @@ def align_audio():
     mfa_command = f'mfa align --clean --single_speaker {corpus_directory} {dictionary_path} {acoustic_model_path} {output_directory}'
     subprocess.run(mfa_command, shell=True)
 
+
+def list_recordings(corpus_dir):
+    """(speaker, base_name) for every recording that has both a .wav and a .txt, in sorted order."""
+    recordings = []
+    for speaker in sorted(os.listdir(corpus_dir)):
+        speaker_dir = os.path.join(corpus_dir, speaker)
+        if not os.path.isdir(speaker_dir):
+            continue
+        names = set(os.listdir(speaker_dir))
+        for name in sorted(names):
+            base_name, ext = os.path.splitext(name)
+            if ext == '.txt' and base_name + '.wav' in names:
+                recordings.append((speaker, base_name))
+    return recordings
+
+
+def recording_key(hasher, corpus_dir, speaker, base_name, aligner_id):
+    """Cache key of a recording: its audio and transcript content plus the aligner settings."""
+    stem = os.path.join(corpus_dir, speaker, base_name)
+    payload = '\0'.join([hasher(stem + '.wav'), hasher(stem + '.txt'), aligner_id])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def split_shards(recordings, sizes, n_shards):
+    """Greedily balance recordings over n_shards by audio size, largest first."""
+    shards = [[] for _ in range(min(max(1, n_shards), len(recordings)))]
+    loads = [0] * len(shards)
+    for recording in sorted(recordings, key=lambda r: -sizes[r]):
+        i = loads.index(min(loads))
+        shards[i].append(recording)
+        loads[i] += sizes[recording]
+    return [sorted(shard) for shard in shards]
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _install(src, dst):
+    """Copy src to dst through a temporary file so dst is never half-written."""
+    tmp_path = dst + '.tmp'
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def align_shard(shard_id, recordings, corpus_dir, work_dir, command):
+    """
+    Align one shard in its own scratch directory, streaming the aligner's output.
+
+    Returns {recording: TextGrid path} for the recordings the aligner produced.
+    """
+    shard_dir = os.path.join(work_dir, f'shard_{shard_id:03d}')
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    # MFA names its database after the corpus directory, so shard names must differ
+    input_dir = os.path.join(shard_dir, f'corpus_{shard_id:03d}')
+    output_dir = os.path.join(shard_dir, 'aligned')
+    temp_dir = os.path.join(shard_dir, 'tmp')
+    for speaker, base_name in recordings:
+        os.makedirs(os.path.join(input_dir, speaker), exist_ok=True)
+        for ext in ('.wav', '.txt'):
+            _link_or_copy(os.path.join(corpus_dir, speaker, base_name + ext),
+                          os.path.join(input_dir, speaker, base_name + ext))
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(temp_dir, exist_ok=True)
+
+    argv = [arg.format(corpus=input_dir, output=output_dir, temp=temp_dir) for arg in command]
+    with subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) as process:
+        for line in process.stdout:
+            log(f'[shard {shard_id}] {line.rstrip()}')
+    if process.returncode != 0:
+        raise RuntimeError(f'aligner exited with status {process.returncode}')
+
+    produced = {}
+    for speaker, base_name in recordings:
+        # MFA mirrors the speaker directories; accept a flat layout too
+        for path in (os.path.join(output_dir, speaker, base_name + '.TextGrid'),
+                     os.path.join(output_dir, base_name + '.TextGrid')):
+            if os.path.exists(path):
+                produced[(speaker, base_name)] = path
+                break
+    return produced
+
+
+def align_corpus(corpus_dir='./corpus_directory', dictionary='english_us_arpa', acoustic_model='english_us_arpa',
+                 shards=4, aligner=DEFAULT_ALIGNER, cache_dir=None, work_dir=None, keep_work=False):
+    """
+    Align every recording in corpus_dir, writing <speaker>/<base>.TextGrid next to it.
+
+    Recordings whose audio, transcript and aligner settings are unchanged get their
+    TextGrid from the cache. The rest are split into shards that are aligned
+    concurrently; a failing shard only fails its own recordings.
+
+    Args:
+        aligner: Command template with {corpus}, {output}, {temp}, {dictionary} and
+            {acoustic_model} placeholders; any executable taking a corpus and an output
+            directory can stand in for MFA
+        cache_dir: TextGrid cache (default: <corpus_dir>/../.alignment_cache)
+
+    Returns {(speaker, base_name): error} for the recordings that failed.
+    """
+    parent = os.path.dirname(os.path.abspath(corpus_dir))
+    cache_dir = cache_dir or os.path.join(parent, '.alignment_cache')
+    work_dir = work_dir or os.path.join(cache_dir, 'work')
+    os.makedirs(cache_dir, exist_ok=True)
+    command = [arg.replace('{dictionary}', dictionary).replace('{acoustic_model}', acoustic_model)
+               for arg in shlex.split(aligner)]
+    aligner_id = ' '.join(command)
+
+    # Audio hashes are cached by size and mtime, so unchanged recordings are not reread
+    hashes_path = os.path.join(cache_dir, 'hashes.json')
+    hasher = FileHasher({})
+    if os.path.exists(hashes_path):
+        with open(hashes_path, 'r', encoding='utf-8') as f:
+            hasher.cache = json.load(f)
+    recordings = list_recordings(corpus_dir)
+    keys = {r: recording_key(hasher, corpus_dir, *r, aligner_id) for r in recordings}
+
+    pending = []
+    for recording in recordings:
+        cached = os.path.join(cache_dir, keys[recording] + '.TextGrid')
+        if os.path.exists(cached):
+            target = os.path.join(corpus_dir, recording[0], recording[1] + '.TextGrid')
+            if not os.path.exists(target) or hasher(target) != hasher(cached):
+                _install(cached, target)
+        else:
+            pending.append(recording)
+    # Saved after the install checks, so the TextGrid digests they took are kept too
+    with open(hashes_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({path: entry for path, entry in hasher.cache.items() if os.path.exists(path)}, f)
+    os.replace(hashes_path + '.tmp', hashes_path)
+    log(f'[+] {len(recordings) - len(pending)}/{len(recordings)} recordings cached, aligning {len(pending)}')
+
+    failures = {}
+    if pending:
+        sizes = {r: os.path.getsize(os.path.join(corpus_dir, r[0], r[1] + '.wav')) for r in pending}
+        shard_list = split_shards(pending, sizes, shards)
+
+        def run(shard_id):
+            shard = shard_list[shard_id]
+            try:
+                produced = align_shard(shard_id, shard, corpus_dir, work_dir, command)
+            except Exception as e:
+                log(f'[-] shard {shard_id} failed: {e}', error=True)
+                return {recording: str(e) for recording in shard}
+            errors = {}
+            for recording in shard:
+                path = produced.get(recording)
+                if path is None:
+                    errors[recording] = 'aligner produced no TextGrid'
+                    continue
+                _install(path, os.path.join(cache_dir, keys[recording] + '.TextGrid'))
+                _install(path, os.path.join(corpus_dir, recording[0], recording[1] + '.TextGrid'))
+            log(f'[+] shard {shard_id} done ({len(shard_list)} shards): '
+                f'{len(shard) - len(errors)} aligned, {len(errors)} failed')
+            return errors
+
+        with ThreadPoolExecutor(max_workers=len(shard_list)) as executor:
+            for errors in executor.map(run, range(len(shard_list))):
+                failures.update(errors)
+        if not keep_work:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    for (speaker, base_name), error in sorted(failures.items()):
+        log(f'[-] {speaker}/{base_name}: {error}', error=True)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Align the corpus in parallel shards, reusing cached TextGrids.')
+    parser.add_argument('corpus_dir', nargs='?', default='./corpus_directory')
+    parser.add_argument('--dictionary', default='english_us_arpa')
+    parser.add_argument('--acoustic-model', default='english_us_arpa')
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1,
+                        help='number of aligner processes to run concurrently')
+    parser.add_argument('--aligner', default=DEFAULT_ALIGNER,
+                        help='aligner command template (default: %(default)r)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='TextGrid cache (default: .alignment_cache next to corpus_dir)')
+    parser.add_argument('--keep-work', action='store_true', help='keep the per-shard scratch directories')
+    parser.add_argument('--no-server', action='store_true', help='do not restart the MFA server first')
+    parser.add_argument('--legacy', action='store_true', help='run one mfa align over the whole corpus')
+    args = parser.parse_args(argv)
+    if args.shards < 1:
+        parser.error('--shards must be at least 1')
+
+    if not args.no_server and args.aligner.startswith('mfa '):
+        print(f'[+] starting a new mfa server ::')
+        start_new_mfa_server()
+    if args.legacy:
+        print(f'[+] aligning audio ::')
+        align_audio()
+        return 0
+    failures = align_corpus(args.corpus_dir, args.dictionary, args.acoustic_model, args.shards, args.aligner,
+                            args.cache_dir, keep_work=args.keep_work)
+    return 1 if failures else 0
+
+
 if __name__ == '__main__':
-    print(f'[+] starting a new mfa server ::')
-    start_new_mfa_server()
-    print(f'[+] aligning audio ::')
-    align_audio() 
\ No newline at end of file
+    sys.exit(main())
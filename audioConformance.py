@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Single-pass conformance check for the training WAVs.
+
+Replaces the mono_/resample_/stats_/length_ scripts in MyTTSDataset/wavs: every
+file is opened once, downmixed to mono and resampled to the sample rate in
+config.json if needed, and its stats are collected for one report.
+"""
+import argparse
+import json
+import os
+import sys
+import wave
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from pydub import AudioSegment
+from pydub.exceptions import CouldntDecodeError
+
+
+def load_target_sample_rate(config_path: str) -> int:
+    """Read audio.sample_rate from a trainer config.json."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return int(json.load(f)['audio']['sample_rate'])
+
+
+def atomic_export(audio: AudioSegment, path: str) -> None:
+    """Export to a temporary file next to path and rename it over path."""
+    tmp_path = f'{path}.tmp'
+    try:
+        audio.export(tmp_path, format='wav')
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def conform_file(path: str, target_rate: int, dry_run: bool = False) -> Dict:
+    """
+    Make one WAV mono at target_rate, reading it at most once.
+
+    Conformant files are only opened to read their header. Others are read in
+    full from the same handle, converted with pydub exactly as mono_.py and
+    resample_.py did, and replaced atomically.
+
+    Returns:
+        Dict with the original and final format, frame count, duration and
+        whether the file was (or, in dry-run mode, would be) converted.
+    """
+    stats = {'file': os.path.basename(path)}
+    try:
+        with open(path, 'rb') as f:
+            with wave.open(f, 'rb') as wav_file:
+                channels = wav_file.getnchannels()
+                sample_width = wav_file.getsampwidth()
+                frame_rate = wav_file.getframerate()
+                n_frames = wav_file.getnframes()
+            stats.update(channels=channels, sample_width=sample_width,
+                         frame_rate=frame_rate, frames=n_frames)
+
+            converted = channels != 1 or frame_rate != target_rate
+            if converted and not dry_run:
+                f.seek(0)
+                audio = AudioSegment(data=f.read())
+                audio = audio.set_channels(1).set_frame_rate(target_rate)
+                atomic_export(audio, path)
+                n_frames = int(audio.frame_count())
+                frame_rate = target_rate
+    except (OSError, EOFError, wave.Error, CouldntDecodeError) as e:
+        stats['error'] = f'{type(e).__name__}: {e}'
+        return stats
+
+    stats.update(converted=converted,
+                 final_frames=n_frames,
+                 duration=n_frames / float(frame_rate) if frame_rate else 0.0)
+    return stats
+
+
+def duration_histogram(durations: List[float], bin_seconds: float) -> Dict[float, int]:
+    """Count durations per bin of bin_seconds, keyed by the bin's lower edge."""
+    bins = Counter(int(d // bin_seconds) for d in durations)
+    return {round(b * bin_seconds, 3): bins[b] for b in sorted(bins)}
+
+
+def conform_directory(wavs_dir: str,
+                      target_rate: int,
+                      workers: int = 1,
+                      dry_run: bool = False) -> List[Dict]:
+    """Conform every .wav in wavs_dir across a process pool, in sorted file order."""
+    paths = sorted(os.path.join(wavs_dir, name) for name in os.listdir(wavs_dir) if name.endswith('.wav'))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(conform_file, paths, [target_rate] * len(paths),
+                                     [dry_run] * len(paths), chunksize=64))
+    return [conform_file(path, target_rate, dry_run) for path in paths]
+
+
+def print_report(results: List[Dict], target_rate: int, bin_seconds: float) -> None:
+    """Print format counts, conversions and the duration histogram."""
+    ok = [r for r in results if 'error' not in r]
+    errors = [r for r in results if 'error' in r]
+    formats = Counter((r['channels'], r['sample_width'], r['frame_rate']) for r in ok)
+    durations = [r['duration'] for r in ok]
+
+    print(f'Files: {len(results)}  converted: {sum(r["converted"] for r in ok)}  '
+          f'errors: {len(errors)}  target: mono @ {target_rate} Hz')
+    print('Input formats (channels, sample width bytes, frame rate): count')
+    for (channels, sample_width, frame_rate), count in sorted(formats.items()):
+        print(f'    {channels} ch, {sample_width} B, {frame_rate} Hz: {count}')
+    if durations:
+        print(f'Duration: total {sum(durations) / 3600:.2f} h, min {min(durations):.2f}s, '
+              f'max {max(durations):.2f}s, mean {sum(durations) / len(durations):.2f}s')
+        print(f'Duration histogram ({bin_seconds:g}s bins):')
+        for lower, count in duration_histogram(durations, bin_seconds).items():
+            print(f'    {lower:>7.2f}s: {count}')
+    for r in errors:
+        print(f'[-] {r["file"]}: {r["error"]}', file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Downmix, resample and report on training WAVs in one pass.')
+    parser.add_argument('wavs_dir', nargs='?', default='./MyTTSDataset/wavs')
+    parser.add_argument('--config', default='./config.json',
+                        help='trainer config providing audio.sample_rate (default: ./config.json)')
+    parser.add_argument('--sample-rate', type=int, default=None,
+                        help='override the target sample rate from the config')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--bin-seconds', type=float, default=1.0,
+                        help='duration histogram bin width (default: 1.0)')
+    parser.add_argument('--report', default=None, help='also write per-file stats to this JSON file')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be converted without writing')
+    args = parser.parse_args(argv)
+
+    target_rate = args.sample_rate or load_target_sample_rate(args.config)
+    results = conform_directory(args.wavs_dir, target_rate, args.workers, args.dry_run)
+    print_report(results, target_rate, args.bin_seconds)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if any('error' in r for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Persistent index of WAV durations and formats.
+
+The index is a SQLite file holding one row per WAV. A refresh only stats
+the directory tree and re-reads the headers of files whose size or mtime
+changed, so tools can look up durations and formats without reopening
+every file.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import wave
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sample_rate INTEGER,
+    channels INTEGER,
+    sample_width INTEGER,
+    frames INTEGER,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS files_duration ON files (duration);
+"""
+
+
+class AudioInfo(NamedTuple):
+    """One indexed file. Format fields are None if the header could not be read."""
+    path: str
+    size: int
+    mtime_ns: int
+    sample_rate: Optional[int]
+    channels: Optional[int]
+    sample_width: Optional[int]
+    frames: Optional[int]
+    duration: Optional[float]
+
+
+def read_audio_info(path: str, rel_path: str, size: int, mtime_ns: int) -> AudioInfo:
+    """Read the format of one WAV from its header."""
+    try:
+        with wave.open(path, 'rb') as wav_file:
+            sample_rate = wav_file.getframerate()
+            frames = wav_file.getnframes()
+            return AudioInfo(rel_path, size, mtime_ns, sample_rate, wav_file.getnchannels(),
+                             wav_file.getsampwidth(), frames,
+                             frames / float(sample_rate) if sample_rate else None)
+    except (OSError, EOFError, wave.Error):
+        return AudioInfo(rel_path, size, mtime_ns, None, None, None, None, None)
+
+
+def iter_wav_stats(root: str, extension: str = '.wav') -> Iterator[Tuple[str, str, os.stat_result]]:
+    """Yield (path, path relative to root, stat) for every file below root with the extension."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(extension):
+                    yield entry.path, os.path.relpath(entry.path, root), entry.stat()
+
+
+class AudioManifest:
+    """SQLite-backed index of the WAV files under one directory."""
+
+    def __init__(self, root: str, db_path: Optional[str] = None, log_level: int = logging.INFO):
+        """
+        Open (or create) the index for root.
+
+        Args:
+            root: Directory containing the WAV files
+            db_path: SQLite file (default: audio_manifest.sqlite next to root)
+            log_level: Logging level to use
+        """
+        self.root = root
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.abspath(root)), 'audio_manifest.sqlite')
+        self.logger = self._setup_logging(log_level)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _setup_logging(log_level: int) -> logging.Logger:
+        """Configure logging."""
+        logging.basicConfig(
+            level=log_level,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        return logging.getLogger(__name__)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'AudioManifest':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Bring the index in line with the directory.
+
+        Only files whose size or mtime changed are reopened; unchanged files
+        cost one stat each. Files that disappeared are removed.
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in
+                 self.conn.execute('SELECT path, size, mtime_ns FROM files')}
+        seen = set()
+        changed: List[AudioInfo] = []
+        added = 0
+
+        for path, rel_path, stat in iter_wav_stats(self.root):
+            seen.add(rel_path)
+            previous = known.get(rel_path)
+            if previous == (stat.st_size, stat.st_mtime_ns):
+                continue
+            if previous is None:
+                added += 1
+            changed.append(read_audio_info(path, rel_path, stat.st_size, stat.st_mtime_ns))
+
+        removed = [(path,) for path in known.keys() - seen]
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)', changed)
+            self.conn.executemany('DELETE FROM files WHERE path = ?', removed)
+
+        counts = {
+            'added': added,
+            'updated': len(changed) - added,
+            'removed': len(removed),
+            'unchanged': len(seen) - len(changed)
+        }
+        self.logger.info(f"Refreshed {self.db_path}: {counts}")
+        return counts
+
+    def query(self,
+              min_duration: Optional[float] = None,
+              max_duration: Optional[float] = None,
+              sample_rate: Optional[int] = None,
+              channels: Optional[int] = None) -> List[AudioInfo]:
+        """
+        Return indexed files matching all given constraints, ordered by path.
+
+        Args:
+            min_duration: Minimum duration in seconds (inclusive)
+            max_duration: Maximum duration in seconds (inclusive)
+            sample_rate: Required sample rate
+            channels: Required channel count
+        """
+        clauses = []
+        params = []
+        for clause, value in (('duration >= ?', min_duration), ('duration <= ?', max_duration),
+                              ('sample_rate = ?', sample_rate), ('channels = ?', channels)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self.conn.execute(f'SELECT * FROM files{where} ORDER BY path', params)
+        return [AudioInfo(*row) for row in rows]
+
+    def durations(self) -> Dict[str, float]:
+        """Map of relative path to duration for every readable file."""
+        return dict(self.conn.execute('SELECT path, duration FROM files WHERE duration IS NOT NULL'))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Maintain and query the WAV duration/format index.')
+    parser.add_argument('wavs_dir', nargs='?', default='./MyTTSDataset/wavs')
+    parser.add_argument('--db', default=None, help='SQLite file (default: audio_manifest.sqlite next to wavs_dir)')
+    parser.add_argument('--min-duration', type=float, default=None)
+    parser.add_argument('--max-duration', type=float, default=None)
+    parser.add_argument('--sample-rate', type=int, default=None)
+    parser.add_argument('--channels', type=int, default=None)
+    parser.add_argument('--list', action='store_true', help='print matching files after refreshing')
+    args = parser.parse_args(argv)
+
+    with AudioManifest(args.wavs_dir, args.db) as manifest:
+        manifest.refresh()
+        matches = manifest.query(args.min_duration, args.max_duration, args.sample_rate, args.channels)
+        if args.list:
+            for info in matches:
+                # Files whose header could not be read have no duration
+                duration = '-' if info.duration is None else f'{info.duration:.3f}'
+                print(f'{info.path}\t{duration}\t{info.sample_rate}\t{info.channels}')
+        print(f'{len(matches)} files, {sum(info.duration or 0 for info in matches) / 3600:.2f} h',
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Streaming long-form synthesis of EPUB chapter transcripts.
+
+Reads the ``speaker\\tsentence`` transcripts written by
+splitEpubToSentences one batch of sentences at a time. Each batch is
+synthesized and its audio is appended to the chapter on disk right away,
+so memory holds one batch however long the chapter is. Sentences are
+joined with a fixed pause or a linear crossfade.
+
+Progress is committed after every batch: audio goes to ``<chapter>.wav.part``
+and the count of sentences done to ``<chapter>.wav.progress.json``. A rerun
+after an interruption drops any audio written after the last commit and
+continues from there. The WAV header is written when the chapter
+finishes. Progress is discarded if the transcript, model or join settings
+changed. With ``--cache-dir`` sentences already synthesized by the same
+checkpoint and vocoder, in this or another chapter, are read from a
+synthesisCache instead.
+"""
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import struct
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from pipeline import FileHasher
+from synthesisServer import DEFAULT_ENGINE, DEFAULT_VOCODER, load_engine_factory
+
+
+def iter_sentences(transcript_path: str) -> Iterator[str]:
+    """Sentences of a transcript, read lazily; a 'speaker\\t' prefix is dropped."""
+    with open(transcript_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            sentence = line.rstrip('\n').split('\t', 1)[-1].strip()
+            if sentence:
+                yield sentence
+
+
+def to_pcm16(wav) -> np.ndarray:
+    """Float samples in [-1, 1] to int16, with the same gain for every sentence."""
+    return (np.clip(np.asarray(wav, dtype=np.float32).reshape(-1), -1.0, 1.0) * 32767).astype('<i2')
+
+
+def wav_header(n_frames: int, sample_rate: int) -> bytes:
+    """44-byte header of a mono 16-bit PCM WAV."""
+    data_size = 2 * n_frames
+    return (b'RIFF' + struct.pack('<I', 36 + data_size) + b'WAVEfmt '
+            + struct.pack('<IHHIIHH', 16, 1, 1, sample_rate, 2 * sample_rate, 2, 16)
+            + b'data' + struct.pack('<I', data_size))
+
+
+class ChapterWriter:
+    """Append-only chapter audio with committed progress, finished into a WAV."""
+
+    def __init__(self, out_path: str, sample_rate: int, key: str, pause: float = 0.0, crossfade: float = 0.0):
+        """
+        Args:
+            out_path: Final WAV path
+            sample_rate: Sample rate of the engine's audio
+            key: Identifies the transcript and settings; progress made under another key is discarded
+            pause: Seconds of silence between sentences
+            crossfade: Seconds by which consecutive sentences overlap, with linear fades
+        """
+        self.out_path = out_path
+        self.part_path = out_path + '.part'
+        self.progress_path = out_path + '.progress.json'
+        self.sample_rate = sample_rate
+        self.key = key
+        self.pause_frames = int(round(pause * sample_rate))
+        self.crossfade_frames = int(round(crossfade * sample_rate))
+        self.sentences = 0
+        self.frames = 0
+        # Last crossfade_frames samples, kept back until the next sentence is mixed in
+        self.tail = np.zeros(0, dtype='<i2')
+
+        progress = None
+        if os.path.exists(self.progress_path) and os.path.exists(self.part_path):
+            with open(self.progress_path, 'r', encoding='utf-8') as f:
+                progress = json.load(f)
+            if progress.get('key') != key:
+                progress = None
+        if progress is not None:
+            self.sentences = progress['sentences']
+            self.frames = progress['frames']
+            self.tail = np.frombuffer(base64.b64decode(progress['tail']), dtype='<i2').copy()
+        self.part = open(self.part_path, 'r+b' if progress is not None else 'w+b')
+        # Drop audio written after the last commit
+        self.part.truncate(2 * self.frames)
+        self.part.seek(2 * self.frames)
+
+    def add(self, samples: np.ndarray) -> None:
+        """Append one sentence of int16 samples."""
+        if self.sentences and self.pause_frames:
+            self._write(np.zeros(self.pause_frames, dtype='<i2'))
+        if self.crossfade_frames:
+            n = min(self.tail.size, samples.size)
+            if n:
+                fade = np.linspace(0.0, 1.0, n, endpoint=False, dtype=np.float32)
+                mixed = self.tail[self.tail.size - n:] * (1.0 - fade) + samples[:n] * fade
+                samples = np.concatenate((np.round(mixed).astype('<i2'), samples[n:]))
+            self._write(self.tail[:self.tail.size - n])
+            keep = min(self.crossfade_frames, samples.size)
+            self._write(samples[:samples.size - keep])
+            self.tail = samples[samples.size - keep:].copy()
+        else:
+            self._write(samples)
+        self.sentences += 1
+
+    def _write(self, samples: np.ndarray) -> None:
+        self.part.write(samples.tobytes())
+        self.frames += samples.size
+
+    def commit(self) -> None:
+        """Make everything added so far survive an interruption."""
+        self.part.flush()
+        os.fsync(self.part.fileno())
+        tmp_path = f'{self.progress_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': self.key, 'sentences': self.sentences, 'frames': self.frames,
+                       'tail': base64.b64encode(self.tail.tobytes()).decode('ascii')}, f)
+        os.replace(tmp_path, self.progress_path)
+
+    def finish(self) -> None:
+        """Write the WAV (header plus the streamed samples) and remove the progress files."""
+        self._write(self.tail)
+        self.tail = np.zeros(0, dtype='<i2')
+        self.part.flush()
+        self.part.seek(0)
+        tmp_path = f'{self.out_path}.tmp'
+        with open(tmp_path, 'wb') as out:
+            out.write(wav_header(self.frames, self.sample_rate))
+            shutil.copyfileobj(self.part, out, 1 << 20)
+        self.part.close()
+        os.replace(tmp_path, self.out_path)
+        os.remove(self.part_path)
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+
+    def close(self) -> None:
+        self.part.close()
+
+
+def synthesize_chapter(engine, transcript_path: str, out_path: str, identity: str = '', batch_size: int = 8,
+                       pause: float = 0.3, crossfade: float = 0.0, hasher: Optional[FileHasher] = None
+                       ) -> Dict[str, object]:
+    """
+    Synthesize one chapter transcript into out_path, resuming committed progress.
+
+    Args:
+        engine: Needs sample_rate and synthesize(text); synthesize_batch(texts) is used when present
+        identity: Model description that goes into the progress key, e.g. checkpoint and vocoder
+        hasher: Transcript hasher (default: a fresh FileHasher)
+
+    Returns the chapter's stats: sentences and audio seconds synthesized in this
+    run, time to first audio, real-time factor and the sentences resumed from.
+    """
+    hasher = hasher or FileHasher({})
+    key = hashlib.sha1('\0'.join([hasher(transcript_path), identity, str(engine.sample_rate),
+                                  f'{pause:g}', f'{crossfade:g}']).encode('utf-8')).hexdigest()
+    writer = ChapterWriter(out_path, engine.sample_rate, key, pause, crossfade)
+    resumed = writer.sentences
+    synthesize_batch = getattr(engine, 'synthesize_batch', None)
+    if synthesize_batch is None:
+        synthesize_batch = lambda texts: [engine.synthesize(text) for text in texts]
+
+    start = time.perf_counter()
+    first_audio = None
+    audio_frames = 0
+    sentences = itertools.islice(iter_sentences(transcript_path), resumed, None)
+    try:
+        while True:
+            batch = list(itertools.islice(sentences, batch_size))
+            if not batch:
+                break
+            for wav in synthesize_batch(batch):
+                samples = to_pcm16(wav)
+                audio_frames += samples.size
+                writer.add(samples)
+            writer.commit()
+            if first_audio is None:
+                first_audio = time.perf_counter() - start
+        elapsed = time.perf_counter() - start
+        writer.finish()
+    except BaseException:
+        writer.close()
+        raise
+
+    audio_seconds = audio_frames / engine.sample_rate
+    return {'sentences': writer.sentences - resumed, 'resumed_from': resumed, 'audio_seconds': audio_seconds,
+            'time_to_first_audio': first_audio, 'rtf': elapsed / audio_seconds if audio_seconds else None}
+
+
+def list_transcripts(paths: List[str]) -> List[str]:
+    """Transcript files from file and directory arguments; directories give their *.txt files, sorted."""
+    transcripts = []
+    for path in paths:
+        if os.path.isdir(path):
+            transcripts.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.txt'))
+        else:
+            transcripts.append(path)
+    return transcripts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Synthesize chapter transcripts into chapter WAVs, resumably.')
+    parser.add_argument('transcripts', nargs='+', help='speaker\\tsentence transcripts or directories of them')
+    parser.add_argument('--output-dir', required=True, help='chapter WAVs are written here as <transcript>.wav')
+    parser.add_argument('--model-path', required=True)
+    parser.add_argument('--config-path', required=True)
+    parser.add_argument('--vocoder-name', default=DEFAULT_VOCODER)
+    parser.add_argument('--engine', default=DEFAULT_ENGINE, help='engine factory as module:attribute')
+    parser.add_argument('--use-cuda', action='store_true')
+    parser.add_argument('--batch-size', type=int, default=8, help='sentences synthesized and committed together')
+    parser.add_argument('--cache-dir', default=None, help='synthesis cache shared with other runs')
+    parser.add_argument('--cache-size', default='2G', help='cache size limit, e.g. 500M or 2G')
+    join = parser.add_mutually_exclusive_group()
+    join.add_argument('--pause', type=float, default=0.3, help='seconds of silence between sentences')
+    join.add_argument('--crossfade', type=float, default=None, help='seconds of overlap between sentences')
+    args = parser.parse_args(argv)
+
+    pause, crossfade = (0.0, args.crossfade) if args.crossfade is not None else (args.pause, 0.0)
+    transcripts = list_transcripts(args.transcripts)
+    todo = []
+    for transcript in transcripts:
+        out_path = os.path.join(args.output_dir, os.path.splitext(os.path.basename(transcript))[0] + '.wav')
+        if os.path.exists(out_path) and not os.path.exists(out_path + '.progress.json'):
+            print(f'[+] Already synthesized: {out_path}')
+        else:
+            todo.append((transcript, out_path))
+    if not todo:
+        return 0
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    engine = load_engine_factory(args.engine)(args.model_path, args.config_path, args.vocoder_name, args.use_cuda)
+    print(f'[+] Model loaded in {time.perf_counter() - start:.1f}s')
+    cache = None
+    if args.cache_dir:
+        from synthesisCache import CachedEngine, SynthesisCache, parse_size
+        cache = SynthesisCache(args.cache_dir, parse_size(args.cache_size))
+        engine = CachedEngine(engine, cache, args.model_path, args.config_path, args.vocoder_name)
+    identity = '\0'.join([os.path.abspath(args.model_path), FileHasher({})(args.model_path),
+                          args.vocoder_name or '', args.engine])
+
+    failures = 0
+    hasher = FileHasher({})
+    for transcript, out_path in todo:
+        try:
+            stats = synthesize_chapter(engine, transcript, out_path, identity, args.batch_size, pause, crossfade,
+                                       hasher)
+        except Exception as e:
+            print(f'[-] {transcript}: {type(e).__name__}: {e} (progress kept, rerun to resume)', file=sys.stderr)
+            failures += 1
+            continue
+        resumed = f', resumed after {stats["resumed_from"]}' if stats['resumed_from'] else ''
+        ttfa = stats['time_to_first_audio']
+        rtf = stats['rtf']
+        print(f'[+] {out_path}: {stats["sentences"]} sentences{resumed}, {stats["audio_seconds"]:.1f}s audio, '
+              f'first audio after {ttfa:.2f}s, RTF {rtf:.3f}' if rtf is not None
+              else f'[+] {out_path}: nothing left to synthesize{resumed}')
+    if cache is not None:
+        from synthesisCache import format_info
+        print(f'[+] Synthesis cache: {format_info(cache.cache_info())}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
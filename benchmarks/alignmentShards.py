@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark: one aligner run over the corpus versus sharded, cached alignment (with the fake aligner)."""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alignSpeechToText import align_corpus
+from syntheticData import WORDS, write_tone_wav
+
+FAKE_ALIGNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fakeAligner.py')
+
+
+def build_corpus(corpus_dir: str, n_recordings: int, seconds: float) -> None:
+    rng = random.Random(0)
+    speaker_dir = os.path.join(corpus_dir, 'Speaker1')
+    os.makedirs(speaker_dir)
+    template = write_tone_wav(os.path.join(corpus_dir, 'template.wav'), seconds)
+    for i in range(n_recordings):
+        base = os.path.join(speaker_dir, f'Book_{i:03d}')
+        shutil.copyfile(template, base + '.wav')
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(' '.join(rng.choice(WORDS) for _ in range(40)))
+    os.remove(template)
+
+
+def timed(label: str, n: int, **kwargs) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        failures = align_corpus(**kwargs)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {elapsed:6.2f}s  ({n / elapsed:6.1f} recordings/s, {len(failures)} failed)')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recordings', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=5.0, help='length of each recording')
+    parser.add_argument('--cost', type=float, default=0.1, help='simulated aligner seconds per recording')
+    parser.add_argument('--shards', type=int, default=8)
+    args = parser.parse_args()
+
+    aligner = f'{sys.executable} {FAKE_ALIGNER} {{corpus}} {{output}} --seconds-per-recording {args.cost}'
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'corpus')
+        build_corpus(corpus, args.recordings, args.seconds)
+        n = args.recordings
+        common = dict(corpus_dir=corpus, aligner=aligner)
+
+        single = timed('single run, cold', n, shards=1, cache_dir=os.path.join(tmp, 'cache1'), **common)
+        sharded = timed(f'{args.shards} shards, cold', n, shards=args.shards,
+                        cache_dir=os.path.join(tmp, 'cache'), **common)
+        timed(f'{args.shards} shards, all cached', n, shards=args.shards, cache_dir=os.path.join(tmp, 'cache'), **common)
+        with open(os.path.join(corpus, 'Speaker1', 'Book_000.txt'), 'a', encoding='utf-8') as f:
+            f.write(' edited')
+        timed(f'{args.shards} shards, one edited', n, shards=args.shards, cache_dir=os.path.join(tmp, 'cache'),
+              **common)
+        print(f'sharding speedup (cold): {single / sharded:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
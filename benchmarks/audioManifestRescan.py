@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Cold index, no-change rescan and query time of AudioManifest against a bare stat walk."""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audioManifest import AudioManifest, iter_wav_stats
+
+
+def write_clips(wavs_dir: str, n_files: int, frame_rate: int = 22050) -> None:
+    """Write n_files silent clips of 0.5 to 15 seconds; only the header matters here."""
+    for i in range(n_files):
+        with wave.open(os.path.join(wavs_dir, f'clip_{i:06d}.wav'), 'wb') as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(frame_rate)
+            out.writeframes(b'\x00\x00' * int(frame_rate * (0.5 + (i % 29) * 0.5)))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wavs_dir = os.path.join(tmp, 'wavs')
+        os.makedirs(wavs_dir)
+        write_clips(wavs_dir, args.files)
+
+        stat_s, _ = timed(lambda: sum(1 for _ in iter_wav_stats(wavs_dir)))
+        with AudioManifest(wavs_dir, os.path.join(tmp, 'manifest.sqlite'), log_level=30) as manifest:
+            cold_s, _ = timed(manifest.refresh)
+            warm_s, counts = timed(manifest.refresh)
+            query_s, clips = timed(lambda: manifest.query(min_duration=1.0, max_duration=10.0))
+
+        print(f'files:            {args.files}')
+        print(f'stat walk:        {stat_s:.3f}s')
+        print(f'cold refresh:     {cold_s:.3f}s')
+        print(f'no-change rescan: {warm_s:.3f}s  {counts}')
+        print(f'query 1-10s:      {query_s:.3f}s  ({len(clips)} clips)')
+
+
+if __name__ == '__main__':
+    main()
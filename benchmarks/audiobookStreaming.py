@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming chapter synthesis with audiobookSynthesizer and fakeSynthesizer.
+
+Reports time to first audio, real-time factor and peak traced memory for
+chapters of growing length. Memory should stay flat as chapters grow. It
+also interrupts a run part-way, resumes it, and checks that the result is
+byte-identical to an uninterrupted run, with pauses and with crossfades.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+os.environ.setdefault('FAKE_TTS_STARTUP_SECONDS', '0')
+os.environ.setdefault('FAKE_TTS_LOAD_SECONDS', '0')
+os.environ.setdefault('FAKE_TTS_SECONDS_PER_CHAR', '0')
+
+from audiobookSynthesizer import synthesize_chapter
+from fakeSynthesizer import FakeEngine
+from syntheticData import synthetic_sentence
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingEngine(FakeEngine):
+    """Fails on the n-th batch, like a run stopped with Ctrl-C."""
+
+    def __init__(self, model_path, fail_at):
+        super().__init__(model_path, None)
+        self.fail_at = fail_at
+        self.batches = 0
+
+    def synthesize_batch(self, texts):
+        self.batches += 1
+        if self.batches == self.fail_at:
+            raise Interrupted()
+        return super().synthesize_batch(texts)
+
+
+def write_transcript(path, n_sentences, seed=0):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(n_sentences):
+            f.write(f'Speaker1\t{synthetic_sentence(rng, rng.randint(6, 20), number_ratio=0.0)}\n')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sentences', type=int, nargs='+', default=[250, 1000, 4000])
+    parser.add_argument('--batch-size', type=int, default=8)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'checkpoint.pth')
+        with open(model_path, 'wb') as f:
+            f.write(b'fake checkpoint')
+        engine = FakeEngine(model_path, None)
+
+        print(f'{"sentences":>9}  {"audio min":>9}  {"first audio":>11}  {"RTF":>6}  {"peak MiB":>8}')
+        for n in args.sentences:
+            transcript = write_transcript(os.path.join(tmp, f'chapter_{n}.txt'), n)
+            tracemalloc.start()
+            stats = synthesize_chapter(engine, transcript, os.path.join(tmp, f'chapter_{n}.wav'),
+                                       batch_size=args.batch_size)
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+            print(f'{n:>9}  {stats["audio_seconds"] / 60:>9.1f}  {stats["time_to_first_audio"]:>10.3f}s  '
+                  f'{stats["rtf"]:>6.4f}  {peak:>8.1f}')
+
+        transcript = write_transcript(os.path.join(tmp, 'resume.txt'), 200, seed=1)
+        for label, pause, crossfade in (('pause', 0.3, 0.0), ('crossfade', 0.0, 0.05)):
+            expected = os.path.join(tmp, f'full_{label}.wav')
+            synthesize_chapter(engine, transcript, expected, batch_size=args.batch_size, pause=pause,
+                               crossfade=crossfade)
+            resumed = os.path.join(tmp, f'resumed_{label}.wav')
+            try:
+                synthesize_chapter(InterruptingEngine(model_path, fail_at=7), transcript, resumed,
+                                   batch_size=args.batch_size, pause=pause, crossfade=crossfade)
+            except Interrupted:
+                pass
+            stats = synthesize_chapter(engine, transcript, resumed, batch_size=args.batch_size, pause=pause,
+                                       crossfade=crossfade)
+            with open(expected, 'rb') as a, open(resumed, 'rb') as b:
+                same = a.read() == b.read()
+            ok = ok and same and stats['resumed_from'] > 0
+            print(f'resume ({label}): resumed after {stats["resumed_from"]} sentences, identical: {same}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Padding ratio and collate throughput of random versus duration-bucketed batches on synthetic lengths."""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bucketSampler import DurationBucketBatchSampler, padding_ratio
+
+NUM_MELS = 80
+
+
+def random_batches(n: int, batch_size: int, seed: int = 0):
+    indices = list(range(n))
+    random.Random(seed).shuffle(indices)
+    return [indices[i:i + batch_size] for i in range(0, n, batch_size)]
+
+
+def collate_throughput(batches, frames) -> float:
+    """Samples/s of building padded (batch, frames, mels) tensors, which scales with padding."""
+    start = time.perf_counter()
+    for batch in batches:
+        longest = max(frames[i] for i in batch)
+        padded = np.zeros((len(batch), longest, NUM_MELS), dtype=np.float32)
+        for row, i in enumerate(batch):
+            padded[row, :frames[i]] = 1.0
+        padded.sum()
+    return sum(len(b) for b in batches) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=20_000)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--max-frames', type=int, default=8000)
+    args = parser.parse_args()
+
+    # Audiobook sentences: mostly 2-8 s with a long tail up to ~20 s
+    rng = random.Random(0)
+    durations = [min(20.0, max(0.5, rng.lognormvariate(1.5, 0.5))) for _ in range(args.samples)]
+    text_lengths = [int(d * 15) for d in durations]
+
+    fixed = DurationBucketBatchSampler(durations, text_lengths, batch_size=args.batch_size)
+    budget = DurationBucketBatchSampler(durations, text_lengths, max_frames=args.max_frames)
+    frames = fixed.frames
+
+    print(f'{"batching":>22} {"batches":>8} {"padding":>8} {"samples/s":>10}')
+    for name, batches in (('random', random_batches(args.samples, args.batch_size)),
+                          ('bucketed fixed size', fixed.batches()),
+                          ('bucketed frame budget', budget.batches())):
+        print(f'{name:>22} {len(batches):>8} {padding_ratio(batches, frames):>8.1%} '
+              f'{collate_throughput(batches, frames):>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the overflow-tts CLI.
+
+Runs ``python -X importtime overflowTTS.py <command> --help`` in a fresh
+interpreter per command and fails if a command takes longer than its
+import-time budget or imports a heavy dependency that belongs to another
+command.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Set, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(REPO_DIR, 'overflowTTS.py')
+
+HEAVY = {'torch', 'TTS', 'trainer', 'pydub', 'praatio', 'nltk', 'ebooklib', 'bs4', 'lxml', 'numpy',
+         'num2words'}
+
+# command -> (heavy modules it may import, import-time budget in ms)
+COMMANDS: Dict[str, Tuple[Set[str], float]] = {
+    '': (set(), 100),
+    'convert': ({'pydub'}, 300),
+    'epub': ({'nltk', 'ebooklib', 'bs4', 'lxml', 'numpy'}, 1500),
+    'align': (set(), 150),
+    'segment': ({'pydub', 'numpy'}, 1000),
+    'vad': ({'numpy', 'pydub'}, 1000),
+    'normalize': ({'num2words'}, 300),
+    'pipeline': (set(), 100),
+    'train': (set(), 100),
+    'server': (set(), 150),
+    'evaluate': ({'numpy'}, 300),
+    'audiobook': ({'numpy'}, 300),
+    'cache': ({'numpy'}, 300),
+    'synth': (HEAVY - {'praatio', 'ebooklib'}, 20000),
+}
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(command: str) -> Tuple[float, float, Set[str], int]:
+    """Run one cold start and return (import ms, wall ms, top-level packages imported, exit code)."""
+    argv = [sys.executable, '-X', 'importtime', CLI] + ([command] if command else []) + ['--help']
+    start = time.perf_counter()
+    result = subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=REPO_DIR)
+    wall_ms = (time.perf_counter() - start) * 1000
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        packages.add(name.split('.')[0])
+        if len(indent) == 1:
+            # Only top-level imports; nested ones are included in their parent's cumulative time
+            total_us += int(cumulative)
+    return total_us / 1000, wall_ms, packages, result.returncode
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='cold starts per command; the fastest is kept')
+    parser.add_argument('--budget', action='append', default=[], metavar='COMMAND=MS',
+                        help='override the import-time budget of a command (use "=MS" for bare --help)')
+    parser.add_argument('--commands', nargs='*', default=None, help='only check these commands')
+    args = parser.parse_args(argv)
+
+    budgets = {command: budget for command, (_, budget) in COMMANDS.items()}
+    for override in args.budget:
+        command, ms = override.split('=', 1)
+        budgets[command] = float(ms)
+
+    failures = []
+    for command, (allowed, _) in COMMANDS.items():
+        if args.commands is not None and command not in args.commands:
+            continue
+        runs = [import_profile(command) for _ in range(args.repeat)]
+        import_ms = min(run[0] for run in runs)
+        wall_ms = min(run[1] for run in runs)
+        unexpected = sorted((runs[0][2] & HEAVY) - allowed)
+        label = command or '--help'
+        print(f'{label:<10} imports {import_ms:8.1f} ms  wall {wall_ms:8.1f} ms  budget {budgets[command]:.0f} ms'
+              + (f'  unexpected: {", ".join(unexpected)}' if unexpected else '')
+              + (f'  (exit {runs[0][3]}, dependency missing?)' if runs[0][3] else ''))
+        if import_ms > budgets[command]:
+            failures.append(f'{label}: {import_ms:.1f} ms over the {budgets[command]:.0f} ms budget')
+        if unexpected:
+            failures.append(f'{label}: imports {", ".join(unexpected)}')
+
+    for failure in failures:
+        print(f'FAIL {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
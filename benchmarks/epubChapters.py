@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Benchmark: file-based EPUB processing versus streaming, parallel chapter extraction."""
+import argparse
+import filecmp
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from splitEpubToSentences import EPUBTranscriptProcessor
+from syntheticData import write_epub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chapters', type=int, default=400)
+    parser.add_argument('--paragraphs', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--parser', default='lxml')
+    args = parser.parse_args()
+
+    processor = EPUBTranscriptProcessor(log_level=logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        epub_path = write_epub(os.path.join(tmp, 'book.epub'), args.chapters, args.paragraphs)
+
+        start = time.perf_counter()
+        processor.process_epub_to_transcripts(epub_path, os.path.join(tmp, 'work'), os.path.join(tmp, 'files'))
+        files_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        processor.stream_epub_to_transcripts(epub_path, os.path.join(tmp, 'stream'), workers=args.workers,
+                                             parser=args.parser)
+        stream_s = time.perf_counter() - start
+
+        names = sorted(os.listdir(os.path.join(tmp, 'files')))
+        _, mismatch, errors = filecmp.cmpfiles(os.path.join(tmp, 'files'), os.path.join(tmp, 'stream'),
+                                               names, shallow=False)
+        n = len(names)
+        print(f'chapters: {n}  workers: {args.workers}  parser: {args.parser}')
+        print(f'files:    {files_s:.2f}s  ({n / files_s:.1f} chapters/s)')
+        print(f'stream:   {stream_s:.2f}s  ({n / stream_s:.1f} chapters/s, {files_s / stream_s:.1f}x)')
+        print(f'differing transcripts: {len(mismatch) + len(errors)}')
+
+
+if __name__ == '__main__':
+    main()
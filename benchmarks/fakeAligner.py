@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Stand-in for ``mfa align`` for tests and benchmarks.
+
+Usage: fakeAligner.py CORPUS_DIR OUTPUT_DIR [--seconds-per-recording S] [--fail-on WORD]
+
+Writes OUTPUT_DIR/<speaker>/<base>.TextGrid for every .wav/.txt pair, with
+the transcript's words spread evenly over the recording.
+"""
+import argparse
+import os
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from syntheticData import write_textgrid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('corpus_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--seconds-per-recording', type=float, default=0.0,
+                        help='simulated alignment cost')
+    parser.add_argument('--fail-on', default=None, help='exit 1 if any transcript contains this word')
+    args = parser.parse_args()
+
+    for speaker in sorted(os.listdir(args.corpus_dir)):
+        speaker_dir = os.path.join(args.corpus_dir, speaker)
+        for name in sorted(os.listdir(speaker_dir)):
+            if not name.endswith('.txt'):
+                continue
+            base_name = name[:-4]
+            with open(os.path.join(speaker_dir, name), encoding='utf-8') as f:
+                words = f.read().split()
+            if args.fail_on and args.fail_on in words:
+                print(f'cannot align {base_name}', flush=True)
+                sys.exit(1)
+            with wave.open(os.path.join(speaker_dir, base_name + '.wav'), 'rb') as wav_file:
+                duration = wav_file.getnframes() / float(wav_file.getframerate())
+            step = duration / max(len(words), 1)
+            intervals = [(round(i * step, 4), round((i + 1) * step, 4), word) for i, word in enumerate(words)]
+            os.makedirs(os.path.join(args.output_dir, speaker), exist_ok=True)
+            write_textgrid(os.path.join(args.output_dir, speaker, base_name + '.TextGrid'), intervals, duration)
+            time.sleep(args.seconds_per_recording)
+            print(f'aligned {speaker}/{base_name}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
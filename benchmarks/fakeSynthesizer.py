@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Stand-in for a Coqui checkpoint, for tests and benchmarks of synthesisServer.
+
+Importing the module sleeps for FAKE_TTS_STARTUP_SECONDS, standing in for
+importing torch and TTS, which every process pays once. As an engine
+(``--engine fakeSynthesizer:FakeEngine``) it sleeps for
+FAKE_TTS_LOAD_SECONDS per checkpoint it loads and writes a short tone per
+text, whose pitch depends on the checkpoint's bytes and the text. Run as
+a script it mimics one ``tts --text ... --model_path ... --out_path ...``
+call.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+STARTUP_SECONDS = float(os.environ.get('FAKE_TTS_STARTUP_SECONDS', '3.0'))
+LOAD_SECONDS = float(os.environ.get('FAKE_TTS_LOAD_SECONDS', '1.0'))
+SECONDS_PER_CHAR = float(os.environ.get('FAKE_TTS_SECONDS_PER_CHAR', '0.002'))
+FRAME_RATE = 22050
+
+time.sleep(STARTUP_SECONDS)
+
+
+class FakeEngine:
+    sample_rate = FRAME_RATE
+
+    def __init__(self, model_path, config_path, vocoder_name=None, use_cuda=False):
+        time.sleep(LOAD_SECONDS)
+        with open(model_path, 'rb') as f:
+            self.model_hash = hashlib.sha1(f.read()).digest()
+        self.vocoder_name = vocoder_name or ''
+
+    def synthesize(self, text):
+        """A float32 tone in [-1, 1], about 0.5 s plus 50 ms per word."""
+        time.sleep(SECONDS_PER_CHAR * len(text))
+        seed = hashlib.sha1(self.model_hash + text.encode('utf-8') + self.vocoder_name.encode('utf-8')).digest()
+        freq = 110 + seed[0] * 2
+        n_frames = int(FRAME_RATE * (0.5 + 0.05 * len(text.split())))
+        return (0.25 * np.sin(2 * np.pi * freq / FRAME_RATE * np.arange(n_frames))).astype(np.float32)
+
+    def synthesize_batch(self, texts):
+        return [self.synthesize(text) for text in texts]
+
+    def save_wav(self, wav, path):
+        with wave.open(path, 'wb') as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(FRAME_RATE)
+            out.writeframes((np.clip(wav, -1.0, 1.0) * 32767).astype('<i2').tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--text', required=True)
+    parser.add_argument('--model_path', required=True)
+    parser.add_argument('--config_path', required=True)
+    parser.add_argument('--out_path', required=True)
+    parser.add_argument('--vocoder_name', default=None)
+    args = parser.parse_args()
+    engine = FakeEngine(args.model_path, args.config_path, args.vocoder_name)
+    engine.save_wav(engine.synthesize(args.text), args.out_path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
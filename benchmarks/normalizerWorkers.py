@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Throughput of TTSDatasetNormalizer.process_file at different worker counts."""
+import argparse
+import filecmp
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TTSDatasetNormalizer import TTSDatasetNormalizer
+from syntheticData import write_metadata_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    normalizer = TTSDatasetNormalizer(log_level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = write_metadata_csv(os.path.join(tmp, 'metadata.csv'), args.rows)
+        reference = None
+
+        print(f'{"workers":>8} {"seconds":>9} {"rows/s":>10} {"identical":>10}')
+        for workers in args.workers:
+            output_path = os.path.join(tmp, f'out_{workers}.csv')
+            start = time.perf_counter()
+            normalizer.process_file(input_path, output_path,
+                                    workers=workers, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                reference = output_path
+            identical = filecmp.cmp(reference, output_path, shallow=False)
+            print(f'{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>10.0f} {str(identical):>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Microbenchmark: per-call number expansion versus the cached NumberExpander."""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from num2words import num2words
+
+from TTSDatasetNormalizer import NumberExpander
+from syntheticData import synthetic_corpus
+
+
+def legacy_expand_numbers(text: str) -> str:
+    """The original expand_numbers path: compile per call, num2words per match."""
+    pattern = re.compile(r'\b\d+(?:[,.]\d+)*\b')
+
+    def convert_match(match):
+        try:
+            return num2words(float(match.group(0).replace(',', '')), lang='en')
+        except ValueError:
+            return match.group(0)
+
+    return pattern.sub(convert_match, text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=1_000_000)
+    parser.add_argument('--cache-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    lines = synthetic_corpus(args.tokens)
+    expander = NumberExpander(max_size=args.cache_size, logger=logging.getLogger('bench'))
+
+    start = time.perf_counter()
+    legacy = [legacy_expand_numbers(line) for line in lines]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = [expander.expand(line) for line in lines]
+    cached_s = time.perf_counter() - start
+
+    assert legacy == cached, 'cached expansion differs from the per-call path'
+    print(f'lines: {len(lines)}  tokens: ~{args.tokens}')
+    print(f'per-call: {legacy_s:.2f}s')
+    print(f'cached:   {cached_s:.2f}s  ({legacy_s / cached_s:.1f}x)')
+    print(f'cache:    {expander.cache_info()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Startup and first-epoch load time of the packed phoneme cache versus one .npy file per utterance."""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from phonemeCache import PackedPhonemeCache, precompute
+from syntheticData import synthetic_corpus
+
+
+def fake_text_to_ids(text, language=None):
+    """Stand-in for the phonemizer so the benchmark measures cache I/O only."""
+    return [ord(c) % 131 for c in text]
+
+
+def per_file_compute_or_load(cache_dir, file_name, text, language):
+    """The stock PhonemeDataset.compute_or_load."""
+    cache_path = os.path.join(cache_dir, file_name + '_phoneme.npy')
+    try:
+        ids = np.load(cache_path)
+    except FileNotFoundError:
+        ids = fake_text_to_ids(text, language=language)
+        np.save(cache_path, ids)
+    return ids
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--utterances', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    texts = synthetic_corpus(args.utterances * 14)[:args.utterances]
+    items = [(f'utt_{i:07d}', text, 'en-us') for i, text in enumerate(texts)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_file_dir = os.path.join(tmp, 'per_file')
+        os.makedirs(per_file_dir)
+
+        def per_file_pass():
+            for name, text, language in items:
+                per_file_compute_or_load(per_file_dir, name, text, language)
+
+        def packed_open():
+            return PackedPhonemeCache(os.path.join(tmp, 'packed'), {'phonemizer': 'fake'},
+                                      log_level=logging.WARNING)
+
+        def packed_precompute():
+            precompute(packed_open(), [(text, language) for _, text, language in items],
+                       fake_text_to_ids, num_workers=args.workers)
+
+        def packed_epoch():
+            cache = packed_open()
+            for _, text, language in items:
+                cache.get(text, language)
+
+        rows = [
+            ('per-file', timed(per_file_pass), timed(per_file_pass), timed(per_file_pass)),
+            ('packed', timed(packed_precompute), timed(packed_precompute), timed(packed_epoch)),
+        ]
+        print(f'{"cache":>9} {"cold fill":>10} {"startup":>10} {"1st epoch":>10}   ({args.utterances} utterances)')
+        for name, cold, startup, epoch in rows:
+            print(f'{name:>9} {cold:>9.2f}s {startup:>9.2f}s {epoch:>9.2f}s')
+
+
+if __name__ == '__main__':
+    main()
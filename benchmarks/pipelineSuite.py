@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: throughput and peak memory of every data-prep stage on synthetic inputs.
+
+Inputs are generated locally with syntheticData: tone-and-noise MP3s and
+WAVs with TextGrids, an EPUB with numeric-heavy text, chapter texts, and
+large metadata files. Each stage then runs in its own process, so its peak
+RSS is its own. Results can be saved as a baseline JSON; a later run
+compared against it fails when a stage's throughput drops, or its peak
+memory grows, by more than --threshold.
+
+    python3 benchmarks/pipelineSuite.py --save-baseline
+    python3 benchmarks/pipelineSuite.py                   # compare with benchmarks/baseline.json
+    python3 benchmarks/pipelineSuite.py --scale 0.1 --stages normalize format
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from syntheticData import (sentence_intervals, synthetic_sentence, write_epub, write_ljspeech_metadata,
+                           write_metadata_csv, write_textgrid, write_tone_mp3, write_tone_wav)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+
+def wav_seconds(wavs_dir):
+    total = 0.0
+    for name in os.listdir(wavs_dir):
+        if name.endswith('.wav'):
+            with wave.open(os.path.join(wavs_dir, name), 'rb') as f:
+                total += f.getnframes() / f.getframerate()
+    return total
+
+
+def prepare_convert(inputs, scale):
+    for i in range(4):
+        write_tone_mp3(os.path.join(inputs, f'Chapter_{i + 1:02d}.mp3'), 60 * scale, seed=i)
+
+
+def run_convert(inputs, output, stream=False):
+    from mp3Towav import convert_mp3_to_wav
+    results = convert_mp3_to_wav(inputs, output, sample_rate=22050, channels=1, stream=stream)
+    failed = {name: error for name, (status, error) in results.items() if status == 'failed'}
+    if failed:
+        raise RuntimeError(f'convert_mp3_to_wav failed: {failed}')
+    return wav_seconds(output)
+
+
+def run_convert_stream(inputs, output):
+    return run_convert(inputs, output, stream=True)
+
+
+def prepare_epub(inputs, scale):
+    write_epub(os.path.join(inputs, 'book.epub'), max(1, int(100 * scale)), number_ratio=0.4)
+
+
+def run_epub(inputs, output):
+    from splitEpubToSentences import EPUBTranscriptProcessor
+    processor = EPUBTranscriptProcessor(download_nltk=False, log_level=logging.WARNING)
+    return len(processor.extract_chapters(os.path.join(inputs, 'book.epub'), output))
+
+
+def prepare_transcript(inputs, scale):
+    import random
+    rng = random.Random(0)
+    for i in range(10):
+        with open(os.path.join(inputs, f'chapter_{i + 1:02d}.txt'), 'w', encoding='utf-8') as f:
+            for _ in range(max(1, int(100 * scale))):
+                sentences = [synthetic_sentence(rng, number_ratio=0.4).capitalize() + rng.choice('.?!')
+                             for _ in range(rng.randint(3, 8))]
+                f.write(' '.join(sentences) + '\n')
+
+
+def run_transcript(inputs, output):
+    from splitEpubToSentences import EPUBTranscriptProcessor
+    processor = EPUBTranscriptProcessor(log_level=logging.WARNING)
+    sentences = 0
+    for name in sorted(os.listdir(inputs)):
+        out_path = os.path.join(output, name)
+        if not processor.process_transcript(os.path.join(inputs, name), out_path, 'Speaker1'):
+            raise RuntimeError(f'process_transcript failed on {name}')
+        with open(out_path, 'r', encoding='utf-8') as f:
+            sentences += sum(1 for _ in f)
+    return sentences
+
+
+def prepare_segment(inputs, scale):
+    speaker_dir = os.path.join(inputs, 'Speaker1')
+    os.makedirs(speaker_dir)
+    seconds = 1200 * scale
+    write_tone_wav(os.path.join(speaker_dir, 'Chapter_01.wav'), seconds)
+    write_textgrid(os.path.join(speaker_dir, 'Chapter_01.TextGrid'), sentence_intervals(seconds), seconds)
+    with open(os.path.join(speaker_dir, 'Chapter_01.txt'), 'w') as f:
+        f.write('synthetic')
+
+
+def run_segment(inputs, output):
+    from speechDatasetPreprocessor import prepare_dataset
+    prepare_dataset(inputs, output)
+    return wav_seconds(os.path.join(output, 'wavs'))
+
+
+def prepare_normalize(inputs, scale):
+    write_metadata_csv(os.path.join(inputs, 'metadata.csv'), max(1, int(200_000 * scale)))
+
+
+def run_normalize(inputs, output):
+    from TTSDatasetNormalizer import TTSDatasetNormalizer
+    normalizer = TTSDatasetNormalizer(log_level=logging.WARNING)
+    input_path = os.path.join(inputs, 'metadata.csv')
+    if not normalizer.process_file(input_path, os.path.join(output, 'metadata.csv')):
+        raise RuntimeError('process_file failed')
+    with open(input_path, 'r', encoding='utf-8') as f:
+        return sum(1 for _ in f)
+
+
+def prepare_ljspeech(inputs, scale):
+    write_ljspeech_metadata(os.path.join(inputs, 'metadata.csv'), max(1, int(1_000_000 * scale)))
+
+
+def run_format(inputs, output):
+    from format import ljspeech_formatter
+    return sum(1 for _ in ljspeech_formatter(os.path.join(inputs, 'metadata.csv')))
+
+
+def run_samples(inputs, output):
+    from sampleTable import load_tts_samples
+    dataset = {'formatter': 'ljspeech', 'path': inputs, 'meta_file_train': 'metadata.csv'}
+    train, evaluation = load_tts_samples(dataset, eval_split_max_size=256)
+    return len(train) + len(evaluation)
+
+
+# name: (prepare inputs, run stage, unit of throughput)
+STAGES = {
+    'convert': (prepare_convert, run_convert, 'audio s'),
+    'convert-stream': (prepare_convert, run_convert_stream, 'audio s'),
+    'epub': (prepare_epub, run_epub, 'chapters'),
+    'transcript': (prepare_transcript, run_transcript, 'sentences'),
+    'segment': (prepare_segment, run_segment, 'audio s'),
+    'normalize': (prepare_normalize, run_normalize, 'rows'),
+    'format': (prepare_ljspeech, run_format, 'rows'),
+    'samples': (prepare_ljspeech, run_samples, 'rows'),
+}
+
+
+def run_stage(name, inputs, output):
+    """Run one stage in this process and print its result as JSON."""
+    os.makedirs(output, exist_ok=True)
+    start = time.perf_counter()
+    units = STAGES[name][1](inputs, output)
+    elapsed = time.perf_counter() - start
+    # ffmpeg runs as a child of the convert stage
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(json.dumps({'seconds': elapsed, 'units': units, 'peak_rss_mb': peak_kb / 1024}))
+
+
+def measure(name, inputs, tmp, repeat):
+    """Best of repeat runs of a stage, each in a fresh process and output directory."""
+    best = None
+    for i in range(repeat):
+        output = os.path.join(tmp, f'{name}_out_{i}')
+        result = subprocess.run([sys.executable, __file__, '--run-stage', name, inputs, output],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f'{name} failed:\n{result.stderr.strip()}')
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None:
+            best = stats
+        else:
+            best['seconds'] = min(best['seconds'], stats['seconds'])
+            best['peak_rss_mb'] = min(best['peak_rss_mb'], stats['peak_rss_mb'])
+    best['throughput'] = best['units'] / best['seconds'] if best['seconds'] else 0.0
+    return best
+
+
+def regressions(results, baseline, threshold):
+    """(stage, description) for every stage that got slower or bigger than the baseline allows."""
+    found = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if stats['throughput'] < base['throughput'] * (1 - threshold):
+            found.append((name, f'throughput {stats["throughput"]:.1f} < {base["throughput"]:.1f} '
+                                f'{STAGES[name][2]}/s'))
+        if stats['peak_rss_mb'] > base['peak_rss_mb'] * (1 + threshold):
+            found.append((name, f'peak RSS {stats["peak_rss_mb"]:.0f} > {base["peak_rss_mb"]:.0f} MB'))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies every input size')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage; the best one is kept')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='write these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed throughput drop or peak memory growth, as a fraction (default: 0.25)')
+    parser.add_argument('--run-stage', nargs=3, metavar=('STAGE', 'INPUTS', 'OUTPUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        run_stage(*args.run_stage)
+        return 0
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('scale') == args.scale:
+            baseline = saved['stages']
+        else:
+            print(f'[-] {args.baseline} was recorded at scale {saved.get("scale")}, not compared', file=sys.stderr)
+
+    results = {}
+    failures = []
+    print(f'{"stage":>14} {"units":>9} {"seconds":>8} {"throughput":>22} {"peak RSS MB":>12} {"vs baseline":>12}')
+    with tempfile.TemporaryDirectory() as tmp:
+        prepared = {}
+        for name in args.stages:
+            prepare = STAGES[name][0]
+            if prepare not in prepared:
+                inputs = os.path.join(tmp, f'{name}_inputs')
+                os.makedirs(inputs)
+                prepare(inputs, args.scale)
+                prepared[prepare] = inputs
+            try:
+                stats = results[name] = measure(name, prepared[prepare], tmp, args.repeat)
+            except RuntimeError as e:
+                print(f'{name:>14} failed: {str(e).splitlines()[-1]}')
+                failures.append(name)
+                continue
+            base = baseline.get(name)
+            change = f'{stats["throughput"] / base["throughput"] - 1:+.0%}' if base else '-'
+            throughput = f'{stats["throughput"]:.1f} {STAGES[name][2]}/s'
+            print(f'{name:>14} {stats["units"]:>9.0f} {stats["seconds"]:>8.2f} {throughput:>22} '
+                  f'{stats["peak_rss_mb"]:>12.0f} {change:>12}')
+
+    if failures:
+        print(f'[-] Failed stages: {" ".join(failures)}', file=sys.stderr)
+    if args.save_baseline:
+        if failures:
+            print('[-] Baseline not saved', file=sys.stderr)
+            return 1
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'scale': args.scale, 'python': platform.python_version(), 'machine': platform.node(),
+                       'stages': results}, f, indent=2)
+        print(f'[+] Baseline saved to {args.baseline}')
+        return 0
+
+    found = regressions(results, baseline, args.threshold)
+    for name, description in found:
+        print(f'[-] Regression in {name}: {description}', file=sys.stderr)
+    return 1 if found or failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
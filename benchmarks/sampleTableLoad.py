@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Peak RSS and wall-clock of loading a multi-million-row LJSpeech metadata file.
+
+Compares sampleTable.load_tts_samples with Coqui's load_tts_samples
+(formatter, extra keys and eval split). When TTS is not installed, a copy
+of Coqui's list-of-dicts code path is used instead. Each loader runs in its own
+process and prints a digest of its eval split, so the two can be checked
+for the same samples.
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from syntheticData import write_ljspeech_metadata
+
+
+def coqui_load_tts_samples(dataset, eval_split_max_size, eval_split_size):
+    """Coqui's ljspeech formatter, add_extra_keys and split_dataset, for when TTS is not installed."""
+    import numpy as np
+
+    root_path = dataset['path']
+    items = []
+    with open(os.path.join(root_path, dataset['meta_file_train']), 'r', encoding='utf-8') as f:
+        for line in f:
+            cols = line.split('|')
+            wav_file = os.path.join(root_path, 'wavs', cols[0] + '.wav')
+            items.append({'text': cols[2], 'audio_file': wav_file, 'speaker_name': 'ljspeech',
+                          'root_path': root_path})
+    for item in items:
+        item['language'] = dataset['language']
+        relfilepath = os.path.splitext(os.path.relpath(item['audio_file'], item['root_path']))[0]
+        item['audio_unique_name'] = f'{dataset["dataset_name"]}#{relfilepath}'
+
+    is_multi_speaker = len(set(item['speaker_name'] for item in items)) > 1
+    eval_size = min(eval_split_max_size, int(len(items) * eval_split_size))
+    np.random.seed(0)
+    np.random.shuffle(items)
+    assert not is_multi_speaker
+    return items[eval_size:], items[:eval_size]
+
+
+def run_loader(metafile, loader, eval_split_max_size):
+    """Load in this process and print timings and an eval split digest as JSON."""
+    dataset = {'formatter': 'ljspeech', 'path': os.path.dirname(metafile), 'dataset_name': '', 'language': '',
+               'meta_file_train': os.path.basename(metafile), 'meta_file_val': '', 'ignored_speakers': None,
+               'meta_file_attn_mask': ''}
+    start = time.perf_counter()
+    if loader == 'table':
+        from sampleTable import load_tts_samples
+        train, evaluation = load_tts_samples(dataset, eval_split_max_size=eval_split_max_size)
+    else:
+        try:
+            from TTS.tts.configs.shared_configs import BaseDatasetConfig
+            from TTS.tts.datasets import load_tts_samples
+            train, evaluation = load_tts_samples(BaseDatasetConfig(**dataset),
+                                                 eval_split_max_size=eval_split_max_size)
+        except ImportError:
+            train, evaluation = coqui_load_tts_samples(dataset, eval_split_max_size, 0.01)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    digest = hashlib.sha1()
+    for sample in evaluation:
+        digest.update(f'{sample["audio_unique_name"]}|{sample["audio_file"]}|{sample["text"]}'.encode('utf-8'))
+    text_chars = sum(len(sample['text']) for sample in train)
+    print(json.dumps({'loader': loader, 'seconds': elapsed, 'peak_rss_mb': peak_kb / 1024,
+                      'train': len(train), 'eval': len(evaluation), 'eval_digest': digest.hexdigest(),
+                      'train_text_chars': text_chars}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--eval-split-max-size', type=int, default=256)
+    parser.add_argument('--loaders', nargs='+', default=['dicts', 'table'])
+    parser.add_argument('--run-loader', nargs=2, metavar=('METAFILE', 'LOADER'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_loader:
+        run_loader(*args.run_loader, args.eval_split_max_size)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        metafile = write_ljspeech_metadata(os.path.join(tmp, 'metadata.csv'), args.rows)
+        print(f'{args.rows} rows, {os.path.getsize(metafile) / 2 ** 20:.0f} MiB of metadata')
+        print(f'{"loader":>8} {"seconds":>9} {"peak RSS MB":>12}')
+        results = []
+        for loader in args.loaders:
+            result = subprocess.run([sys.executable, __file__, '--run-loader', metafile, loader],
+                                    check=True, capture_output=True, text=True)
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            results.append(stats)
+            print(f'{loader:>8} {stats["seconds"]:>9.2f} {stats["peak_rss_mb"]:>12.0f}')
+        same = len(Counter((r['train'], r['eval'], r['eval_digest'], r['train_text_chars']) for r in results)) == 1
+        print(f'same samples and eval split: {same}')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
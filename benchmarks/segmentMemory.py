@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Peak RSS and wall-clock of speechDatasetPreprocessor.prepare_dataset per backend on a multi-hour WAV."""
+import argparse
+import filecmp
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from syntheticData import sentence_intervals, write_textgrid, write_tone_wav
+
+
+def run_backend(corpus_dir, output_dir, backend):
+    """Run one backend in this process and print its timings as JSON."""
+    from speechDatasetPreprocessor import prepare_dataset
+
+    start = time.perf_counter()
+    prepare_dataset(corpus_dir, output_dir, backend=backend)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'backend': backend, 'seconds': elapsed, 'peak_rss_mb': peak_kb / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=float, default=2.0)
+    parser.add_argument('--sample-rate', type=int, default=22050)
+    parser.add_argument('--backends', nargs='+', default=['pydub', 'numpy', 'stream'])
+    parser.add_argument('--run-backend', nargs=3, metavar=('CORPUS', 'OUTPUT', 'BACKEND'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_backend:
+        run_backend(*args.run_backend)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        speaker_dir = os.path.join(tmp, 'corpus', 'Speaker1')
+        os.makedirs(speaker_dir)
+        seconds = args.hours * 3600
+        write_tone_wav(os.path.join(speaker_dir, 'Chapter_01.wav'), seconds, args.sample_rate)
+        write_textgrid(os.path.join(speaker_dir, 'Chapter_01.TextGrid'), sentence_intervals(seconds), seconds)
+        with open(os.path.join(speaker_dir, 'Chapter_01.txt'), 'w') as f:
+            f.write('synthetic')
+
+        outputs = []
+        print(f'{"backend":>8} {"seconds":>9} {"peak RSS MB":>12}')
+        for backend in args.backends:
+            output_dir = os.path.join(tmp, f'out_{backend}')
+            result = subprocess.run(
+                [sys.executable, __file__, '--run-backend', os.path.join(tmp, 'corpus'), output_dir, backend],
+                check=True, capture_output=True, text=True
+            )
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f'{backend:>8} {stats["seconds"]:>9.2f} {stats["peak_rss_mb"]:>12.1f}')
+            outputs.append((backend, output_dir))
+
+        reference_backend, reference_dir = outputs[0]
+        reference = os.path.join(reference_dir, 'wavs')
+        for backend, output_dir in outputs[1:]:
+            wavs = os.path.join(output_dir, 'wavs')
+            _, mismatch, errors = filecmp.cmpfiles(reference, wavs, os.listdir(reference), shallow=False)
+            print(f'{backend}: {len(mismatch) + len(errors)} files differ from {reference_backend}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark: per-line sent_tokenize versus the batched SentenceTokenizer, serial and in a pool."""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nltk
+from nltk.tokenize import sent_tokenize
+
+import splitEpubToSentences
+from splitEpubToSentences import SentenceTokenizer, _init_worker
+from syntheticData import synthetic_sentence
+
+
+def synthetic_lines(n_lines: int, sentences_per_line: int = 4, seed: int = 0):
+    rng = random.Random(seed)
+    return [' '.join(synthetic_sentence(rng).capitalize() + '.' for _ in range(sentences_per_line))
+            for _ in range(n_lines)]
+
+
+def _tokenize_chunk(lines):
+    return splitEpubToSentences._worker_tokenizer.tokenize_batch(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--download-check', action='store_true',
+                        help="also time the nltk.download('punkt') call the old constructor made")
+    args = parser.parse_args()
+
+    tokenizer = SentenceTokenizer(download=False)
+    if not tokenizer.is_available():
+        sys.exit(f"The Punkt model is not installed; run nltk.download('{tokenizer.resource}') first")
+    lines = synthetic_lines(args.lines)
+
+    if args.download_check:
+        start = time.perf_counter()
+        nltk.download('punkt', quiet=True)
+        print(f'download check: {time.perf_counter() - start:.2f}s per processor construction')
+
+    start = time.perf_counter()
+    legacy = [sent_tokenize(line) for line in lines]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, len(lines), args.batch_size):
+        batched.extend(tokenizer.tokenize_batch(lines[i:i + args.batch_size]))
+    batched_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = [lines[i:i + args.batch_size] for i in range(0, len(lines), args.batch_size)]
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(SentenceTokenizer(download=False),)) as executor:
+        pooled = [sentences for chunk in executor.map(_tokenize_chunk, chunks) for sentences in chunk]
+    pooled_s = time.perf_counter() - start
+
+    assert legacy == batched == pooled, 'batched tokenization differs from sent_tokenize'
+    n = len(lines)
+    print(f'lines: {n}  batch size: {args.batch_size}  workers: {args.workers}')
+    print(f'per-line: {legacy_s:.2f}s  ({n / legacy_s:,.0f} lines/s)')
+    print(f'batched:  {batched_s:.2f}s  ({n / batched_s:,.0f} lines/s, {legacy_s / batched_s:.1f}x)')
+    print(f'pool:     {pooled_s:.2f}s  ({n / pooled_s:,.0f} lines/s, {legacy_s / pooled_s:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
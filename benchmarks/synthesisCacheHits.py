@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: synthesisCache in front of fakeSynthesizer.
+
+Synthesizes the same sentences twice through a CachedEngine and reports
+the time of each pass, the hit rate and the bytes saved; the second pass
+must return the same waveforms. It then fills a small cache past its
+limit to check that eviction keeps it bounded, and has several processes
+write and read overlapping entries of one cache at once, checking that no
+reader ever sees a partial entry.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+os.environ.setdefault('FAKE_TTS_STARTUP_SECONDS', '0')
+os.environ.setdefault('FAKE_TTS_LOAD_SECONDS', '0')
+os.environ.setdefault('FAKE_TTS_SECONDS_PER_CHAR', '0.0002')
+
+import numpy as np
+
+from fakeSynthesizer import FakeEngine
+from synthesisCache import CachedEngine, SynthesisCache, format_info
+from syntheticData import synthetic_sentence
+
+
+def make_checkpoint(tmp):
+    model_path = os.path.join(tmp, 'checkpoint.pth')
+    with open(model_path, 'wb') as f:
+        f.write(b'fake checkpoint')
+    config_path = os.path.join(tmp, 'config.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write('{"audio": {"sample_rate": 22050}}')
+    return model_path, config_path
+
+
+def writer(args):
+    """Put and get overlapping entries; count waveforms that differ from a fresh synthesis."""
+    cache_dir, max_bytes, model_path, config_path, texts, seed = args
+    engine = FakeEngine(model_path, config_path)
+    cache = SynthesisCache(cache_dir, max_bytes)
+    rng = random.Random(seed)
+    bad = 0
+    for _ in range(len(texts) * 3):
+        text = rng.choice(texts)
+        key = cache.key(text, model_path, config_path)
+        wav = cache.get(key)
+        expected = engine.synthesize(text)
+        if wav is None:
+            cache.put(key, expected)
+        elif not np.array_equal(wav, expected):
+            bad += 1
+    return bad, cache.cache_info()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sentences', type=int, default=400)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    sentences = [synthetic_sentence(rng, rng.randint(6, 20), number_ratio=0.0) for _ in range(args.sentences)]
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path, config_path = make_checkpoint(tmp)
+        cache = SynthesisCache(os.path.join(tmp, 'cache'))
+        engine = CachedEngine(FakeEngine(model_path, config_path), cache, model_path, config_path)
+
+        passes = []
+        for label in ('cold', 'warm'):
+            start = time.perf_counter()
+            wavs = []
+            for i in range(0, len(sentences), args.batch_size):
+                wavs.extend(engine.synthesize_batch(sentences[i:i + args.batch_size]))
+            passes.append(wavs)
+            print(f'{label}: {time.perf_counter() - start:.2f}s  ({format_info(cache.cache_info())})')
+        same = all(np.array_equal(a, b) for a, b in zip(*passes))
+        ok = ok and same
+        print(f'warm pass identical: {same}')
+
+        # Keep room for about a quarter of the sentences
+        entry_bytes = cache.cache_info()['size'] / len(sentences)
+        max_bytes = int(entry_bytes * len(sentences) / 4)
+        small = SynthesisCache(os.path.join(tmp, 'small'), max_bytes)
+        for sentence, wav in zip(sentences, passes[0]):
+            small.put(small.key(sentence, model_path, config_path), wav)
+        size = sum(e[1] for e in small.entries())
+        bounded = size <= max_bytes
+        ok = ok and bounded
+        print(f'eviction: {small.evictions} evicted, {size / 2 ** 20:.1f}/{max_bytes / 2 ** 20:.1f} MiB, '
+              f'within limit: {bounded}')
+
+        shared = os.path.join(tmp, 'shared')
+        texts = sentences[:100]
+        jobs = [(shared, max_bytes // 2, model_path, config_path, texts, seed) for seed in range(args.workers)]
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(writer, jobs)
+        bad = sum(r[0] for r in results)
+        hits = sum(r[1]['hits'] for r in results)
+        lookups = hits + sum(r[1]['misses'] for r in results)
+        leftovers = [name for _, _, names in os.walk(shared) for name in names if name.endswith('.tmp')]
+        ok = ok and not bad and not leftovers
+        print(f'{args.workers} concurrent writers: {time.perf_counter() - start:.2f}s, {hits}/{lookups} hits, '
+              f'{bad} corrupt reads, {len(leftovers)} stray temporary files')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
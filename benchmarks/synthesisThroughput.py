@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: checkpoint test phrases through synthesisServer against one process per checkpoint.
+
+Uses fakeSynthesizer, which simulates the cost of importing torch/TTS
+(once per process) and of loading each checkpoint. The baseline runs one
+fakeSynthesizer process per checkpoint, four at a time, as test.sh ran
+``tts`` under GNU parallel. The server runs are a cold start (models
+loaded once) and a warm rerun (models resident). Output files must match
+the baseline byte for byte.
+"""
+import argparse
+import filecmp
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SERVER = os.path.join(REPO_DIR, 'synthesisServer.py')
+TEXT = 'The quick brown fox jumps over the lazy dog.'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def client(port, base_dir, output_dir, checkpoints, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, SERVER, '--port', str(port), '--engine', 'fakeSynthesizer:FakeEngine',
+                    'client', '--text', TEXT, '--model-base-dir', base_dir, '--output-dir', output_dir,
+                    '--checkpoints', *checkpoints, '--jobs', '4', '--spawn', '--idle-timeout', '60',
+                    '--max-models', str(len(checkpoints))],
+                   check=True, env=env, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--checkpoints', type=int, default=6)
+    parser.add_argument('--startup-seconds', type=float, default=3.0, help='simulated torch/TTS import time')
+    parser.add_argument('--load-seconds', type=float, default=1.0, help='simulated checkpoint load time')
+    args = parser.parse_args()
+
+    env = dict(os.environ, FAKE_TTS_STARTUP_SECONDS=str(args.startup_seconds),
+               FAKE_TTS_LOAD_SECONDS=str(args.load_seconds),
+               PYTHONPATH=os.pathsep.join([BENCH_DIR, os.environ.get('PYTHONPATH', '')]))
+    checkpoints = [str(55500 + 500 * i) for i in range(args.checkpoints)]
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = os.path.join(tmp, 'out')
+        os.makedirs(base_dir + '1e-3')
+        with open(os.path.join(base_dir + '1e-3', 'config.json'), 'w') as f:
+            f.write('{}')
+        for checkpoint in checkpoints:
+            with open(os.path.join(base_dir + '1e-3', f'checkpoint_{checkpoint}.pth'), 'wb') as f:
+                f.write(checkpoint.encode() * 64)
+
+        baseline_dir = os.path.join(tmp, 'baseline')
+        os.makedirs(baseline_dir)
+
+        def spawn(checkpoint):
+            subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'fakeSynthesizer.py'), '--text', TEXT,
+                            '--model_path', os.path.join(base_dir + '1e-3', f'checkpoint_{checkpoint}.pth'),
+                            '--config_path', os.path.join(base_dir + '1e-3', 'config.json'),
+                            '--out_path', os.path.join(baseline_dir, f'1e-3_{checkpoint}.wav'),
+                            '--vocoder_name', 'vocoder_models/en/ljspeech/hifigan_v2'], check=True, env=env)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(spawn, checkpoints))
+        spawn_s = time.perf_counter() - start
+
+        try:
+            cold_s = client(port, base_dir, os.path.join(tmp, 'cold'), checkpoints, env)
+            warm_s = client(port, base_dir, os.path.join(tmp, 'warm'), checkpoints, env)
+        finally:
+            subprocess.run([sys.executable, SERVER, '--port', str(port), 'stop'], stdout=subprocess.DEVNULL)
+
+        names = [f'1e-3_{checkpoint}.wav' for checkpoint in checkpoints]
+        same = all(filecmp.cmp(os.path.join(baseline_dir, name), os.path.join(tmp, run, name), shallow=False)
+                   for run in ('cold', 'warm') for name in names)
+
+    print(f'{args.checkpoints} checkpoints, simulated {args.startup_seconds:.1f}s startup per process '
+          f'and {args.load_seconds:.1f}s load per checkpoint')
+    print(f'  process per checkpoint: {spawn_s:6.2f}s')
+    print(f'  server, cold:           {cold_s:6.2f}s')
+    print(f'  server, warm:           {warm_s:6.2f}s  ({spawn_s / warm_s:.0f}x)')
+    print(f'  outputs identical: {same}')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
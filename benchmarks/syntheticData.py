@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Generators for synthetic benchmark inputs. Everything is produced locally and deterministically."""
+import os
+import random
+from typing import List, Tuple
+
+WORDS = [
+    'the', 'chapter', 'road', 'father', 'church', 'voice', 'window', 'hours',
+    'letter', 'sister', 'verse', 'morning', 'street', 'silence', 'question',
+    'answer', 'people', 'believe', 'remember', 'finally',
+]
+
+NUMBERS = ['1', '2', '3', '12', '1963', '2009', '1,000', '3.5', '42', '100', '7']
+
+
+def synthetic_sentence(rng: random.Random, n_words: int = 14, number_ratio: float = 0.15) -> str:
+    """Build a sentence mixing words with number tokens that need expansion."""
+    tokens = []
+    for _ in range(n_words):
+        if rng.random() < number_ratio:
+            tokens.append(rng.choice(NUMBERS))
+        else:
+            tokens.append(rng.choice(WORDS))
+    return ' '.join(tokens)
+
+
+def write_metadata_csv(path: str, n_rows: int, seed: int = 0, delimiter: str = '|') -> str:
+    """Write an LJSpeech-style ``ID.wav|Transcription`` metadata file."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n_rows):
+            f.write(f'Book_{i // 500:03d}_{i % 500 + 1}.wav{delimiter}{synthetic_sentence(rng)}\n')
+    return path
+
+
+def write_ljspeech_metadata(path: str, n_rows: int, seed: int = 0) -> str:
+    """Write an LJSpeech ``ID|transcription|normalized transcription`` file, as load_tts_samples reads it."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n_rows):
+            sentence = synthetic_sentence(rng, number_ratio=0.0)
+            f.write(f'Book_{i // 500:03d}_{i % 500 + 1}|{sentence}|{sentence}\n')
+    return path
+
+
+def synthetic_corpus(n_tokens: int, seed: int = 0) -> List[str]:
+    """Return a list of lines totalling roughly ``n_tokens`` tokens."""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < n_tokens:
+        line = synthetic_sentence(rng)
+        lines.append(line)
+        total += line.count(' ') + 1
+    return lines
+
+
+def write_tone_wav(path: str,
+                   seconds: float,
+                   frame_rate: int = 22050,
+                   channels: int = 1,
+                   sample_width: int = 2,
+                   seed: int = 0,
+                   block_seconds: float = 60.0) -> str:
+    """
+    Write a tone-plus-noise PCM WAV, streaming it in blocks so multi-hour files fit in memory.
+
+    The tone is switched on and off every few seconds so the file has
+    speech-like bursts separated by near-silence.
+    """
+    import math
+    import wave
+    from array import array
+
+    rng = random.Random(seed)
+    max_amp = (1 << (8 * sample_width - 1)) - 1
+    typecode = {1: 'b', 2: 'h', 4: 'i'}[sample_width]
+    n_frames = int(seconds * frame_rate)
+    block = int(block_seconds * frame_rate)
+    step = 2 * math.pi * 220.0 / frame_rate
+
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(channels)
+        out.setsampwidth(sample_width)
+        out.setframerate(frame_rate)
+        for block_start in range(0, n_frames, block):
+            samples = array(typecode)
+            for i in range(block_start, min(block_start + block, n_frames)):
+                voiced = (i // (3 * frame_rate)) % 4 != 3
+                amp = 0.5 if voiced else 0.002
+                value = amp * math.sin(step * i) + 0.01 * (rng.random() - 0.5)
+                sample = int(value * max_amp)
+                for _ in range(channels):
+                    samples.append(sample)
+            data = samples.tobytes()
+            if sample_width == 1:
+                # 8-bit WAV samples are unsigned
+                data = bytes((b + 128) & 0xFF for b in data)
+            out.writeframes(data)
+    return path
+
+
+def write_tone_mp3(path: str, seconds: float, frame_rate: int = 44100, channels: int = 2, seed: int = 0) -> str:
+    """Encode a tone-plus-noise recording to MP3 with ffmpeg, like the audiobook MP3s convert reads."""
+    import subprocess
+    import tempfile
+
+    from pydub.utils import get_encoder_name
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = write_tone_wav(os.path.join(tmp, 'tone.wav'), seconds, frame_rate, channels, seed=seed)
+        subprocess.run([get_encoder_name(), '-nostdin', '-v', 'error', '-y', '-i', wav_path, '-b:a', '128k', path],
+                       check=True)
+    return path
+
+
+def sentence_intervals(seconds: float,
+                       words_per_sentence: int = 10,
+                       word_seconds: float = 0.3,
+                       seed: int = 0) -> List[Tuple[float, float, str]]:
+    """Word intervals shaped like the aligner output: a 'speaker1' marker opens every sentence."""
+    rng = random.Random(seed)
+    intervals = []
+    t = 0.0
+    while True:
+        sentence = [('speaker1', 0.2)] + [(rng.choice(WORDS), word_seconds) for _ in range(words_per_sentence)]
+        if t + sum(d for _, d in sentence) + 0.25 > seconds:
+            break
+        for label, duration in sentence:
+            intervals.append((round(t, 4), round(t + duration, 4), label))
+            t += duration
+        t += 0.25
+    return intervals
+
+
+def write_textgrid(path: str,
+                   intervals: List[Tuple[float, float, str]],
+                   xmax: float,
+                   tier_name: str = 'words',
+                   short: bool = False) -> str:
+    """Write a Praat TextGrid with one interval tier, filling gaps with empty intervals."""
+    filled = []
+    t = 0.0
+    for start, end, label in intervals:
+        if start > t:
+            filled.append((t, start, ''))
+        filled.append((start, end, label))
+        t = end
+    if t < xmax:
+        filled.append((t, xmax, ''))
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('File type = "ooTextFile"\nObject class = "TextGrid"\n\n')
+        if short:
+            f.write(f'0\n{xmax}\n<exists>\n1\n"IntervalTier"\n"{tier_name}"\n0\n{xmax}\n{len(filled)}\n')
+            for start, end, label in filled:
+                f.write(f'{start}\n{end}\n"{label}"\n')
+            return path
+        f.write(f'xmin = 0 \nxmax = {xmax} \ntiers? <exists> \nsize = 1 \nitem []: \n')
+        f.write(f'    item [1]:\n        class = "IntervalTier" \n        name = "{tier_name}" \n')
+        f.write(f'        xmin = 0 \n        xmax = {xmax} \n        intervals: size = {len(filled)} \n')
+        for i, (start, end, label) in enumerate(filled, 1):
+            f.write(f'        intervals [{i}]:\n            xmin = {start} \n'
+                    f'            xmax = {end} \n            text = "{label}" \n')
+    return path
+
+
+def write_epub(path: str,
+               n_chapters: int,
+               paragraphs_per_chapter: int = 40,
+               sentences_per_paragraph: int = 5,
+               seed: int = 0,
+               number_ratio: float = 0.15) -> str:
+    """Write an EPUB whose manifest order differs from its spine order, as in real books."""
+    from ebooklib import epub
+
+    rng = random.Random(seed)
+    book = epub.EpubBook()
+    book.set_identifier(f'synthetic-{seed}')
+    book.set_title('Synthetic Book')
+    book.set_language('en')
+
+    chapters = []
+    for i in range(n_chapters):
+        paragraphs = []
+        for _ in range(paragraphs_per_chapter):
+            sentences = [synthetic_sentence(rng, number_ratio=number_ratio).capitalize() + '.'
+                         for _ in range(sentences_per_paragraph)]
+            paragraphs.append(f'<p>{" ".join(sentences)}</p>')
+        chapter = epub.EpubHtml(title=f'Chapter {i + 1}', file_name=f'text/chapter_{i + 1:04d}.xhtml')
+        chapter.content = f'<h1>Chapter {i + 1}</h1>\n' + '\n'.join(paragraphs)
+        chapters.append(chapter)
+
+    # Add items in reverse so only the spine gives the reading order
+    for chapter in reversed(chapters):
+        book.add_item(chapter)
+    book.toc = chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = chapters
+    epub.write_epub(path, book)
+    return path
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Benchmark: parse time and peak memory of textGridReader against praatio on long synthetic alignments."""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from speechDatasetPreprocessor import sentence_windows
+from textGridReader import iter_intervals, read_intervals
+from syntheticData import sentence_intervals, write_textgrid
+
+
+def praatio_intervals(path):
+    from praatio import tgio
+    tg = tgio.openTextgrid(path)
+    return [tuple(entry) for entry in tg.tierDict[tg.tierNameList[0]].entryList]
+
+
+def measure(fn, path, repeat):
+    """(best seconds, peak traced MiB, result) of fn(path)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 2 ** 20, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=float, default=10.0, help='length of the synthetic alignment')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--target', type=float, default=2.0, help='required speed-up over praatio')
+    args = parser.parse_args()
+
+    seconds = args.hours * 3600
+    intervals = sentence_intervals(seconds)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for form in ('long', 'short'):
+            path = write_textgrid(os.path.join(tmp, f'{form}.TextGrid'), intervals, seconds, short=form == 'short')
+            size_mb = os.path.getsize(path) / 2 ** 20
+            print(f'{form} format: {len(intervals):,} intervals, {size_mb:.1f} MiB')
+
+            praatio_s, praatio_mb, expected = measure(praatio_intervals, path, args.repeat)
+            list_s, list_mb, got = measure(read_intervals, path, args.repeat)
+            stream_s, stream_mb, _ = measure(lambda p: sentence_windows(iter_intervals(p)), path, args.repeat)
+            if got != expected:
+                print('  MISMATCH: textGridReader and praatio disagree')
+                ok = False
+            speedup = praatio_s / list_s
+            ok = ok and speedup >= args.target
+            print(f'  praatio:          {praatio_s:.3f}s  peak {praatio_mb:7.1f} MiB')
+            print(f'  read_intervals:   {list_s:.3f}s  peak {list_mb:7.1f} MiB  ({speedup:.1f}x)')
+            print(f'  streamed windows: {stream_s:.3f}s  peak {stream_mb:7.1f} MiB')
+    print(f'target: {args.target:.1f}x faster than praatio')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark: EnergyVAD throughput (times real time) on synthetic speech-plus-silence audio."""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vadSegmenter import EnergyVAD
+from syntheticData import write_tone_wav
+
+
+def write_long_wav(path: str, minutes: float, frame_rate: int) -> float:
+    """Tile one synthetic minute into a long recording; returns its duration in seconds."""
+    minute = write_tone_wav(path + '.minute.wav', 60.0, frame_rate=frame_rate)
+    with wave.open(minute, 'rb') as wav_file:
+        data = wav_file.readframes(wav_file.getnframes())
+    os.remove(minute)
+    repeats = max(1, int(round(minutes)))
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(frame_rate)
+        for _ in range(repeats):
+            out.writeframes(data)
+    return repeats * 60.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--minutes', type=float, default=60.0)
+    parser.add_argument('--frame-rate', type=int, default=22050)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--target', type=float, default=100.0, help='required times-real-time factor')
+    parser.add_argument('--compare-pydub', action='store_true',
+                        help='also time pydub.silence.split_on_silence on one minute')
+    args = parser.parse_args()
+
+    vad = EnergyVAD()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'long.wav')
+        duration = write_long_wav(path, args.minutes, args.frame_rate)
+
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            segments = vad.segment(path)
+            best = min(best, time.perf_counter() - start)
+        factor = duration / best
+        print(f'audio: {duration / 60:.0f} min  segments: {len(segments)}')
+        print(f'vad:   {best:.3f}s  ({factor:,.0f}x real time, target {args.target:.0f}x)')
+
+        if args.compare_pydub:
+            from pydub import AudioSegment
+            from pydub.silence import split_on_silence
+            minute_path = write_tone_wav(os.path.join(tmp, 'minute.wav'), 60.0, frame_rate=args.frame_rate)
+            audio = AudioSegment.from_wav(minute_path)
+            start = time.perf_counter()
+            split_on_silence(audio, min_silence_len=300, silence_thresh=-45)
+            pydub_s = time.perf_counter() - start
+            print(f'pydub: {pydub_s:.3f}s per minute  ({60.0 / pydub_s:,.0f}x real time)')
+
+    return 0 if factor >= args.target else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
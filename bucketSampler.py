@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Length-bucketed batching for TTS training.
+
+Utterances are grouped with others of similar audio duration and text
+length, so little of each batch is padding. Batches can be a fixed size
+or filled up to a budget of padded mel frames.
+"""
+import os
+import random
+import wave
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+def sample_lengths(samples: Sequence[Dict],
+                   durations: Optional[Dict[str, float]] = None,
+                   wavs_dir: Optional[str] = None) -> Tuple[List[float], List[int]]:
+    """
+    Audio durations (seconds) and text lengths (characters) for load_tts_samples output.
+
+    Args:
+        samples: Sample dicts with 'audio_file' and 'text'
+        durations: Optional path -> seconds map, e.g. AudioManifest.durations(),
+            keyed by path relative to wavs_dir
+        wavs_dir: Directory the keys of durations are relative to
+
+    Files missing from durations have their WAV header read instead.
+    """
+    durations = durations or {}
+    audio_lengths = []
+    text_lengths = []
+    for sample in samples:
+        audio_file = sample['audio_file']
+        key = os.path.relpath(audio_file, wavs_dir) if wavs_dir else audio_file
+        duration = durations.get(key)
+        if duration is None:
+            with wave.open(audio_file, 'rb') as wav_file:
+                duration = wav_file.getnframes() / float(wav_file.getframerate())
+        audio_lengths.append(duration)
+        text_lengths.append(len(sample['text']))
+    return audio_lengths, text_lengths
+
+
+class DurationBucketBatchSampler:
+    """
+    Batch sampler yielding lists of dataset indices grouped by length.
+
+    Each epoch the indices are shuffled, split into pools of ``pool_batches``
+    batches, sorted by (duration, text length) within each pool and cut into
+    batches; the batch order is then shuffled. Pass it to a DataLoader as
+    ``batch_sampler``.
+    """
+
+    def __init__(self,
+                 durations: Sequence[float],
+                 text_lengths: Optional[Sequence[int]] = None,
+                 batch_size: Optional[int] = None,
+                 max_frames: Optional[int] = None,
+                 frames_per_second: float = 22050 / 256,
+                 pool_batches: int = 50,
+                 shuffle: bool = True,
+                 drop_last: bool = False,
+                 seed: int = 0):
+        """
+        Initialize the sampler.
+
+        Args:
+            durations: Audio duration in seconds per dataset index
+            text_lengths: Text length per dataset index, used to break ties
+            batch_size: Fixed number of samples per batch
+            max_frames: Budget of padded mel frames per batch (batch size times the
+                longest item); used instead of batch_size when given
+            frames_per_second: Mel frames per second of audio (sample_rate / hop_length)
+            pool_batches: How many batches' worth of samples are sorted together;
+                larger pools pad less but shuffle less
+            shuffle: Shuffle samples and batch order every epoch
+            drop_last: Drop a final fixed-size batch that is smaller than batch_size
+            seed: Base random seed; the epoch number is added each epoch
+        """
+        if batch_size is None and max_frames is None:
+            raise ValueError('either batch_size or max_frames is required')
+        self.frames = [max(1, int(d * frames_per_second)) for d in durations]
+        self.text_lengths = list(text_lengths) if text_lengths is not None else [0] * len(self.frames)
+        self.batch_size = batch_size
+        self.max_frames = max_frames
+        self.pool_batches = pool_batches
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+        self._batches: Optional[List[List[int]]] = None
+
+    def set_epoch(self, epoch: int) -> None:
+        """Select the shuffle of a given epoch."""
+        self.epoch = epoch
+        self._batches = None
+
+    def _pool_size(self) -> int:
+        if self.max_frames is not None:
+            mean_frames = sum(self.frames) / max(len(self.frames), 1)
+            per_batch = max(1, int(self.max_frames // max(mean_frames, 1)))
+        else:
+            per_batch = self.batch_size
+        return max(1, per_batch * self.pool_batches)
+
+    def _split(self, pool: List[int]) -> List[List[int]]:
+        """Cut a length-sorted pool into batches."""
+        if self.max_frames is None:
+            batches = [pool[i:i + self.batch_size] for i in range(0, len(pool), self.batch_size)]
+            if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+                batches.pop()
+            return batches
+
+        batches = []
+        batch: List[int] = []
+        longest = 0
+        for index in pool:
+            frames = self.frames[index]
+            # The pool is sorted, so the newest item is the longest in the batch
+            if batch and (len(batch) + 1) * max(longest, frames) > self.max_frames:
+                batches.append(batch)
+                batch, longest = [], 0
+            batch.append(index)
+            longest = max(longest, frames)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def batches(self) -> List[List[int]]:
+        """The batches of the current epoch."""
+        if self._batches is None:
+            rng = random.Random(self.seed + self.epoch)
+            indices = list(range(len(self.frames)))
+            if self.shuffle:
+                rng.shuffle(indices)
+            pool_size = self._pool_size()
+            batches = []
+            for start in range(0, len(indices), pool_size):
+                pool = sorted(indices[start:start + pool_size],
+                              key=lambda i: (self.frames[i], self.text_lengths[i]))
+                batches.extend(self._split(pool))
+            if self.shuffle:
+                rng.shuffle(batches)
+            self._batches = batches
+        return self._batches
+
+    def __iter__(self) -> Iterator[List[int]]:
+        batches = self.batches()
+        # Advance so the next epoch gets a new shuffle even if set_epoch is never called
+        self.set_epoch(self.epoch + 1)
+        return iter(batches)
+
+    def __len__(self) -> int:
+        return len(self.batches())
+
+
+def padding_ratio(batches: Sequence[Sequence[int]], frames: Sequence[int]) -> float:
+    """Fraction of padded frames that are padding."""
+    padded = sum(len(batch) * max(frames[i] for i in batch) for batch in batches if batch)
+    real = sum(frames[i] for batch in batches for i in batch)
+    return 1.0 - real / padded if padded else 0.0
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Rank training checkpoints by objective metrics in one process.
+
+The Overflow model and the vocoder are built once from the first
+checkpoint. Every later checkpoint only has its state dict loaded into the
+same model. Each checkpoint synthesizes the same held-out sentences in
+padded batches, with the same sampling seed. It is then scored by
+mel-cepstral distortion (MCD) against the reference recordings and by
+real-time factor (RTF). Everything runs on the CPU.
+
+MCD is computed on mel-frequency cepstra (coefficients 1..24 of a 40-band
+log-mel spectrum) after DTW alignment. It is meant for comparing
+checkpoints of one voice, not as an absolute score.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 10 / ln(10) * sqrt(2): converts cepstral distance to dB
+MCD_SCALE = 10.0 / np.log(10.0) * np.sqrt(2.0)
+
+# Used when the model config has no datasets; the dataset trainOverflow.py trains on
+DEFAULT_DATASET = {'formatter': 'ljspeech', 'path': './MyTTSDataset', 'meta_file_train': 'metadata.csv'}
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """Mono float32 samples in [-1, 1] and the sample rate of a PCM WAV."""
+    with wave.open(path, 'rb') as wav_file:
+        width = wav_file.getsampwidth()
+        channels = wav_file.getnchannels()
+        frame_rate = wav_file.getframerate()
+        data = wav_file.readframes(wav_file.getnframes())
+    if width == 1:
+        samples = np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0
+    elif width == 3:
+        b = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = ((b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8).astype(np.float32)
+    else:
+        samples = np.frombuffer(data, dtype=f'<i{width}').astype(np.float32)
+    samples = samples.reshape(-1, channels).mean(axis=1) / float(1 << (8 * width - 1))
+    return samples, frame_rate
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling; enough for comparing cepstra."""
+    if rate == target_rate or samples.size == 0:
+        return samples
+    n_out = int(round(samples.size * target_rate / rate))
+    return np.interp(np.arange(n_out) * (rate / target_rate), np.arange(samples.size), samples).astype(np.float32)
+
+
+def _mel_filterbank(n_mels: int, n_fft: int, sample_rate: int) -> np.ndarray:
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    mel_points = np.linspace(0.0, hz_to_mel(sample_rate / 2.0), n_mels + 2)
+    hz_points = 700.0 * (10.0 ** (mel_points / 2595.0) - 1.0)
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = hz_points[:-2, None], hz_points[1:-1, None], hz_points[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling))
+
+
+def mel_cepstrum(samples: np.ndarray, sample_rate: int, n_ceps: int = 25, n_mels: int = 40,
+                 n_fft: int = 1024, hop_length: int = 256) -> np.ndarray:
+    """(frames, n_ceps) mel-frequency cepstra: DCT-II of the log-mel power spectrum."""
+    if samples.size < n_fft:
+        samples = np.pad(samples, (0, n_fft - samples.size))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, n_fft)[::hop_length]
+    power = np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=1)) ** 2
+    log_mel = np.log(np.maximum(power @ _mel_filterbank(n_mels, n_fft, sample_rate).T, 1e-10))
+    k = np.arange(n_mels)
+    dct = np.cos(np.pi / n_mels * (k[None, :] + 0.5) * np.arange(n_ceps)[:, None]) * np.sqrt(2.0 / n_mels)
+    dct[0] /= np.sqrt(2.0)
+    return log_mel @ dct.T
+
+
+def dtw_mean_cost(cost: np.ndarray) -> float:
+    """Mean per-step cost along the minimum-cost DTW path through a (N, M) cost matrix."""
+    n, m = cost.shape
+    total = np.full((n + 1, m + 1), np.inf)
+    steps = np.zeros((n + 1, m + 1))
+    total[0, 0] = 0.0
+    # Cells on one anti-diagonal only depend on the two before it, so each is one vector step
+    for s in range(2, n + m + 1):
+        i = np.arange(max(1, s - m), min(n, s - 1) + 1)
+        j = s - i
+        candidates = np.stack([total[i - 1, j - 1], total[i - 1, j], total[i, j - 1]])
+        best = np.argmin(candidates, axis=0)
+        prev_i = i - (best != 2)
+        prev_j = j - (best != 1)
+        total[i, j] = cost[i - 1, j - 1] + candidates[best, np.arange(i.size)]
+        steps[i, j] = steps[prev_i, prev_j] + 1
+    return float(total[n, m] / steps[n, m])
+
+
+def mel_cepstral_distortion(reference: np.ndarray, synthesized: np.ndarray, sample_rate: int) -> float:
+    """DTW-aligned MCD in dB between two signals at the same sample rate, excluding c0 (energy)."""
+    ref = mel_cepstrum(reference, sample_rate)[:, 1:]
+    syn = mel_cepstrum(synthesized, sample_rate)[:, 1:]
+    squared = (ref ** 2).sum(axis=1)[:, None] + (syn ** 2).sum(axis=1)[None, :] - 2.0 * ref @ syn.T
+    return MCD_SCALE * dtw_mean_cost(np.sqrt(np.maximum(squared, 0.0)))
+
+
+def read_sentences(path: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+    """(id, text) from an LJSpeech-style ``id|text[|normalized text]`` file, using the last column."""
+    sentences = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f):
+            columns = line.rstrip('\n').split('|')
+            if len(columns) < 2 or not columns[-1].strip():
+                continue
+            # Header row written by TTSDatasetNormalizer
+            if line_number == 0 and columns[0].strip().lower() == 'id':
+                continue
+            sentences.append((os.path.splitext(columns[0])[0], columns[-1].strip()))
+            if limit and len(sentences) >= limit:
+                break
+    return sentences
+
+
+def heldout_sentences(config_path: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+    """
+    (id, text) of the eval split that training held out.
+
+    The split is redone from the model config's datasets and eval split
+    settings with sampleTable, which draws the same samples as training did.
+    """
+    from sampleTable import load_tts_samples
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    _, evaluation = load_tts_samples(config.get('datasets') or [DEFAULT_DATASET],
+                                     eval_split_max_size=config.get('eval_split_max_size'),
+                                     eval_split_size=config.get('eval_split_size', 0.01))
+    sentences = []
+    for sample in evaluation:
+        sentences.append((os.path.splitext(os.path.basename(sample['audio_file']))[0], sample['text'].strip()))
+        if limit and len(sentences) >= limit:
+            break
+    return sentences
+
+
+def checkpoint_step(path: str) -> int:
+    match = re.search(r'(\d+)\.pth$', os.path.basename(path))
+    return int(match.group(1)) if match else -1
+
+
+def find_checkpoints(paths: List[str]) -> List[str]:
+    """Checkpoint files from file paths, globs and run directories (checkpoint_*.pth), by step."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(glob.glob(os.path.join(path, 'checkpoint_*.pth')))
+        else:
+            found.extend(glob.glob(path) or [path])
+    return sorted(set(found), key=lambda p: (checkpoint_step(p), p))
+
+
+class CheckpointEvaluator:
+    """One Overflow model and vocoder whose weights are swapped per checkpoint."""
+
+    def __init__(self, first_checkpoint: str, config_path: str, vocoder_name: Optional[str] = None,
+                 threads: Optional[int] = None, seed: int = 0):
+        import torch
+        from synthesisServer import CoquiEngine
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.seed = seed
+        self.engine = CoquiEngine(first_checkpoint, config_path, vocoder_name, use_cuda=False)
+        self.synthesizer = self.engine.synthesizer
+        self.model = self.synthesizer.tts_model
+        self.checkpoint = first_checkpoint
+        self.sample_rate = self.engine.sample_rate
+
+    def swap(self, checkpoint: str) -> float:
+        """Load a checkpoint's weights into the existing model; returns the seconds it took."""
+        if checkpoint == self.checkpoint:
+            return 0.0
+        from TTS.utils.io import load_fsspec
+
+        start = time.perf_counter()
+        state = load_fsspec(checkpoint, map_location='cpu')
+        self.model.load_state_dict(state['model'])
+        self.model.eval()
+        self.checkpoint = checkpoint
+        return time.perf_counter() - start
+
+    def evaluate(self, checkpoint: str, sentences: List[Tuple[str, str]], reference_dir: Optional[str],
+                 batch_size: int = 8, out_dir: Optional[str] = None) -> Dict[str, object]:
+        """Synthesize every sentence with one checkpoint and score it."""
+        import torch
+
+        swap_seconds = self.swap(checkpoint)
+        torch.manual_seed(self.seed)
+        synth_seconds = 0.0
+        audio_seconds = 0.0
+        scores = []
+        failures = 0
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            t0 = time.perf_counter()
+            try:
+                wavs = self.engine.synthesize_padded([text for _, text in batch])
+            except Exception as e:
+                print(f'[-] {os.path.basename(checkpoint)}: batch at {start} failed: {type(e).__name__}: {e}',
+                      file=sys.stderr)
+                failures += len(batch)
+                continue
+            synth_seconds += time.perf_counter() - t0
+            for (sentence_id, _), wav in zip(batch, wavs):
+                wav = np.asarray(wav, dtype=np.float32).reshape(-1)
+                audio_seconds += wav.size / self.sample_rate
+                if out_dir:
+                    step_dir = os.path.join(out_dir, str(checkpoint_step(checkpoint)))
+                    os.makedirs(step_dir, exist_ok=True)
+                    self.synthesizer.save_wav(wav, os.path.join(step_dir, sentence_id + '.wav'))
+                reference_path = os.path.join(reference_dir, sentence_id + '.wav') if reference_dir else None
+                if reference_path and os.path.exists(reference_path):
+                    reference, rate = read_wav(reference_path)
+                    scores.append(mel_cepstral_distortion(resample(reference, rate, self.sample_rate), wav,
+                                                          self.sample_rate))
+        return {
+            'checkpoint': checkpoint,
+            'step': checkpoint_step(checkpoint),
+            'sentences': len(sentences) - failures,
+            'failures': failures,
+            'mcd_mean': float(np.mean(scores)) if scores else None,
+            'mcd_std': float(np.std(scores)) if scores else None,
+            'mcd_count': len(scores),
+            'rtf': synth_seconds / audio_seconds if audio_seconds else None,
+            'synth_seconds': synth_seconds,
+            'audio_seconds': audio_seconds,
+            'swap_seconds': swap_seconds,
+        }
+
+
+def rank(results: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Lowest MCD first; checkpoints without an MCD go last, fastest first."""
+    def key(result):
+        mcd = result['mcd_mean']
+        rtf = result['rtf']
+        return (mcd is None, mcd if mcd is not None else 0.0, rtf if rtf is not None else float('inf'))
+    return sorted(results, key=key)
+
+
+def format_report(results: List[Dict[str, object]]) -> str:
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else '-'
+
+    lines = [f'{"rank":>4}  {"step":>8}  {"MCD dB":>7}  {"+/-":>5}  {"RTF":>6}  {"swap s":>6}  checkpoint']
+    for i, result in enumerate(results, 1):
+        lines.append(f'{i:>4}  {result["step"]:>8}  {fmt(result["mcd_mean"], "7.2f")}  '
+                     f'{fmt(result["mcd_std"], "5.2f")}  {fmt(result["rtf"], "6.3f")}  '
+                     f'{result["swap_seconds"]:>6.2f}  {result["checkpoint"]}')
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Rank checkpoints by MCD and real-time factor on the CPU.')
+    parser.add_argument('checkpoints', nargs='+', help='checkpoint files, globs or run directories')
+    parser.add_argument('--config', default=None, help='model config (default: config.json next to the first checkpoint)')
+    parser.add_argument('--sentences', default=None,
+                        help='id|text file whose last column is synthesized '
+                             "(default: the eval split of the model config's datasets)")
+    parser.add_argument('--reference-dir', default='./MyTTSDataset/wavs', help='reference <id>.wav recordings')
+    parser.add_argument('--limit', type=int, default=20, help='sentences to synthesize per checkpoint')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--vocoder-name', default='vocoder_models/en/ljspeech/hifigan_v2')
+    parser.add_argument('--threads', type=int, default=None, help='torch CPU threads')
+    parser.add_argument('--seed', type=int, default=0, help='sampling seed, reset for every checkpoint')
+    parser.add_argument('--out-dir', default=None, help='also write the synthesized WAVs to <out-dir>/<step>/')
+    parser.add_argument('--report', default='checkpoint_report.json')
+    args = parser.parse_args(argv)
+
+    checkpoints = find_checkpoints(args.checkpoints)
+    missing = [path for path in checkpoints if not os.path.isfile(path)]
+    if not checkpoints or missing:
+        print(f'[-] Checkpoints not found: {" ".join(missing or args.checkpoints)}', file=sys.stderr)
+        return 1
+    config_path = args.config or os.path.join(os.path.dirname(checkpoints[0]), 'config.json')
+    if args.sentences:
+        sentences = read_sentences(args.sentences, args.limit)
+    else:
+        try:
+            sentences = heldout_sentences(config_path, args.limit)
+        except (OSError, ValueError, AssertionError) as e:
+            print(f'[-] Could not load the eval split from {config_path}: {e}', file=sys.stderr)
+            return 1
+    if not sentences:
+        print(f'[-] No sentences in {args.sentences or "the eval split"}', file=sys.stderr)
+        return 1
+
+    print(f'[+] {len(checkpoints)} checkpoints, {len(sentences)} sentences, batch size {args.batch_size}')
+    start = time.perf_counter()
+    evaluator = CheckpointEvaluator(checkpoints[0], config_path, args.vocoder_name, args.threads, args.seed)
+    print(f'[+] Model and vocoder loaded in {time.perf_counter() - start:.1f}s')
+
+    results = []
+    for checkpoint in checkpoints:
+        result = evaluator.evaluate(checkpoint, sentences, args.reference_dir, args.batch_size, args.out_dir)
+        results.append(result)
+        print(f'[+] step {result["step"]}: MCD {result["mcd_mean"]}, RTF {result["rtf"]}')
+
+    results = rank(results)
+    print(format_report(results))
+    tmp_path = f'{args.report}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'config': config_path, 'sentences': args.sentences or 'eval split', 'seed': args.seed,
+                   'ranking': results}, f, indent=2)
+    os.replace(tmp_path, args.report)
+    print(f'[+] Report written to {args.report}')
+    return 1 if any(result['failures'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
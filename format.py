@@ -1,16 +1,27 @@
 import csv
+import os
 
 metafile_path = "./MyTTSDataset/metadata.csv"
 
-def ljspeech_formatter(metafile_path):
-    formatted_data = []
-    with open(metafile_path, 'r') as f:
-        reader = csv.DictReader(f, delimiter='|', fieldnames=['ID', 'Transcription', 'Normalized Transcription'])
+def ljspeech_formatter(root_path, meta_file=None, **kwargs):
+    """
+    Yield one sample per metadata row instead of building a list.
+
+    ljspeech_formatter(metafile_path) yields the samples this formatter always
+    returned. Called like Coqui's formatters, as ljspeech_formatter(root_path,
+    meta_file), audio files are resolved under root_path/wavs, so it can be
+    passed to sampleTable.load_tts_samples as formatter.
+    """
+    path = root_path if meta_file is None else os.path.join(root_path, meta_file)
+    wavs_dir = "" if meta_file is None else os.path.join(root_path, "wavs")
+    with open(path, 'r') as f:
+        reader = csv.reader(f, delimiter='|')
         for row in reader:
-            formatted_data.append({
-                "audio_file": f"{row['ID']}.wav",
-                "text": row['Normalized Transcription'],
+            if not row:
+                continue
+            yield {
+                "audio_file": os.path.join(wavs_dir, f"{row[0]}.wav"),
+                "text": row[2] if len(row) > 2 else row[1],
                 "speaker_name": "LJSpeech",
                 "language": "en-US"
-            })
-    return formatted_data
\ No newline at end of file
+            }
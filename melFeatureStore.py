@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Precomputed mel-spectrogram store for training.
+
+Mels are computed once with the training AudioProcessor (so silence
+trimming and the STFT run once per file, not once per epoch) and
+appended to sharded float32 files. An index maps each audio file to
+(shard, frame offset, frame count). Reads are slices of memory-mapped
+shards, so no data is copied until the batch is collated.
+
+The store is tied to a fingerprint of the ``audio`` config section;
+opening it with a different audio config discards its contents. A file
+that changes is appended again and its old mel becomes dead space; once
+dead space passes compact_ratio of the shards, build rewrites the live
+mels into new shards and deletes the old ones.
+"""
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+STORE_VERSION = 1
+INDEX_NAME = 'index.json'
+
+
+def audio_config_fingerprint(audio_config: Dict) -> str:
+    """Stable hash of an audio config section."""
+    payload = json.dumps({'store_version': STORE_VERSION, 'audio': audio_config}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+# Per-process AudioProcessor used by precompute workers
+_worker_ap = None
+
+
+def _init_worker(audio_config: Dict) -> None:
+    """Build the AudioProcessor once per worker process."""
+    global _worker_ap
+    from TTS.utils.audio import AudioProcessor
+    _worker_ap = AudioProcessor(verbose=False, **audio_config)
+
+
+class _ShardWriter:
+    """Appends mel frames to a store's shards, starting a new shard every shard_bytes."""
+
+    def __init__(self, store: 'MelFeatureStore'):
+        self.store = store
+        self.file = None
+        self.shard_id = -1
+
+    def write(self, frames: np.ndarray) -> Tuple[int, int]:
+        """Append (frames, num_mels) float32 frames; returns (shard id, frame offset)."""
+        if self.file is None or self.file.tell() >= self.store.shard_bytes:
+            self.close()
+            self.shard_id = len(self.store.shards)
+            self.store.shards.append(self.store._new_shard_name())
+            self.file = open(os.path.join(self.store.root, self.store.shards[-1]), 'wb')
+        offset = self.file.tell() // (4 * self.store.num_mels)
+        self.file.write(np.ascontiguousarray(frames, dtype=np.float32).tobytes())
+        return self.shard_id, offset
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def _compute_mel(audio_file: str) -> Tuple[str, Optional[np.ndarray], Optional[str]]:
+    """Load, trim and convert one file exactly as TTSDataset would, returning (num_mels, frames)."""
+    try:
+        wav = np.asarray(_worker_ap.load_wav(audio_file), dtype=np.float32)
+        return audio_file, _worker_ap.melspectrogram(wav).astype(np.float32), None
+    except Exception as e:
+        return audio_file, None, f'{type(e).__name__}: {e}'
+
+
+class MelFeatureStore:
+    """Sharded, memory-mapped mel features keyed by audio file path."""
+
+    def __init__(self,
+                 root: str,
+                 audio_config: Dict,
+                 shard_bytes: int = 1 << 30,
+                 compact_ratio: float = 0.5,
+                 log_level: int = logging.INFO):
+        """
+        Open the store, discarding it if it was built for another audio config.
+
+        Args:
+            root: Directory holding the shards and the index
+            audio_config: The ``audio`` section of the training config, as a dict
+            shard_bytes: Size at which a new shard file is started
+            compact_ratio: Fraction of the shards' size that may be dead space
+                (mels of changed or dropped files) before build compacts them
+            log_level: Logging level to use
+        """
+        self.root = root
+        self.audio_config = dict(audio_config)
+        self.fingerprint = audio_config_fingerprint(self.audio_config)
+        self.num_mels = int(self.audio_config['num_mels'])
+        self.shard_bytes = shard_bytes
+        self.compact_ratio = compact_ratio
+        self.logger = self._setup_logging(log_level)
+        self.shards: List[str] = []
+        self.entries: Dict[str, List[int]] = {}
+        # Shard names are never reused, so an older index never points at a rewritten file
+        self.next_shard = 0
+        self._maps: Dict[int, np.ndarray] = {}
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def _setup_logging(log_level: int) -> logging.Logger:
+        """Configure logging."""
+        logging.basicConfig(
+            level=log_level,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        return logging.getLogger(__name__)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root, INDEX_NAME)
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('fingerprint') != self.fingerprint:
+            self.logger.info(f"Audio config changed since {self.root} was built, invalidating it")
+            self._clear()
+            return
+        self.shards = index['shards']
+        self.entries = index['entries']
+        self.next_shard = index.get('next_shard', len(self.shards))
+
+    def _clear(self) -> None:
+        """Delete all shards and the index."""
+        for name in os.listdir(self.root):
+            if name.endswith('.f32') or name == INDEX_NAME:
+                os.remove(os.path.join(self.root, name))
+        self.shards = []
+        self.entries = {}
+        self.next_shard = 0
+        self._maps = {}
+
+    def _save_index(self) -> None:
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'num_mels': self.num_mels,
+                       'shards': self.shards, 'next_shard': self.next_shard, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _new_shard_name(self) -> str:
+        name = f'mels_{self.next_shard:05d}.f32'
+        self.next_shard += 1
+        return name
+
+    def dead_bytes(self) -> Tuple[int, int]:
+        """(bytes of shards no entry points to, total bytes of the shards)."""
+        total = sum(os.path.getsize(os.path.join(self.root, name)) for name in self.shards
+                    if os.path.exists(os.path.join(self.root, name)))
+        live = sum(entry[2] for entry in self.entries.values()) * 4 * self.num_mels
+        return max(0, total - live), total
+
+    def compact(self) -> int:
+        """
+        Rewrite the live mels into new shards and delete the old ones.
+
+        The new index is saved before any old shard is deleted, and shard files
+        that no index refers to (left by an interrupted run) are removed too.
+
+        Returns:
+            Bytes reclaimed
+        """
+        _, before = self.dead_bytes()
+        sources = [np.memmap(os.path.join(self.root, name), dtype=np.float32, mode='r').reshape(-1, self.num_mels)
+                   for name in self.shards]
+        self.shards = []
+        self._maps = {}
+        writer = _ShardWriter(self)
+        try:
+            # In storage order, so the old shards are read sequentially
+            for audio_file, entry in sorted(self.entries.items(), key=lambda item: item[1][:2]):
+                shard_id, offset, frames = entry[:3]
+                new_id, new_offset = writer.write(sources[shard_id][offset:offset + frames])
+                self.entries[audio_file] = [new_id, new_offset, frames] + entry[3:]
+        finally:
+            writer.close()
+        del sources
+        self._save_index()
+        live = set(self.shards)
+        for name in os.listdir(self.root):
+            if name.endswith('.f32') and name not in live:
+                os.remove(os.path.join(self.root, name))
+        _, after = self.dead_bytes()
+        self.logger.info(f"Compacted {self.root}: {before / 2 ** 20:.0f} -> {after / 2 ** 20:.0f} MiB")
+        return before - after
+
+    def is_current(self, audio_file: str) -> bool:
+        """True if the file is stored and has not changed since it was computed."""
+        entry = self.entries.get(audio_file)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(audio_file)
+        except OSError:
+            return False
+        return entry[3] == stat.st_size and entry[4] == stat.st_mtime_ns
+
+    def build(self, audio_files: Iterable[str], num_workers: int = 1, chunksize: int = 16) -> int:
+        """
+        Compute and append mels for files that are missing or changed.
+
+        audio_files is the whole dataset: entries for other files are dropped.
+        New mels are appended to new shards and the index is replaced atomically
+        at the end. The shards are then compacted if dead space exceeds compact_ratio.
+
+        Returns:
+            Number of files computed
+        """
+        audio_files = set(audio_files)
+        dropped = [f for f in self.entries if f not in audio_files]
+        for audio_file in dropped:
+            del self.entries[audio_file]
+        todo = sorted(f for f in audio_files if not self.is_current(f))
+        if not todo:
+            self.logger.info(f"Mel store {self.root} is up to date ({len(self.entries)} files)")
+            if dropped:
+                self._save_index()
+            self._compact_if_needed()
+            return 0
+        self.logger.info(f"Computing mels for {len(todo)} files into {self.root}")
+
+        if num_workers > 1:
+            executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                           initargs=(self.audio_config,))
+            results = executor.map(_compute_mel, todo, chunksize=chunksize)
+        else:
+            executor = None
+            _init_worker(self.audio_config)
+            results = map(_compute_mel, todo)
+
+        computed = 0
+        writer = _ShardWriter(self)
+        try:
+            for audio_file, mel, error in results:
+                if error is not None:
+                    self.logger.error(f"Failed to compute mel for {audio_file}: {error}")
+                    continue
+                shard_id, offset = writer.write(mel.T)
+                stat = os.stat(audio_file)
+                self.entries[audio_file] = [shard_id, offset, mel.shape[1], stat.st_size, stat.st_mtime_ns]
+                computed += 1
+        finally:
+            writer.close()
+            if executor is not None:
+                executor.shutdown()
+            self._save_index()
+        self._compact_if_needed()
+        return computed
+
+    def _compact_if_needed(self) -> None:
+        dead, total = self.dead_bytes()
+        if total and dead > self.compact_ratio * total:
+            self.compact()
+
+    def _shard(self, shard_id: int) -> np.ndarray:
+        """Memory-map a shard lazily, once per process."""
+        shard = self._maps.get(shard_id)
+        if shard is None:
+            path = os.path.join(self.root, self.shards[shard_id])
+            shard = np.memmap(path, dtype=np.float32, mode='r').reshape(-1, self.num_mels)
+            self._maps[shard_id] = shard
+        return shard
+
+    def get(self, audio_file: str) -> Optional[np.ndarray]:
+        """
+        Return the stored (num_mels, frames) mel as a read-only view, or None.
+
+        None is returned for files that are not stored or changed on disk
+        since they were computed, so callers can fall back to computing them.
+        """
+        if not self.is_current(audio_file):
+            return None
+        shard_id, offset, frames = self.entries[audio_file][:3]
+        return self._shard(shard_id)[offset:offset + frames].T
@@ -1,18 +1,126 @@
 import os
 import sys
+import argparse
+import subprocess
+import tempfile
+import wave
+from concurrent.futures import ProcessPoolExecutor
 from pydub import AudioSegment
+from pydub.utils import get_encoder_name, mediainfo_json
 
-def convert_mp3_to_wav(input_dir, output_dir):
+
+def is_up_to_date(src_path, dst_path):
+    """True if dst_path exists and is at least as new as src_path."""
+    return os.path.exists(dst_path) and os.path.getmtime(dst_path) >= os.path.getmtime(src_path)
+
+
+def decode_with_pydub(mp3_path, tmp_path, sample_rate=None, channels=None):
+    """Decode the whole MP3 in memory, then downmix/resample and export."""
+    audio = AudioSegment.from_mp3(mp3_path)
+    if channels:
+        audio = audio.set_channels(channels)
+    if sample_rate:
+        audio = audio.set_frame_rate(sample_rate)
+    audio.export(tmp_path, format='wav')
+
+
+def decode_streaming(mp3_path, tmp_path, sample_rate=None, channels=None, block_size=1 << 20):
+    """
+    Let ffmpeg decode, downmix and resample to 16-bit PCM on a pipe and write it out block by block.
+
+    Memory stays bounded by block_size however long the MP3 is.
+    """
+    if not (sample_rate and channels):
+        # ffprobe reads the stream header without decoding the file
+        stream_info = next(s for s in mediainfo_json(mp3_path)['streams'] if s.get('codec_type') == 'audio')
+        sample_rate = sample_rate or int(stream_info['sample_rate'])
+        channels = channels or int(stream_info['channels'])
+    command = [get_encoder_name(), '-nostdin', '-v', 'error', '-i', mp3_path,
+               '-ac', str(channels), '-ar', str(sample_rate), '-f', 's16le', '-acodec', 'pcm_s16le', '-']
+    # stderr goes to a file: a full stderr pipe would block ffmpeg while stdout is being read
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr) as process, \
+                wave.open(tmp_path, 'wb') as out:
+            out.setnchannels(channels)
+            out.setsampwidth(2)
+            out.setframerate(sample_rate)
+            for block in iter(lambda: process.stdout.read(block_size), b''):
+                out.writeframes(block)
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f'ffmpeg failed on {mp3_path}: {stderr.read().decode(errors="replace").strip()}')
+
+
+def convert_file(mp3_path, wav_path, sample_rate=None, channels=None, stream=False, force=False):
+    """Convert one MP3, writing to a temporary file and renaming it into place. Returns (status, error)."""
+    if not force and is_up_to_date(mp3_path, wav_path):
+        return 'skipped', None
+    tmp_path = wav_path + '.tmp'
+    try:
+        if stream:
+            decode_streaming(mp3_path, tmp_path, sample_rate, channels)
+        else:
+            decode_with_pydub(mp3_path, tmp_path, sample_rate, channels)
+        os.replace(tmp_path, wav_path)
+        return 'converted', None
+    except Exception as e:
+        return 'failed', f'{type(e).__name__}: {e}'
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def convert_mp3_to_wav(input_dir, output_dir, sample_rate=None, channels=None, workers=1, stream=False,
+                       force=False):
+    """
+    Convert every MP3 in input_dir to WAV in output_dir.
+
+    sample_rate and channels default to the MP3's own. Outputs newer than their MP3 are
+    skipped unless force is set. Returns {filename: (status, error)}.
+    """
     os.makedirs(output_dir, exist_ok=True)
 
-    for filename in os.listdir(input_dir):
-        if filename.endswith('.mp3'):
-            mp3_path = os.path.join(input_dir, filename)
-            mp3_audio = AudioSegment.from_mp3(mp3_path)
-            wav_path = os.path.join(output_dir, os.path.splitext(filename)[0] + '.wav')
-            mp3_audio.export(wav_path, format='wav')
+    filenames = sorted(f for f in os.listdir(input_dir) if f.endswith('.mp3'))
+    mp3_paths = [os.path.join(input_dir, f) for f in filenames]
+    wav_paths = [os.path.join(output_dir, os.path.splitext(f)[0] + '.wav') for f in filenames]
+    n = len(filenames)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(convert_file, mp3_paths, wav_paths, [sample_rate] * n,
+                                        [channels] * n, [stream] * n, [force] * n))
+    else:
+        results = [convert_file(*args, sample_rate, channels, stream, force) for args in zip(mp3_paths, wav_paths)]
+    return dict(zip(filenames, results))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert MP3s to training-ready WAVs.')
+    parser.add_argument('input_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--sample-rate', type=int, default=None,
+                        help='target sample rate (default: audio.sample_rate from --config)')
+    parser.add_argument('--config', default='./config.json')
+    parser.add_argument('--channels', type=int, default=1, help='output channels (default: 1)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--stream', action='store_true',
+                        help='decode through an ffmpeg pipe with bounded memory, for very long MP3s')
+    parser.add_argument('--force', action='store_true', help='convert even if the WAV is up to date')
+    args = parser.parse_args(argv)
+
+    sample_rate = args.sample_rate
+    if sample_rate is None and os.path.exists(args.config):
+        from audioConformance import load_target_sample_rate
+        sample_rate = load_target_sample_rate(args.config)
+
+    results = convert_mp3_to_wav(args.input_dir, args.output_dir, sample_rate, args.channels, args.workers,
+                                 args.stream, args.force)
+    statuses = [status for status, _ in results.values()]
+    print(f'[+] converted {statuses.count("converted")}, skipped {statuses.count("skipped")}, '
+          f'failed {statuses.count("failed")}')
+    for filename, (status, error) in results.items():
+        if error:
+            print(f'[-] {filename}: {error}', file=sys.stderr)
+    return 1 if 'failed' in statuses else 0
+
 
 if __name__ == '__main__':
-    input_dir = sys.argv[1]
-    output_dir = sys.argv[2]
-    convert_mp3_to_wav(input_dir, output_dir)
\ No newline at end of file
+    sys.exit(main())
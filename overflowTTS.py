@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the toolkit: ``overflow-tts <command> [args]``.
+
+Each command imports its stage module (and through it pydub, nltk, torch,
+TTS, ...) only when it runs, so ``overflow-tts --help`` and commands that
+do not need a heavy dependency start without paying for it. Arguments
+after the command are passed to the stage's own parser, so
+``overflow-tts convert --help`` shows mp3Towav's options.
+"""
+import argparse
+import os
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _convert(argv: List[str]) -> int:
+    import mp3Towav
+    return mp3Towav.main(argv)
+
+
+def _epub(argv: List[str]) -> int:
+    import splitEpubToSentences
+    return splitEpubToSentences.main(argv)
+
+
+def _align(argv: List[str]) -> int:
+    import alignSpeechToText
+    return alignSpeechToText.main(argv)
+
+
+def _segment(argv: List[str]) -> int:
+    import speechDatasetPreprocessor
+    return speechDatasetPreprocessor.main(argv)
+
+
+def _vad(argv: List[str]) -> int:
+    import vadSegmenter
+    return vadSegmenter.main(argv)
+
+
+def _normalize(argv: List[str]) -> int:
+    import TTSDatasetNormalizer
+    return TTSDatasetNormalizer.main(argv) or 0
+
+
+def _pipeline(argv: List[str]) -> int:
+    import pipeline
+    return pipeline.main(argv)
+
+
+def _train(argv: List[str]) -> int:
+    if argv[:1] in (['-h'], ['--help']):
+        print('usage: overflow-tts train\n\nTrain the Overflow model with the settings in trainOverflow.py.')
+        return 0
+    # trainOverflow is a script that trains on import, so run it as __main__
+    import runpy
+    path = os.path.join(REPO_DIR, 'trainOverflow.py')
+    runpy.run_path(path, run_name='__main__')
+    return 0
+
+
+def _server(argv: List[str]) -> int:
+    import synthesisServer
+    return synthesisServer.main(argv)
+
+
+def _evaluate(argv: List[str]) -> int:
+    import checkpointEvaluator
+    return checkpointEvaluator.main(argv)
+
+
+def _audiobook(argv: List[str]) -> int:
+    import audiobookSynthesizer
+    return audiobookSynthesizer.main(argv)
+
+
+def _cache(argv: List[str]) -> int:
+    import synthesisCache
+    return synthesisCache.main(argv)
+
+
+def _synth(argv: List[str]) -> int:
+    # Coqui's tts CLI reads sys.argv itself
+    from TTS.bin.synthesize import main as synthesize
+    return synthesize() or 0
+
+
+# name -> (handler, one-line help)
+COMMANDS: Dict[str, Tuple[Callable[[List[str]], int], str]] = {
+    'convert': (_convert, 'convert MP3s to training-ready WAVs (mp3Towav.py)'),
+    'epub': (_epub, 'split an EPUB into sentence transcripts (splitEpubToSentences.py)'),
+    'align': (_align, 'align recordings to transcripts in parallel shards (alignSpeechToText.py)'),
+    'segment': (_segment, 'cut aligned recordings into sentence WAVs (speechDatasetPreprocessor.py)'),
+    'vad': (_vad, 'cut recordings into utterances by energy, without alignment (vadSegmenter.py)'),
+    'normalize': (_normalize, 'normalize dataset transcriptions (TTSDatasetNormalizer.py)'),
+    'pipeline': (_pipeline, 'run the data-prep chain, rebuilding only what changed (pipeline.py)'),
+    'train': (_train, 'train the Overflow model (trainOverflow.py)'),
+    'server': (_server, 'keep checkpoints loaded and synthesize over local HTTP (synthesisServer.py)'),
+    'evaluate': (_evaluate, 'rank checkpoints by MCD and real-time factor (checkpointEvaluator.py)'),
+    'audiobook': (_audiobook, 'synthesize chapter transcripts into chapter WAVs (audiobookSynthesizer.py)'),
+    'cache': (_cache, 'inspect or trim a synthesis cache (synthesisCache.py)'),
+    'synth': (_synth, "synthesize speech with a trained checkpoint (Coqui's tts CLI)"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='overflow-tts',
+        description='Overflow TTS toolkit. Run "overflow-tts <command> --help" for the options of a command.')
+    subparsers = parser.add_subparsers(dest='command', metavar='<command>')
+    for name, (_, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS:
+        parser = build_parser()
+        parser.parse_args(argv)
+        parser.print_help()
+        return 2
+
+    # Stage modules are imported by name from the repository root
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    handler, _ = COMMANDS[argv[0]]
+    # Stage parsers take their prog name from argv[0]
+    sys.argv = [f'overflow-tts {argv[0]}'] + argv[1:]
+    return handler(argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Packed phoneme cache.
+
+All phoneme token ids live in one append-only data file, with an index
+mapping a hash of (phonemizer settings, language, text) to an offset and
+length. This replaces the one-``.npy``-per-utterance cache and can be
+shared read-only by several training runs. Writers serialize on a lock
+file and only append, so entries already in the index never move.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DATA_NAME = 'phonemes.bin'
+INDEX_NAME = 'phonemes.idx.json'
+LOCK_NAME = 'phonemes.lock'
+ID_DTYPE = np.int32
+
+
+def settings_fingerprint(settings: Dict) -> str:
+    """Stable hash of the phonemizer/tokenizer settings that determine token ids."""
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class PackedPhonemeCache:
+    """Single-file phoneme id cache keyed by text hash and phonemizer settings."""
+
+    def __init__(self,
+                 cache_dir: str,
+                 settings: Dict,
+                 read_only: bool = False,
+                 log_level: int = logging.INFO):
+        """
+        Open the cache.
+
+        Args:
+            cache_dir: Directory holding the data, index and lock files
+            settings: Everything that changes the token ids for a given text,
+                e.g. phonemizer name and version, character set, add_blank
+            read_only: Never write; misses are computed but not stored
+            log_level: Logging level to use
+        """
+        self.cache_dir = cache_dir
+        self.settings_hash = settings_fingerprint(settings)
+        self.read_only = read_only
+        self.logger = self._setup_logging(log_level)
+        self.index: Dict[str, List[int]] = {}
+        self._data: Optional[np.ndarray] = None
+        if not read_only:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.reload()
+
+    @staticmethod
+    def _setup_logging(log_level: int) -> logging.Logger:
+        """Configure logging."""
+        logging.basicConfig(
+            level=log_level,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        return logging.getLogger(__name__)
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.cache_dir, DATA_NAME)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.cache_dir, INDEX_NAME)
+
+    def key(self, text: str, language: Optional[str]) -> str:
+        """Index key for a text under this cache's settings."""
+        payload = f'{self.settings_hash}\0{language or ""}\0{text}'
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def reload(self) -> None:
+        """Re-read the index and remap the data file, picking up entries added by other runs."""
+        self._data = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def _mapped(self) -> np.ndarray:
+        # Mapped lazily so forked DataLoader workers each get their own mapping
+        if self._data is None:
+            if os.path.getsize(self.data_path) == 0:
+                return np.empty(0, dtype=ID_DTYPE)
+            self._data = np.memmap(self.data_path, dtype=ID_DTYPE, mode='r')
+        return self._data
+
+    def get(self, text: str, language: Optional[str]) -> Optional[np.ndarray]:
+        """Return the cached token ids, or None on a miss."""
+        entry = self.index.get(self.key(text, language))
+        if entry is None:
+            return None
+        offset, length = entry
+        data = self._mapped()
+        if offset + length > data.shape[0]:
+            # The index is newer than our mapping of the data file
+            self._data = None
+            data = self._mapped()
+        return np.asarray(data[offset:offset + length])
+
+    def add(self, items: Iterable[Tuple[str, Optional[str], Sequence[int]]]) -> int:
+        """
+        Append (text, language, token ids) entries that are not cached yet.
+
+        Holds an exclusive lock while appending and atomically replaces the index.
+
+        Returns:
+            Number of entries written
+        """
+        if self.read_only:
+            return 0
+        with open(os.path.join(self.cache_dir, LOCK_NAME), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Another run may have added entries since we last read the index
+                self.reload()
+                written = 0
+                with open(self.data_path, 'ab') as data_file:
+                    offset = data_file.tell() // np.dtype(ID_DTYPE).itemsize
+                    for text, language, ids in items:
+                        key = self.key(text, language)
+                        if key in self.index:
+                            continue
+                        array = np.asarray(ids, dtype=ID_DTYPE)
+                        data_file.write(array.tobytes())
+                        self.index[key] = [offset, int(array.shape[0])]
+                        offset += array.shape[0]
+                        written += 1
+                if written:
+                    tmp_path = f'{self.index_path}.{os.getpid()}.tmp'
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump(self.index, f)
+                    os.replace(tmp_path, self.index_path)
+                self._data = None
+                return written
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+# Set before forking the precompute pool so workers inherit it without pickling
+_worker_text_to_ids: Optional[Callable[[str, Optional[str]], Sequence[int]]] = None
+
+
+def _phonemize(item: Tuple[str, Optional[str]]) -> Tuple[str, Optional[str], List[int]]:
+    text, language = item
+    return text, language, list(_worker_text_to_ids(text, language))
+
+
+def precompute(cache: PackedPhonemeCache,
+               items: Iterable[Tuple[str, Optional[str]]],
+               text_to_ids: Callable[[str, Optional[str]], Sequence[int]],
+               num_workers: int = 1,
+               chunksize: int = 64) -> int:
+    """
+    Phonemize every (text, language) pair missing from the cache and store the results.
+
+    Args:
+        cache: Cache to fill
+        items: (text, language) pairs, typically one per training sample
+        text_to_ids: Function mapping (text, language) to token ids
+        num_workers: Worker processes (e.g. config.precompute_num_workers)
+        chunksize: Items sent to a worker at a time
+
+    Returns:
+        Number of entries added
+    """
+    global _worker_text_to_ids
+    todo = list(dict.fromkeys(item for item in items if cache.get(*item) is None))
+    if not todo:
+        cache.logger.info(f"Phoneme cache {cache.cache_dir} is up to date ({len(cache)} entries)")
+        return 0
+    cache.logger.info(f"Phonemizing {len(todo)} texts into {cache.cache_dir}")
+
+    _worker_text_to_ids = text_to_ids
+    if num_workers > 1:
+        with multiprocessing.get_context('fork').Pool(num_workers) as pool:
+            results = pool.imap(_phonemize, todo, chunksize=chunksize)
+            return cache.add(results)
+    return cache.add(map(_phonemize, todo))
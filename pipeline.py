@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Incremental runner for the data-prep chain.
+
+The README chain (mp3Towav -> splitEpubToSentences -> alignSpeechToText ->
+speechDatasetPreprocessor -> TTSDatasetNormalizer -> trainOverflow) is
+modelled as stages with declared input and output globs. Every stage
+result is keyed by a hash of its parameters and the content of its
+inputs, and a stage only runs again when that key changes or its outputs
+went missing. Per-file stages (MP3 conversion, EPUB splitting) are keyed
+per input file and their changed files run in a process pool.
+
+State lives in ``.pipeline/state.json`` under the root. File hashes are
+cached by size and mtime, so an unchanged tree is checked with one stat
+per file.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+STATE_DIR = '.pipeline'
+STATE_NAME = 'state.json'
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Stage:
+    """One step of the pipeline."""
+
+    def __init__(self,
+                 name: str,
+                 inputs: List[str],
+                 outputs: List[str],
+                 run: Callable,
+                 params: Optional[Dict] = None,
+                 deps: Iterable[str] = (),
+                 target: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            name: Stage name used on the command line and in the state file
+            inputs: Glob patterns, relative to the root, of the files the stage reads
+            outputs: Glob patterns of the files it writes (checked after whole-stage runs)
+            run: For whole stages run(params); for per-file stages run(input, output, params).
+                Per-file functions run in worker processes, so they must be module-level.
+            params: Settings that change the result; part of the key
+            deps: Stages that must run first
+            target: Makes the stage per-file; maps an input path to its output path
+        """
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.run = run
+        self.params = params or {}
+        self.deps = list(deps)
+        self.target = target
+
+    @property
+    def per_file(self) -> bool:
+        return self.target is not None
+
+
+class FileHasher:
+    """Content hashes of files, cached by (size, mtime_ns)."""
+
+    def __init__(self, cache: Dict[str, list]):
+        self.cache = cache
+
+    def __call__(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self.cache.get(path)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return self.cache[path][2]
+
+
+def _key(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _run_file_job(run: Callable, params: Dict, src: str, dst: str) -> Tuple[str, Optional[str]]:
+    """Run one per-file job in a worker. Returns (src, error)."""
+    try:
+        run(src, dst, params)
+        return src, None
+    except Exception as e:
+        return src, f'{type(e).__name__}: {e}'
+
+
+class Pipeline:
+    """Content-addressed, incremental runner for a set of stages."""
+
+    def __init__(self, stages: List[Stage], root: str = '.', workers: int = 1, log_level: int = logging.INFO):
+        """
+        Args:
+            stages: Stage definitions; deps must refer to stages in this list
+            root: Directory all stage globs are relative to
+            workers: Worker processes for per-file stages
+            log_level: Logging level to use
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.root = root
+        self.workers = workers
+        self.logger = self._setup_logging(log_level)
+        self.state_path = os.path.join(root, STATE_DIR, STATE_NAME)
+        self.state = {'files': {}, 'stages': {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        self.hasher = FileHasher(self.state['files'])
+
+    @staticmethod
+    def _setup_logging(log_level: int) -> logging.Logger:
+        """Configure logging."""
+        logging.basicConfig(
+            level=log_level,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        return logging.getLogger(__name__)
+
+    def save(self) -> None:
+        """Write the state file atomically, forgetting hashes of files that no longer exist."""
+        self.state['files'] = {path: entry for path, entry in self.state['files'].items() if os.path.exists(path)}
+        self.hasher.cache = self.state['files']
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    def order(self, targets: Iterable[str]) -> List[str]:
+        """The targets and everything they depend on, dependencies first."""
+        ordered: List[str] = []
+
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if name in path:
+                raise ValueError(f"dependency cycle: {' -> '.join(path + (name,))}")
+            if name in ordered:
+                return
+            if name not in self.stages:
+                raise ValueError(f"unknown stage '{name}' (choose from {', '.join(self.stages)})")
+            for dep in self.stages[name].deps:
+                visit(dep, path + (name,))
+            ordered.append(name)
+
+        for target in targets:
+            visit(target, ())
+        return ordered
+
+    def _glob(self, patterns: List[str]) -> List[str]:
+        paths = set()
+        for pattern in patterns:
+            paths.update(p for p in glob.glob(os.path.join(self.root, pattern), recursive=True) if os.path.isfile(p))
+        return sorted(paths)
+
+    def stage_key(self, stage: Stage) -> str:
+        """Key of a whole stage: its parameters plus the content of every input."""
+        inputs = [(os.path.relpath(path, self.root), self.hasher(path)) for path in self._glob(stage.inputs)]
+        return _key(stage.name, stage.params, inputs)
+
+    def file_key(self, stage: Stage, path: str) -> str:
+        """Key of one input of a per-file stage."""
+        return _key(stage.name, stage.params, os.path.relpath(path, self.root), self.hasher(path))
+
+    def _outputs_intact(self, stage_state: Dict) -> bool:
+        for rel_path, digest in stage_state.get('outputs', {}).items():
+            path = os.path.join(self.root, rel_path)
+            if not os.path.exists(path) or self.hasher(path) != digest:
+                return False
+        return True
+
+    def stale_files(self, stage: Stage) -> List[str]:
+        """Inputs of a per-file stage whose key changed or whose output is missing."""
+        done = self.state['stages'].get(stage.name, {}).get('files', {})
+        return [path for path in self._glob(stage.inputs)
+                if done.get(os.path.relpath(path, self.root)) != self.file_key(stage, path)
+                or not os.path.exists(stage.target(path))]
+
+    def is_current(self, stage: Stage) -> bool:
+        """True if the stage has nothing to do."""
+        if stage.per_file:
+            return not self.stale_files(stage)
+        stage_state = self.state['stages'].get(stage.name)
+        return (stage_state is not None and stage_state.get('key') == self.stage_key(stage)
+                and self._outputs_intact(stage_state))
+
+    def plan(self, targets: Iterable[str]) -> List[Tuple[str, str]]:
+        """
+        What a run would do, without running anything.
+
+        A stage downstream of one that rebuilds is reported as pending: its
+        inputs will only be known after the upstream stage has run, and it is
+        skipped then if they come out unchanged.
+        """
+        plan = []
+        rebuilding = set()
+        for name in self.order(targets):
+            stage = self.stages[name]
+            upstream = [dep for dep in stage.deps if dep in rebuilding]
+            if stage.per_file:
+                stale = self.stale_files(stage)
+                status = f'rebuild {len(stale)} file(s)' if stale else 'up to date'
+            else:
+                status = 'up to date' if self.is_current(stage) else 'rebuild'
+            if status == 'up to date' and upstream:
+                status = f"pending on {', '.join(upstream)}"
+            if status != 'up to date':
+                rebuilding.add(name)
+            plan.append((name, status))
+        return plan
+
+    def _run_per_file(self, stage: Stage) -> bool:
+        stale = self.stale_files(stage)
+        if not stale:
+            self.logger.info(f"[{stage.name}] up to date")
+            return True
+        self.logger.info(f"[{stage.name}] processing {len(stale)} file(s)")
+        keys = {path: self.file_key(stage, path) for path in stale}
+        targets = [stage.target(path) for path in stale]
+        for target in targets:
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+
+        if self.workers > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(_run_file_job, [stage.run] * len(stale), [stage.params] * len(stale),
+                                            stale, targets))
+        else:
+            results = [_run_file_job(stage.run, stage.params, src, dst) for src, dst in zip(stale, targets)]
+
+        done = self.state['stages'].setdefault(stage.name, {}).setdefault('files', {})
+        # Forget inputs that were removed
+        current = {os.path.relpath(path, self.root) for path in self._glob(stage.inputs)}
+        for rel_path in list(done):
+            if rel_path not in current:
+                del done[rel_path]
+        failed = 0
+        for src, error in results:
+            if error is not None:
+                self.logger.error(f"[{stage.name}] {src}: {error}")
+                failed += 1
+                continue
+            done[os.path.relpath(src, self.root)] = keys[src]
+        return failed == 0
+
+    def _run_whole(self, stage: Stage) -> bool:
+        key = self.stage_key(stage)
+        stage_state = self.state['stages'].get(stage.name)
+        if stage_state is not None and stage_state.get('key') == key and self._outputs_intact(stage_state):
+            self.logger.info(f"[{stage.name}] up to date")
+            return True
+        self.logger.info(f"[{stage.name}] running")
+        try:
+            stage.run(stage.params)
+        except Exception as e:
+            self.logger.error(f"[{stage.name}] failed: {type(e).__name__}: {e}")
+            return False
+        outputs = {os.path.relpath(path, self.root): self.hasher(path) for path in self._glob(stage.outputs)}
+        self.state['stages'][stage.name] = {'key': key, 'outputs': outputs}
+        return True
+
+    def run(self, targets: Iterable[str]) -> bool:
+        """Bring the targets up to date, stopping at the first stage that fails."""
+        for name in self.order(targets):
+            stage = self.stages[name]
+            ok = self._run_per_file(stage) if stage.per_file else self._run_whole(stage)
+            self.save()
+            if not ok:
+                self.logger.error(f"Stopping: stage {name} failed")
+                return False
+        return True
+
+
+# Stage implementations. Each imports its module only when it runs.
+
+def convert_mp3(src: str, dst: str, params: Dict) -> None:
+    from mp3Towav import convert_file
+    status, error = convert_file(src, dst, params['sample_rate'], params['channels'], force=True)
+    if error:
+        raise RuntimeError(error)
+
+
+def split_epub(src: str, dst: str, params: Dict) -> None:
+    from splitEpubToSentences import EPUBTranscriptProcessor
+    processor = EPUBTranscriptProcessor(log_level=logging.WARNING)
+    if not processor.stream_epub_to_transcripts(src, dst, params['speaker'], workers=1):
+        raise RuntimeError('no transcripts written')
+
+
+def align_corpus(params: Dict) -> None:
+    from alignSpeechToText import align_corpus as align_sharded
+    failures = align_sharded(params['corpus_dir'], params['dictionary'], params['acoustic_model'],
+                             params['shards'], params['aligner'])
+    if failures:
+        raise RuntimeError(f'{len(failures)} recording(s) failed to align')
+
+
+def segment_corpus(params: Dict) -> None:
+    from speechDatasetPreprocessor import prepare_dataset
+    failures = prepare_dataset(params['corpus_dir'], params['dataset_dir'], params['backend'], params['jobs'])
+    if failures:
+        raise RuntimeError(f'{len(failures)} recording(s) failed to segment')
+
+
+def normalize_metadata(params: Dict) -> None:
+    from TTSDatasetNormalizer import TTSDatasetNormalizer
+    normalizer = TTSDatasetNormalizer(number_cache_path=params['number_cache'])
+    # metadata.csv is read by training as headerless LJSpeech
+    if not normalizer.process_file(params['input'], params['output'], workers=params['jobs'], header=False):
+        raise RuntimeError('normalization failed')
+    normalizer.save_number_cache()
+
+
+def train_model(params: Dict) -> None:
+    subprocess.run([sys.executable, os.path.join(REPO_DIR, 'trainOverflow.py')], check=True)
+
+
+def default_stages(args: argparse.Namespace) -> List[Stage]:
+    """The README chain with the repository's default layout."""
+    corpus = args.corpus_dir
+    speaker_dir = os.path.join(corpus, args.speaker)
+    dataset = args.dataset_dir
+    if args.aligner is None:
+        from alignSpeechToText import DEFAULT_ALIGNER
+        args.aligner = DEFAULT_ALIGNER
+    sample_rate = args.sample_rate
+    if sample_rate is None and os.path.exists(args.config):
+        from audioConformance import load_target_sample_rate
+        sample_rate = load_target_sample_rate(args.config)
+
+    return [
+        Stage('convert', [os.path.join(args.audio_dir, '*.mp3')], [os.path.join(speaker_dir, '*.wav')],
+              convert_mp3, {'sample_rate': sample_rate, 'channels': 1},
+              target=lambda src: os.path.join(speaker_dir, os.path.splitext(os.path.basename(src))[0] + '.wav')),
+        Stage('epub', [os.path.join(args.epub_dir, '*.epub')], [os.path.join(args.transcripts_dir, '**', '*.txt')],
+              split_epub, {'speaker': args.speaker},
+              target=lambda src: os.path.join(args.transcripts_dir, os.path.splitext(os.path.basename(src))[0])),
+        Stage('align', [os.path.join(corpus, '**', '*.wav'), os.path.join(corpus, '**', '*.txt')],
+              [os.path.join(corpus, '**', '*.TextGrid')],
+              align_corpus, {'corpus_dir': corpus, 'dictionary': 'english_us_arpa',
+                             'acoustic_model': 'english_us_arpa', 'shards': args.workers, 'aligner': args.aligner},
+              deps=['convert']),
+        Stage('segment', [os.path.join(corpus, '**', ext) for ext in ('*.wav', '*.txt', '*.TextGrid')],
+              [os.path.join(dataset, 'metadata.txt'), os.path.join(dataset, 'wavs', '*.wav')],
+              segment_corpus, {'corpus_dir': corpus, 'dataset_dir': dataset, 'backend': args.backend,
+                               'jobs': args.workers},
+              deps=['align']),
+        Stage('normalize', [os.path.join(dataset, 'metadata.txt')], [os.path.join(dataset, 'metadata.csv')],
+              normalize_metadata, {'input': os.path.join(dataset, 'metadata.txt'),
+                                   'output': os.path.join(dataset, 'metadata.csv'),
+                                   'number_cache': args.number_cache, 'jobs': args.workers},
+              deps=['segment']),
+        Stage('train', [os.path.join(dataset, 'metadata.csv'), os.path.join(dataset, 'wavs', '*.wav'),
+                        args.config, os.path.join(REPO_DIR, 'trainOverflow.py')], [],
+              train_model, deps=['normalize']),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Run the data-prep chain, rebuilding only what changed.')
+    parser.add_argument('targets', nargs='*', default=['epub', 'normalize'],
+                        help='stages to bring up to date, with their dependencies '
+                             '(convert, epub, align, segment, normalize, train; default: epub normalize)')
+    parser.add_argument('--dry-run', action='store_true', help='show what would be rebuilt and exit')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='processes for per-file stages, segmentation and normalization')
+    parser.add_argument('--audio-dir', default='audio/input')
+    parser.add_argument('--epub-dir', default='text/input')
+    parser.add_argument('--transcripts-dir', default='text/output')
+    parser.add_argument('--corpus-dir', default='corpus_directory')
+    parser.add_argument('--speaker', default='Speaker1')
+    parser.add_argument('--dataset-dir', default='MyTTSDataset')
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--sample-rate', type=int, default=None,
+                        help='converted WAV sample rate (default: audio.sample_rate from --config)')
+    parser.add_argument('--aligner', default=None,
+                        help='aligner command template for the align stage (see alignSpeechToText.py)')
+    parser.add_argument('--backend', default='auto', help='speechDatasetPreprocessor backend')
+    parser.add_argument('--number-cache', default=None, help='persistent number expansion cache for normalize')
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline(default_stages(args), workers=args.workers)
+    try:
+        if args.dry_run:
+            for name, status in pipeline.plan(args.targets):
+                print(f'{name:<10} {status}')
+            return 0
+        return 0 if pipeline.run(args.targets) else 1
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Compact table of training samples.
+
+Coqui's load_tts_samples builds one dict per metadata row. Each dict
+repeats the speaker, language and root path and holds a formatted
+``.wav`` path and a unique name, which at millions of rows costs
+gigabytes before training starts. SampleTable keeps texts and audio
+paths as UTF-8 in two shared buffers with offset arrays. Speakers are
+interned integer codes, and root path, dataset name and language are
+stored once per dataset. A row becomes a SampleRecord, a ``__slots__``
+mapping with the same keys as Coqui's sample dicts, only when it is
+accessed.
+
+load_tts_samples here is a drop-in for ``TTS.tts.datasets.load_tts_samples``.
+LJSpeech metadata is streamed straight into the table. The eval split is
+drawn as row indices, with the same seed and selection as Coqui's
+split_dataset, so no sample is built or copied to split the data.
+"""
+import os
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+LJSPEECH_SPEAKER = 'ljspeech'
+
+
+class _Source(NamedTuple):
+    """What every row of one dataset shares."""
+    root_path: str
+    dataset_name: str
+    language: str
+    # Prepended to a row's stored audio path
+    audio_prefix: str
+
+
+class _StringColumn:
+    """Strings stored back to back as UTF-8, with end offsets."""
+
+    __slots__ = ('data', 'ends')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array('Q')
+
+    def append(self, value: bytes) -> None:
+        self.data += value
+        self.ends.append(len(self.data))
+
+    def get(self, i: int) -> str:
+        start = self.ends[i - 1] if i else 0
+        return self.data[start:self.ends[i]].decode('utf-8')
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.ends.itemsize * len(self.ends)
+
+
+class _Columns:
+    """Row storage shared by a table and every view of it."""
+
+    def __init__(self):
+        self.texts = _StringColumn()
+        self.audio = _StringColumn()
+        self.source_codes = array('H')
+        self.speaker_codes = array('I')
+        self.sources: List[_Source] = []
+        self.speakers: List[str] = []
+        self._speaker_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.source_codes)
+
+    def add_source(self, root_path: str, dataset_name: str, language: str, audio_prefix: str) -> int:
+        self.sources.append(_Source(sys.intern(root_path), sys.intern(dataset_name), sys.intern(language),
+                                    audio_prefix))
+        return len(self.sources) - 1
+
+    def speaker_code(self, speaker_name: str) -> int:
+        code = self._speaker_ids.get(speaker_name)
+        if code is None:
+            code = self._speaker_ids[speaker_name] = len(self.speakers)
+            self.speakers.append(sys.intern(speaker_name))
+        return code
+
+    def field(self, row: int, key: str):
+        if key == 'text':
+            return self.texts.get(row)
+        if key == 'speaker_name':
+            return self.speakers[self.speaker_codes[row]]
+        source = self.sources[self.source_codes[row]]
+        if key == 'audio_file':
+            return source.audio_prefix + self.audio.get(row)
+        if key == 'root_path':
+            return source.root_path
+        if key == 'language':
+            return source.language
+        if key == 'audio_unique_name':
+            audio_file = source.audio_prefix + self.audio.get(row)
+            return f'{source.dataset_name}#{os.path.splitext(os.path.relpath(audio_file, source.root_path))[0]}'
+        raise KeyError(key)
+
+    def nbytes(self) -> int:
+        return (self.texts.nbytes() + self.audio.nbytes() + self.source_codes.itemsize * len(self.source_codes)
+                + self.speaker_codes.itemsize * len(self.speaker_codes))
+
+
+class SampleRecord(Mapping):
+    """One sample, read from the table on access. Keys set on it are kept on the record only."""
+
+    __slots__ = ('_columns', '_row', '_overrides')
+
+    KEYS = ('text', 'audio_file', 'speaker_name', 'root_path', 'language', 'audio_unique_name')
+
+    def __init__(self, columns: _Columns, row: int):
+        self._columns = columns
+        self._row = row
+        self._overrides: Optional[Dict[str, object]] = None
+
+    def __getitem__(self, key: str):
+        if self._overrides is not None and key in self._overrides:
+            return self._overrides[key]
+        return self._columns.field(self._row, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        # Coqui's dataset adds keys such as text_length to its samples
+        if self._overrides is None:
+            self._overrides = {}
+        self._overrides[key] = value
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.KEYS
+        if self._overrides is not None:
+            yield from (key for key in self._overrides if key not in self.KEYS)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f'SampleRecord({dict(self)!r})'
+
+
+class SampleTable:
+    """Sequence of SampleRecords over shared columns, optionally a selection of their rows."""
+
+    def __init__(self, columns: Optional[_Columns] = None, rows: Optional[np.ndarray] = None):
+        self.columns = columns if columns is not None else _Columns()
+        # None selects every row in order
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.columns) if self.rows is None else len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SampleTable(self.columns, self.row_indices()[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('sample index out of range')
+        return SampleRecord(self.columns, index if self.rows is None else int(self.rows[index]))
+
+    def __iter__(self) -> Iterator[SampleRecord]:
+        if self.rows is None:
+            for row in range(len(self.columns)):
+                yield SampleRecord(self.columns, row)
+            return
+        for start in range(0, len(self.rows), 1 << 16):
+            for row in self.rows[start:start + (1 << 16)].tolist():
+                yield SampleRecord(self.columns, row)
+
+    def __add__(self, other):
+        if isinstance(other, SampleTable) and other.columns is self.columns:
+            return SampleTable(self.columns, np.concatenate([self.row_indices(), other.row_indices()]))
+        return list(self) + list(other)
+
+    def row_indices(self) -> np.ndarray:
+        return np.arange(len(self.columns), dtype=np.uint32) if self.rows is None else self.rows
+
+    def take(self, positions) -> 'SampleTable':
+        """Table of the samples at the given positions of this one."""
+        return SampleTable(self.columns, self.row_indices()[np.asarray(positions, dtype=np.int64)])
+
+    def speaker_names(self) -> List[str]:
+        codes = np.frombuffer(self.columns.speaker_codes, dtype=np.uint32)
+        return [self.columns.speakers[code] for code in np.unique(codes[self.row_indices()])]
+
+    def nbytes(self) -> int:
+        """Memory held by the columns and this table's row selection."""
+        return self.columns.nbytes() + (0 if self.rows is None else self.rows.nbytes)
+
+    def append_ljspeech(self, root_path: str, meta_file: str, dataset_name: str = '', language: str = '',
+                        speaker_name: str = LJSPEECH_SPEAKER) -> int:
+        """
+        Stream an LJSpeech ``ID|transcription|normalized transcription`` file into the table.
+
+        Rows match Coqui's ljspeech formatter: the text is the third column as read,
+        and the audio file is root_path/wavs/ID.wav. Blank lines are skipped.
+
+        Returns:
+            Number of rows added
+        """
+        columns = self.columns
+        source = columns.add_source(root_path, dataset_name, language, os.path.join(root_path, 'wavs', ''))
+        speaker = columns.speaker_code(speaker_name)
+        texts, audio = columns.texts, columns.audio
+        added = 0
+        metafile_path = os.path.join(root_path, meta_file)
+        with open(metafile_path, 'rb') as f:
+            for line_number, line in enumerate(f, 1):
+                if line.endswith(b'\r\n'):
+                    line = line[:-2] + b'\n'
+                cols = line.split(b'|')
+                if len(cols) < 3:
+                    if not line.strip():
+                        continue
+                    raise ValueError(f'{metafile_path}:{line_number}: expected ID|transcription|normalized transcription')
+                audio.append(cols[0] + b'.wav')
+                texts.append(cols[2])
+                added += 1
+        columns.source_codes.extend([source] * added)
+        columns.speaker_codes.extend([speaker] * added)
+        return added
+
+    def append_samples(self, samples: Iterable[Mapping], root_path: str, dataset_name: str = '',
+                       language: str = '') -> int:
+        """Add the samples a Coqui-style formatter returns or yields; returns the number added."""
+        columns = self.columns
+        source = columns.add_source(root_path, dataset_name, language, '')
+        added = 0
+        for sample in samples:
+            columns.texts.append(sample['text'].encode('utf-8'))
+            columns.audio.append(sample['audio_file'].encode('utf-8'))
+            columns.speaker_codes.append(columns.speaker_code(sample['speaker_name']))
+            added += 1
+        columns.source_codes.extend([source] * added)
+        return added
+
+
+def split_eval(table: SampleTable, eval_split_max_size: Optional[int] = None,
+               eval_split_size: float = 0.01) -> Tuple[SampleTable, SampleTable]:
+    """
+    (eval, train) views of table, selected as Coqui's split_dataset would.
+
+    Only row indices are shuffled; the samples themselves are never built.
+    """
+    n = len(table)
+    if eval_split_size > 1:
+        eval_size = int(eval_split_size)
+    elif eval_split_max_size:
+        eval_size = min(eval_split_max_size, int(n * eval_split_size))
+    else:
+        eval_size = int(n * eval_split_size)
+    assert eval_size > 0, (
+        " [!] You do not have enough samples for the evaluation set. You can work around this setting the "
+        f"'eval_split_size' parameter to a minimum of {1 / n}")
+
+    np.random.seed(0)
+    order = np.random.permutation(n)
+    if len(table.speaker_names()) == 1:
+        return table.take(order[:eval_size]), table.take(order[eval_size:])
+
+    # Draw eval samples one at a time, never taking a speaker's last sample
+    codes = np.frombuffer(table.columns.speaker_codes, dtype=np.uint32)[table.row_indices()]
+    remaining = order.tolist()
+    speaker_counter = Counter(codes.tolist())
+    eval_positions = []
+    while len(eval_positions) < eval_size:
+        i = np.random.randint(0, len(remaining))
+        speaker = codes[remaining[i]]
+        if speaker_counter[speaker] > 1:
+            eval_positions.append(remaining[i])
+            speaker_counter[speaker] -= 1
+            del remaining[i]
+    return table.take(eval_positions), table.take(remaining)
+
+
+def _dataset_value(dataset, key: str, default=None):
+    value = getattr(dataset, key, None)
+    if value is None and isinstance(dataset, Mapping):
+        value = dataset.get(key)
+    return default if value is None else value
+
+
+def load_tts_samples(datasets, eval_split: bool = True, formatter: Optional[Callable] = None,
+                     eval_split_max_size: Optional[int] = None, eval_split_size: float = 0.01
+                     ) -> Tuple[SampleTable, Optional[SampleTable]]:
+    """
+    Load train and eval samples from dataset configs into one SampleTable.
+
+    Takes the arguments of Coqui's load_tts_samples and returns the same
+    samples. Datasets with the 'ljspeech' formatter are streamed into the table.
+    For any other formatter, or when a formatter callable is given, its
+    samples are packed into the table as it produces them. Attention mask
+    files are not supported; those datasets are handed to Coqui's function.
+    """
+    if not isinstance(datasets, list):
+        datasets = [datasets]
+    if any(_dataset_value(dataset, 'meta_file_attn_mask') for dataset in datasets):
+        from TTS.tts.datasets import load_tts_samples as coqui_load_tts_samples
+        return coqui_load_tts_samples(datasets, eval_split, formatter, eval_split_max_size, eval_split_size)
+
+    columns = _Columns()
+    train_rows, eval_rows = [], []
+    for dataset in datasets:
+        root_path = _dataset_value(dataset, 'path', '')
+        dataset_name = _dataset_value(dataset, 'dataset_name', '')
+        language = _dataset_value(dataset, 'language', '')
+        meta_file_train = _dataset_value(dataset, 'meta_file_train')
+        meta_file_val = _dataset_value(dataset, 'meta_file_val')
+
+        def load(meta_file: str) -> SampleTable:
+            start = len(columns)
+            table = SampleTable(columns)
+            name = _dataset_value(dataset, 'formatter')
+            if formatter is None and name == 'ljspeech':
+                table.append_ljspeech(root_path, meta_file, dataset_name, language)
+            else:
+                if formatter is None:
+                    from TTS.tts.datasets import _get_formatter_by_name
+                    dataset_formatter = _get_formatter_by_name(name)
+                else:
+                    dataset_formatter = formatter
+                samples = dataset_formatter(root_path, meta_file,
+                                            ignored_speakers=_dataset_value(dataset, 'ignored_speakers'))
+                table.append_samples(samples, root_path, dataset_name, language)
+            return SampleTable(columns, np.arange(start, len(columns), dtype=np.uint32))
+
+        train = load(meta_file_train)
+        assert len(train) > 0, f' [!] No training samples found in {root_path}/{meta_file_train}'
+        print(f' | > Found {len(train)} files in {os.path.abspath(root_path)}')
+        if eval_split:
+            if meta_file_val:
+                evaluation = load(meta_file_val)
+            else:
+                eval_size_per_dataset = eval_split_max_size // len(datasets) if eval_split_max_size else None
+                evaluation, train = split_eval(train, eval_size_per_dataset, eval_split_size)
+            eval_rows.append(evaluation.row_indices())
+        train_rows.append(train.row_indices())
+
+    def table_of(rows: List[np.ndarray]) -> SampleTable:
+        return SampleTable(columns, np.concatenate(rows).astype(np.uint32) if rows else np.zeros(0, np.uint32))
+
+    return table_of(train_rows), table_of(eval_rows) if eval_split else None
@@ -1,53 +1,298 @@
 import os
 import sys
+import argparse
+import struct
+import wave
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
-from praatio import tgio
-
-def prepare_dataset(corpus_dir):
-    os.makedirs('./MyTTSDataset/wavs', exist_ok=True)
-
-    with open('./MyTTSDataset/metadata.txt', 'w') as metadata_file:
-        for speaker in os.listdir(corpus_dir):
-            speaker_dir = os.path.join(corpus_dir, speaker)
-            if os.path.isdir(speaker_dir):
-                for transcript_file in os.listdir(speaker_dir):
-                    if transcript_file.endswith('.txt'):
-                        base_name = os.path.splitext(transcript_file)[0]
-                        textgrid_file = os.path.join(speaker_dir, base_name + '.TextGrid')
-                        wav_file = os.path.join(speaker_dir, base_name + '.wav')
-                        with open(os.path.join(speaker_dir, transcript_file), 'r') as f:
-                            transcript = f.read().strip()
-                        tg = tgio.openTextgrid(textgrid_file)
-                        audio = AudioSegment.from_wav(wav_file)
-                        
-                        entryList = tg.tierDict[tg.tierNameList[0]].entryList
-                        sentence_start = None
-                        sentence_end = None
-                        sentence_words = []
-                        sentences = []
-                        transcriptions = []
-                        for start, end, label in entryList:
-                            if label == "speaker1":
-                                if sentence_start is not None:
-                                    sentences.append(audio[int(sentence_start * 1000):int(sentence_end * 1000)])
-                                    transcriptions.append(' '.join(sentence_words))
-                                sentence_start = start
-                                sentence_end = end
-                                sentence_words = []
-                            elif sentence_start is not None:
-                                sentence_end = end
-                                sentence_words.append(label)
-                        if sentence_start is not None:
-                            sentences.append(audio[int(sentence_start * 1000):int(sentence_end * 1000)])
-                            transcriptions.append(' '.join(sentence_words))
-                        
-                        for i, (sentence, transcription) in enumerate(zip(sentences, transcriptions)):
-                            sentence_file = f'{base_name}_{i+1}.wav'
-                            sentence_path = f'./MyTTSDataset/wavs/{sentence_file}'
-                            sentence.export(sentence_path, format='wav')
-                            metadata_file.write(f'{sentence_file}|{transcription}\n')
+
+from textGridReader import iter_intervals
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BACKENDS = ('auto', 'numpy', 'stream', 'pydub')
+
+
+def sentence_windows(entryList):
+    """Group word intervals into (start, end, transcription) sentences, each opened by a speaker1 interval."""
+    windows = []
+    sentence_start = None
+    sentence_end = None
+    sentence_words = []
+    for start, end, label in entryList:
+        if label == "speaker1":
+            if sentence_start is not None:
+                windows.append((sentence_start, sentence_end, ' '.join(sentence_words)))
+            sentence_start = start
+            sentence_end = end
+            sentence_words = []
+        elif sentence_start is not None:
+            sentence_end = end
+            sentence_words.append(label)
+    if sentence_start is not None:
+        windows.append((sentence_start, sentence_end, ' '.join(sentence_words)))
+    return windows
+
+
+def window_to_frames(start, end, frame_rate, n_frames):
+    """Frame range selected by pydub's audio[int(start * 1000):int(end * 1000)]."""
+    length_ms = round(1000 * (n_frames / frame_rate))
+    start_ms = min(int(start * 1000), length_ms)
+    end_ms = min(int(end * 1000), length_ms)
+    return int(start_ms * (frame_rate / 1000.0)), int(end_ms * (frame_rate / 1000.0))
+
+
+WavHeader = namedtuple('WavHeader', ['audio_format', 'channels', 'frame_rate', 'sample_width',
+                                     'data_pos', 'data_size'])
+
+
+def read_wav_header(wav_file):
+    """
+    Locate the fmt and data chunks of a WAV file the same way pydub does.
+
+    Returns a WavHeader with data_size clipped to the end of the file, or None if the
+    file is not a PCM WAV that can be read without decoding it.
+    """
+    with open(wav_file, 'rb') as f:
+        header = f.read(12)
+        if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        file_size = os.fstat(f.fileno()).st_size
+        fmt = None
+        data_pos = data_size = None
+        pos = 12
+        for _ in range(10):
+            if pos + 8 > file_size:
+                break
+            f.seek(pos)
+            chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+            if chunk_id == b'fmt ' and fmt is None:
+                fmt = f.read(16)
+            if chunk_id == b'data':
+                data_pos = pos + 8
+                data_size = min(chunk_size, file_size - data_pos)
+                break
+            pos += chunk_size + 8
+
+    if fmt is None or len(fmt) < 16 or data_pos is None:
+        return None
+    audio_format, channels, frame_rate, _, _, bits_per_sample = struct.unpack('<HHIIHH', fmt)
+    sample_width = bits_per_sample // 8
+    if audio_format not in (1, 0xFFFE) or sample_width not in (1, 2, 3, 4) or channels == 0:
+        return None
+    if data_size == 0 or data_size % (channels * sample_width):
+        return None
+    return WavHeader(audio_format, channels, frame_rate, sample_width, data_pos, data_size)
+
+
+def read_wav_memmap(wav_file):
+    """
+    Memory-map the PCM samples of a WAV file as a read-only (frames, channels) array.
+
+    Returns (array, frame_rate), or None for files the mapping cannot represent the
+    way pydub decodes them (24-bit, non-PCM or malformed).
+    """
+    header = read_wav_header(wav_file)
+    if header is None or header.sample_width == 3:
+        return None
+    sample_width = header.sample_width
+    dtype = np.uint8 if sample_width == 1 else np.dtype(f'<i{sample_width}')
+    samples = np.memmap(wav_file, dtype=dtype, mode='r', offset=header.data_pos,
+                        shape=(header.data_size // (header.channels * sample_width), header.channels))
+    return samples, header.frame_rate
+
+
+def write_wav(path, samples, frame_rate):
+    """Write a (frames, channels) sample array as PCM WAV without copying it."""
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(samples.shape[1])
+        out.setsampwidth(samples.dtype.itemsize)
+        out.setframerate(frame_rate)
+        out.setnframes(samples.shape[0])
+        if samples.size:
+            out.writeframesraw(samples)
+
+
+def export_segments_numpy(wav_file, windows, sentence_paths):
+    """Cut sentences as index views into a memory-mapped WAV. Returns False if the file is unsupported."""
+    mapped = read_wav_memmap(wav_file)
+    if mapped is None:
+        return False
+    samples, frame_rate = mapped
+    n_frames = samples.shape[0]
+    for (start, end, _), sentence_path in zip(windows, sentence_paths):
+        start_frame, end_frame = window_to_frames(start, end, frame_rate, n_frames)
+        segment = samples[start_frame:end_frame]
+        # pydub pads a slice that runs past the last frame with up to 2 ms of silence
+        missing = max(end_frame - start_frame, 0) - segment.shape[0]
+        if missing > 0:
+            if missing > 2 * frame_rate / 1000.0:
+                raise ValueError(f'{wav_file}: sentence ends {missing} frames past the end of the audio')
+            silence = np.full((missing, samples.shape[1]), 128 if samples.dtype == np.uint8 else 0,
+                              dtype=samples.dtype)
+            segment = np.concatenate([segment, silence])
+        write_wav(sentence_path, segment, frame_rate)
+    del samples
+    return True
+
+
+def widen_24bit(data):
+    """Convert 24-bit samples to 32-bit exactly as pydub does on load."""
+    out = bytearray(len(data) // 3 * 4)
+    out[0::4] = bytes(0xFF if b > 0x7f else 0x00 for b in data[2::3])
+    out[1::4] = data[0::3]
+    out[2::4] = data[1::3]
+    out[3::4] = data[2::3]
+    return bytes(out)
+
+
+def export_segments_stream(wav_file, windows, sentence_paths):
+    """
+    Cut sentences by reading only the frames of each window, in time order.
+
+    Memory is bounded by the longest sentence rather than the recording.
+    Returns False if the file is unsupported.
+    """
+    header = read_wav_header(wav_file)
+    if header is None:
+        return False
+    frame_width = header.channels * header.sample_width
+    n_frames = header.data_size // frame_width
+    out_width = 4 if header.sample_width == 3 else header.sample_width
+    silence = (b'\x80' if out_width == 1 else b'\x00' * out_width) * header.channels
+
+    order = sorted(range(len(windows)), key=lambda i: windows[i][0])
+    with open(wav_file, 'rb') as f:
+        for i in order:
+            start, end, _ = windows[i]
+            start_frame, end_frame = window_to_frames(start, end, header.frame_rate, n_frames)
+            read_end = min(end_frame, n_frames)
+            data = b''
+            if read_end > start_frame:
+                f.seek(header.data_pos + start_frame * frame_width)
+                data = f.read((read_end - start_frame) * frame_width)
+            if header.sample_width == 3:
+                data = widen_24bit(data)
+            # pydub pads a slice that runs past the last frame with up to 2 ms of silence
+            missing = max(end_frame - start_frame, 0) - max(read_end - start_frame, 0)
+            if missing > 0:
+                if missing > 2 * header.frame_rate / 1000.0:
+                    raise ValueError(f'{wav_file}: sentence ends {missing} frames past the end of the audio')
+                data += silence * missing
+            with wave.open(sentence_paths[i], 'wb') as out:
+                out.setnchannels(header.channels)
+                out.setsampwidth(out_width)
+                out.setframerate(header.frame_rate)
+                out.setnframes(len(data) // (header.channels * out_width))
+                out.writeframesraw(data)
+    return True
+
+
+def export_segments_pydub(wav_file, windows, sentence_paths):
+    """Cut sentences by decoding the whole WAV with pydub."""
+    audio = AudioSegment.from_wav(wav_file)
+    for (start, end, _), sentence_path in zip(windows, sentence_paths):
+        sentence = audio[int(start * 1000):int(end * 1000)]
+        sentence.export(sentence_path, format='wav')
+
+
+def export_segments(wav_file, windows, sentence_paths, backend='auto'):
+    """Write each (start, end, _) window of wav_file to its path with the chosen backend."""
+    if backend == 'auto':
+        exporters = [export_segments_numpy, export_segments_stream] if np is not None else [export_segments_stream]
+    else:
+        exporters = {'numpy': [export_segments_numpy], 'stream': [export_segments_stream], 'pydub': []}[backend]
+    # Exporters return False for files they cannot reproduce exactly; pydub handles those
+    if not any(exporter(wav_file, windows, sentence_paths) for exporter in exporters):
+        export_segments_pydub(wav_file, windows, sentence_paths)
+
+
+def segment_recording(speaker_dir, base_name, wavs_dir, backend='auto'):
+    """Split one recording into sentence WAVs and return its metadata lines."""
+    textgrid_file = os.path.join(speaker_dir, base_name + '.TextGrid')
+    wav_file = os.path.join(speaker_dir, base_name + '.wav')
+    windows = sentence_windows(iter_intervals(textgrid_file))
+
+    sentence_files = [f'{base_name}_{i+1}.wav' for i in range(len(windows))]
+    sentence_paths = [os.path.join(wavs_dir, sentence_file) for sentence_file in sentence_files]
+
+    export_segments(wav_file, windows, sentence_paths, backend)
+
+    return [f'{sentence_file}|{transcription}\n'
+            for sentence_file, (_, _, transcription) in zip(sentence_files, windows)]
+
+
+def list_recordings(corpus_dir):
+    """(speaker_dir, base_name) for every transcript in the corpus, in sorted order."""
+    recordings = []
+    for speaker in sorted(os.listdir(corpus_dir)):
+        speaker_dir = os.path.join(corpus_dir, speaker)
+        if os.path.isdir(speaker_dir):
+            for transcript_file in sorted(os.listdir(speaker_dir)):
+                if transcript_file.endswith('.txt'):
+                    recordings.append((speaker_dir, os.path.splitext(transcript_file)[0]))
+    return recordings
+
+
+def _segment_job(speaker_dir, base_name, wavs_dir, backend):
+    """Run segment_recording, returning (lines, error) so one bad recording does not stop the rest."""
+    try:
+        return segment_recording(speaker_dir, base_name, wavs_dir, backend), None
+    except Exception as e:
+        return [], f'{type(e).__name__}: {e}'
+
+
+def prepare_dataset(corpus_dir, output_dir='./MyTTSDataset', backend='auto', jobs=1):
+    """
+    Segment every recording in corpus_dir and write metadata.txt.
+
+    With jobs > 1 recordings are segmented in worker processes. Metadata lines are
+    merged in sorted recording order either way, so the output does not depend on
+    scheduling. Returns a list of (recording, error) for recordings that failed.
+    """
+    if backend == 'numpy' and np is None:
+        raise ImportError('the numpy backend requires numpy')
+    wavs_dir = os.path.join(output_dir, 'wavs')
+    os.makedirs(wavs_dir, exist_ok=True)
+
+    recordings = list_recordings(corpus_dir)
+    args = [(speaker_dir, base_name, wavs_dir, backend) for speaker_dir, base_name in recordings]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_segment_job, *zip(*args))) if args else []
+    else:
+        results = [_segment_job(*job_args) for job_args in args]
+
+    failures = []
+    with open(os.path.join(output_dir, 'metadata.txt'), 'w') as metadata_file:
+        for (speaker_dir, base_name), (lines, error) in zip(recordings, results):
+            if error is not None:
+                failures.append((os.path.join(speaker_dir, base_name), error))
+                continue
+            metadata_file.writelines(lines)
+
+    print(f'[+] segmented {len(recordings) - len(failures)}/{len(recordings)} recordings')
+    for recording, error in failures:
+        print(f'[-] {recording}: {error}', file=sys.stderr)
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Split aligned recordings into sentence WAVs.')
+    parser.add_argument('corpus_dir')
+    parser.add_argument('--output-dir', default='./MyTTSDataset')
+    parser.add_argument('--backend', choices=BACKENDS, default='auto',
+                        help='numpy memory-maps source WAVs, stream reads one sentence at a time, '
+                             'pydub decodes them whole (default: auto)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of recordings to segment in parallel (default: 1)')
+    args = parser.parse_args(argv)
+    failures = prepare_dataset(args.corpus_dir, args.output_dir, args.backend, args.jobs)
+    return 1 if failures else 0
+
 
 if __name__ == '__main__':
-    corpus_dir = sys.argv[1]
-    prepare_dataset(corpus_dir)
+    sys.exit(main())
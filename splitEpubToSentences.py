@@ -1,28 +1,196 @@
 #!/usr/bin/env python3
 import os
+import io
 import sys
+import argparse
 import logging
-from typing import List, Optional, Tuple, Generator
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from typing import Iterable, Iterator, List, Optional, Tuple, Generator
 from pathlib import Path
 
 import ebooklib
 from ebooklib import epub
 from bs4 import BeautifulSoup
 import nltk
-from nltk.tokenize import sent_tokenize
+from nltk.tokenize import punkt
+
+class SentenceTokenizer:
+    """
+    Punkt sentence tokenizer loaded once per process.
+    
+    The model is looked up locally first and only downloaded if it is
+    missing, so runs with the model installed never touch the network.
+    """
+    
+    def __init__(self, language: str = 'english', download: bool = True):
+        """
+        Args:
+            language: Punkt model name
+            download: Download the model if it is not installed
+        """
+        self.language = language
+        self.download = download
+        self._tokenizer = None
+    
+    @property
+    def resource(self) -> str:
+        # NLTK 3.8.2 replaced the pickled models with punkt_tab
+        if hasattr(punkt, 'PunktTokenizer'):
+            return 'punkt_tab'
+        return 'punkt'
+    
+    def is_available(self) -> bool:
+        """True if the model is installed locally."""
+        path = (f'tokenizers/punkt_tab/{self.language}/' if self.resource == 'punkt_tab'
+                else f'tokenizers/punkt/{self.language}.pickle')
+        try:
+            nltk.data.find(path)
+            return True
+        except LookupError:
+            return False
+    
+    def ensure_available(self) -> bool:
+        """Download the model if it is missing and downloads are allowed. Returns availability."""
+        if self.is_available():
+            return True
+        if self.download:
+            try:
+                nltk.download(self.resource, quiet=True)
+            except Exception as e:
+                logging.warning(f"Failed to download NLTK data: {e}")
+        if self.is_available():
+            return True
+        logging.warning("Sentence tokenization might not work correctly.")
+        return False
+    
+    def load(self):
+        """Load the model, raising LookupError if it is not installed."""
+        if self._tokenizer is None:
+            self.ensure_available()
+            if self.resource == 'punkt_tab':
+                self._tokenizer = punkt.PunktTokenizer(self.language)
+            else:
+                self._tokenizer = nltk.data.load(f'tokenizers/punkt/{self.language}.pickle')
+        return self._tokenizer
+    
+    def tokenize(self, text: str) -> List[str]:
+        """Split one text into sentences, as nltk.sent_tokenize would."""
+        return self.load().tokenize(text)
+    
+    def tokenize_batch(self, texts: Iterable[str]) -> List[List[str]]:
+        """Split each text into sentences with a single model lookup."""
+        tokenize = self.load().tokenize
+        return [tokenize(text) for text in texts]
+    
+    def __getstate__(self):
+        # Workers load their own copy rather than unpickling the model
+        state = self.__dict__.copy()
+        state['_tokenizer'] = None
+        return state
+
+
+# Per-process tokenizer used by chapter workers
+_worker_tokenizer: Optional[SentenceTokenizer] = None
+
+
+def _init_worker(tokenizer: SentenceTokenizer) -> None:
+    """Install the worker's tokenizer; its model is loaded on first use and kept for the process."""
+    global _worker_tokenizer
+    _worker_tokenizer = tokenizer
+
+
+def _resolve_parser(parser: str) -> str:
+    """Fall back to the stdlib parser if lxml is not installed."""
+    if parser == 'lxml':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            logging.warning("lxml is not installed, using html.parser")
+            return 'html.parser'
+    return parser
+
+
+def _chapter_text(content: bytes, parser: str) -> Tuple[Optional[str], Optional[str]]:
+    """Extract the text of one chapter document. Returns (text, error)."""
+    try:
+        with warnings.catch_warnings():
+            # EPUB chapters are XHTML; parsing them as HTML is intended
+            warnings.simplefilter('ignore')
+            soup = BeautifulSoup(content, parser)
+        return soup.get_text(separator=' ', strip=True), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _speaker_lines(lines: Iterable[str], default_speaker: str) -> Iterator[Tuple[str, str]]:
+    """Yield (speaker, text) for each non-empty line."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        # Extract speaker if present, otherwise use default
+        if '\t' in line:
+            speaker, text = line.split('\t', 1)
+        else:
+            speaker = default_speaker
+            text = line
+        yield speaker, text
+
+
+def _tokenize_lines(tokenizer: SentenceTokenizer,
+                    lines: Iterable[str],
+                    default_speaker: str,
+                    batch_size: int = 256) -> Iterator[str]:
+    """Yield 'speaker\tsentence\n' lines, tokenizing the input in batches."""
+    pairs = _speaker_lines(lines, default_speaker)
+    while True:
+        batch = list(islice(pairs, batch_size))
+        if not batch:
+            return
+        for (speaker, _), sentences in zip(batch, tokenizer.tokenize_batch(text for _, text in batch)):
+            for sentence in sentences:
+                sentence = sentence.strip()
+                if sentence:
+                    yield f'{speaker}\t{sentence}\n'
+
+
+def _chapter_transcript(content: bytes,
+                        parser: str,
+                        default_speaker: str,
+                        keep_text: bool) -> Tuple[Optional[str], Optional[List[str]], Optional[str]]:
+    """
+    Extract and sentence-tokenize one chapter in a worker.
+    
+    Returns (text if keep_text, transcript lines, error).
+    """
+    text, error = _chapter_text(content, parser)
+    if error is not None:
+        return None, None, error
+    try:
+        # Split lines the way reading a chapter file back would
+        lines = list(_tokenize_lines(_worker_tokenizer, io.StringIO(text, newline=None), default_speaker))
+    except Exception as e:
+        return None, None, str(e)
+    return (text if keep_text else None), lines, None
+
 
 class EPUBTranscriptProcessor:
     """Process EPUB files into speaker-attributed transcripts with sentence tokenization."""
     
-    def __init__(self, download_nltk: bool = True, log_level: int = logging.INFO):
+    def __init__(self, download_nltk: bool = True, log_level: int = logging.INFO, language: str = 'english'):
         """
         Initialize the processor.
         
         Args:
-            download_nltk: Whether to download required NLTK data
+            download_nltk: Whether to download required NLTK data if it is missing
             log_level: Logging level to use
+            language: Punkt model used for sentence tokenization
         """
         self.logger = self._setup_logging(log_level)
+        self.tokenizer = SentenceTokenizer(language, download=download_nltk)
         if download_nltk:
             self._ensure_nltk_data()
     
@@ -35,14 +203,9 @@ class EPUBTranscriptProcessor:
         )
         return logging.getLogger(__name__)
     
-    @staticmethod
-    def _ensure_nltk_data():
+    def _ensure_nltk_data(self):
         """Download required NLTK data if not present."""
-        try:
-            nltk.download('punkt', quiet=True)
-        except Exception as e:
-            logging.warning(f"Failed to download NLTK data: {e}")
-            logging.warning("Sentence tokenization might not work correctly.")
+        self.tokenizer.ensure_available()
     
     def extract_chapters(self, epub_path: str, output_dir: str) -> List[str]:
         """
@@ -92,6 +255,73 @@ class EPUBTranscriptProcessor:
             self.logger.error(f"Failed to process EPUB {epub_path}: {e}")
             return []
     
+    @staticmethod
+    def _spine_documents(book: epub.EpubBook) -> List[epub.EpubItem]:
+        """Document items in spine order, followed by any documents not in the spine."""
+        documents = [item for item in book.get_items() if item.get_type() == ebooklib.ITEM_DOCUMENT]
+        position = {}
+        for i, (idref, _) in enumerate(book.spine):
+            position.setdefault(idref, i)
+        return sorted(documents, key=lambda item: position.get(item.get_id(), len(position)))
+
+    def _map_chapters(self, epub_path: str, workers: int, job, *args) -> Iterator[Tuple[str, tuple]]:
+        """Run job(content, *args) over the chapter documents in spine order, yielding (title, result)."""
+        documents = self._spine_documents(epub.read_epub(epub_path))
+        contents = (item.get_content() for item in documents)
+        
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(self.tokenizer,))
+            results = executor.map(job, contents, *map(repeat, args), chunksize=4)
+        else:
+            executor = None
+            _init_worker(self.tokenizer)
+            results = map(job, contents, *map(repeat, args))
+        
+        try:
+            for item, result in zip(documents, results):
+                if result[-1] is not None:
+                    self.logger.error(f"Error processing chapter {item.get_name()}: {result[-1]}")
+                    continue
+                yield os.path.splitext(item.get_name())[0], result
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    
+    def iter_chapters(self,
+                      epub_path: str,
+                      workers: int = 1,
+                      parser: str = 'lxml') -> Iterator[Tuple[str, str]]:
+        """
+        Yield (chapter_title, text) for every chapter in spine order, without writing files.
+        
+        Args:
+            epub_path: Path to input EPUB file
+            workers: Number of processes parsing chapter HTML
+            parser: BeautifulSoup parser backend; falls back to html.parser without lxml
+            
+        Yields:
+            Chapter title and extracted text; chapters that fail to parse are logged and skipped
+        """
+        for chapter_title, (text, _) in self._map_chapters(epub_path, workers, _chapter_text,
+                                                           _resolve_parser(parser)):
+            yield chapter_title, text
+    
+    def tokenize_lines(self, lines: Iterable[str], default_speaker: str) -> Iterator[str]:
+        """
+        Turn text lines into speaker-attributed sentence lines.
+        
+        Lines are tokenized in batches with the processor's loaded Punkt model.
+        
+        Args:
+            lines: Input lines, optionally prefixed with 'speaker\t'
+            default_speaker: Default speaker name for unattributed text
+            
+        Yields:
+            'speaker\tsentence\n' lines
+        """
+        return _tokenize_lines(self.tokenizer, lines, default_speaker)
+    
     def process_transcript(self, 
                          input_file: str,
                          output_file: str,
@@ -115,23 +345,7 @@ class EPUBTranscriptProcessor:
             with open(input_file, 'r', encoding=encoding) as f_in, \
                  open(output_file, 'w', encoding=encoding) as f_out:
                 
-                for line in f_in:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Extract speaker if present, otherwise use default
-                    if '\t' in line:
-                        speaker, text = line.split('\t', 1)
-                    else:
-                        speaker = default_speaker
-                        text = line
-                    
-                    # Tokenize and write sentences
-                    for sentence in sent_tokenize(text):
-                        sentence = sentence.strip()
-                        if sentence:
-                            f_out.write(f'{speaker}\t{sentence}\n')
+                f_out.writelines(self.tokenize_lines(f_in, default_speaker))
             
             self.logger.info(f"Processed transcript: {input_file}")
             return True
@@ -192,24 +406,103 @@ class EPUBTranscriptProcessor:
             self.logger.error(f"Failed to process EPUB to transcripts: {e}")
             return False
 
-def main():
+    def stream_epub_to_transcripts(self,
+                                   epub_path: str,
+                                   output_dir: str,
+                                   default_speaker: str = "Speaker1",
+                                   workers: int = 1,
+                                   parser: str = 'lxml',
+                                   chapter_dir: Optional[str] = None) -> bool:
+        """
+        Process an EPUB into transcripts without intermediate chapter files.
+        
+        Chapters are parsed and sentence-tokenized in memory by a process
+        pool, each worker loading the Punkt model once, and written in spine
+        order. Output file names match process_epub_to_transcripts.
+        
+        Args:
+            epub_path: Path to input EPUB file
+            output_dir: Directory for final transcript files
+            default_speaker: Default speaker name for unattributed text
+            workers: Number of processes parsing and tokenizing chapters
+            parser: BeautifulSoup parser backend
+            chapter_dir: If given, also write the extracted chapter text here
+            
+        Returns:
+            bool: True if at least one chapter was processed, False otherwise;
+            chapters that fail are logged and skipped
+        """
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            chapter_count = 0
+            success_count = 0
+            
+            chapters = self._map_chapters(epub_path, workers, _chapter_transcript, _resolve_parser(parser),
+                                          default_speaker, chapter_dir is not None)
+            for chapter_title, (text, lines, _) in chapters:
+                chapter_count += 1
+                file_name = f'{os.path.basename(chapter_title)}.txt'
+                
+                try:
+                    if chapter_dir:
+                        text_path = os.path.join(chapter_dir, f'{chapter_title}.txt')
+                        os.makedirs(os.path.dirname(text_path), exist_ok=True)
+                        with open(text_path, 'w', encoding='utf-8') as f:
+                            f.write(text)
+                    
+                    with open(os.path.join(output_dir, file_name), 'w', encoding='utf-8') as f_out:
+                        f_out.writelines(lines)
+                except OSError as e:
+                    self.logger.error(f"Failed to write chapter {chapter_title}: {e}")
+                    continue
+                success_count += 1
+            
+            if not chapter_count:
+                self.logger.error("No chapters extracted from EPUB")
+                return False
+            
+            self.logger.info(
+                f"Processed {success_count}/{chapter_count} chapters successfully"
+            )
+            return success_count > 0
+            
+        except Exception as e:
+            self.logger.error(f"Failed to process EPUB to transcripts: {e}")
+            return False
+
+def main(argv: Optional[List[str]] = None) -> int:
     """Command-line interface for the processor."""
-    if len(sys.argv) != 4:
-        print("Usage: script.py <epub_file> <work_dir> <output_dir>")
-        sys.exit(1)
-    
-    epub_path = sys.argv[1]
-    work_dir = sys.argv[2]
-    output_dir = sys.argv[3]
+    parser = argparse.ArgumentParser(description="Split an EPUB into speaker-attributed sentence transcripts.")
+    parser.add_argument('epub_file')
+    parser.add_argument('work_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--stream', action='store_true',
+                        help="Parse chapters in parallel and tokenize in memory, without intermediate files")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Chapter parsing and tokenizing processes in --stream mode")
+    parser.add_argument('--parser', default='lxml',
+                        help="BeautifulSoup parser in --stream mode (default: lxml)")
+    parser.add_argument('--keep-chapters', action='store_true',
+                        help="In --stream mode, also write chapter text to <work_dir>/chapters")
+    args = parser.parse_args(argv)
     
     processor = EPUBTranscriptProcessor()
-    success = processor.process_epub_to_transcripts(
-        epub_path=epub_path,
-        work_dir=work_dir,
-        output_dir=output_dir
-    )
+    if args.stream:
+        success = processor.stream_epub_to_transcripts(
+            epub_path=args.epub_file,
+            output_dir=args.output_dir,
+            workers=args.workers,
+            parser=args.parser,
+            chapter_dir=os.path.join(args.work_dir, 'chapters') if args.keep_chapters else None
+        )
+    else:
+        success = processor.process_epub_to_transcripts(
+            epub_path=args.epub_file,
+            work_dir=args.work_dir,
+            output_dir=args.output_dir
+        )
     
-    sys.exit(0 if success else 1)
+    return 0 if success else 1
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Disk-backed cache of synthesized audio.
+
+Entries are keyed by the normalized text, the checkpoint's content hash,
+the vocoder and the model config's audio section. Changing any of them
+misses the cache, while renaming or copying a checkpoint still hits it.
+Each entry is the engine's float32 waveform in ``<root>/<k[:2]>/<k>.npy``.
+Callers that write it to WAV get exactly what a fresh synthesis would
+have produced.
+
+Writes go through a unique temporary file and ``os.replace``, so
+processes sharing the directory only ever see whole entries. A hit
+touches the file's mtime, and when the cache grows past max_bytes the
+least recently used entries are deleted until it is back under the
+limit.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pipeline import FileHasher
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text for keying: NFKC, whitespace collapsed, ends trimmed."""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+class SynthesisCache:
+    """Content-addressed, size-bounded LRU cache of waveforms, safe to share between processes."""
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            root: Cache directory, created if missing
+            max_bytes: Size above which least recently used entries are evicted
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hasher = FileHasher({})
+        self._config_ids: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_written = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+        self._size = self._scan_size()
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def entries(self) -> List[Tuple[str, int, int]]:
+        """(path, size, mtime_ns) of every entry."""
+        entries = []
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_dir):
+                continue
+            with os.scandir(shard_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.npy'):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+    def _audio_config_id(self, config_path: str) -> str:
+        """Hash of a model config's audio section, or of the whole file if it has none."""
+        stat = os.stat(config_path)
+        cached = self._config_ids.get(config_path)
+        if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            return cached[1]
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                audio = json.load(f).get('audio')
+        except ValueError:
+            audio = None
+        if audio is None:
+            config_id = self.hasher(config_path)
+        else:
+            config_id = hashlib.sha1(json.dumps(audio, sort_keys=True).encode('utf-8')).hexdigest()
+        self._config_ids[config_path] = ((stat.st_size, stat.st_mtime_ns), config_id)
+        return config_id
+
+    def key(self, text: str, model_path: str, config_path: str, vocoder: Optional[str] = None) -> str:
+        """Cache key of one synthesis."""
+        parts = [normalize_text(text), self.hasher(model_path), vocoder or '', self._audio_config_id(config_path)]
+        return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + '.npy')
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Cached waveform for key, or None."""
+        path = self._path(key)
+        try:
+            wav = np.load(path, allow_pickle=False)
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            # Missing, evicted by another process, or unreadable
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += wav.nbytes
+        return wav
+
+    def put(self, key: str, wav) -> None:
+        """Store a waveform atomically, then evict if the cache is over its limit."""
+        wav = np.ascontiguousarray(np.asarray(wav, dtype=np.float32).reshape(-1))
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, wav, allow_pickle=False)
+        size = os.path.getsize(tmp_path)
+        try:
+            # Another worker may have stored the same key meanwhile
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.bytes_written += size
+            self._size += size - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """
+        Delete least recently used entries until the cache is at most target_bytes.
+
+        Defaults to 90% of max_bytes so eviction does not run on every put. Other
+        processes may be adding entries at the same time, so the size is rescanned first.
+
+        Returns:
+            Number of entries deleted
+        """
+        target = int(self.max_bytes * 0.9) if target_bytes is None else target_bytes
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        size = sum(e[1] for e in entries)
+        removed = 0
+        for path, entry_size, _ in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        with self._lock:
+            self._size = size
+            self.evictions += removed
+        return removed
+
+    def cache_info(self) -> Dict[str, object]:
+        """Return hit/miss counters, hit rate, bytes saved and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'bytes_written': self.bytes_written,
+                'evictions': self.evictions,
+                'size': self._size,
+                'max_size': self.max_bytes,
+            }
+
+
+class CachedEngine:
+    """Wraps a synthesis engine so texts already in the cache are not synthesized again."""
+
+    def __init__(self, engine, cache: SynthesisCache, model_path: str, config_path: str,
+                 vocoder: Optional[str] = None):
+        self.engine = engine
+        self.cache = cache
+        self.model_path = model_path
+        self.config_path = config_path
+        self.vocoder = vocoder
+
+    @property
+    def sample_rate(self) -> int:
+        return self.engine.sample_rate
+
+    def synthesize(self, text: str):
+        return self.synthesize_batch([text])[0]
+
+    def synthesize_batch(self, texts: List[str]) -> list:
+        """Waveforms for texts, synthesizing only the cache misses, as one batch."""
+        keys = [self.cache.key(text, self.model_path, self.config_path, self.vocoder) for text in texts]
+        wavs = [self.cache.get(key) for key in keys]
+        missing = [i for i, wav in enumerate(wavs) if wav is None]
+        if missing:
+            batch = [texts[i] for i in missing]
+            if hasattr(self.engine, 'synthesize_batch'):
+                fresh = self.engine.synthesize_batch(batch)
+            else:
+                fresh = [self.engine.synthesize(text) for text in batch]
+            for i, wav in zip(missing, fresh):
+                self.cache.put(keys[i], wav)
+                wavs[i] = wav
+        return wavs
+
+    def save_wav(self, wav, path: str) -> None:
+        self.engine.save_wav(wav, path)
+
+
+def format_info(info: Dict[str, object]) -> str:
+    return (f'{info["hits"]} hits, {info["misses"]} misses ({info["hit_rate"]:.0%} hit rate), '
+            f'{info["bytes_saved"] / 2 ** 20:.1f} MiB saved, {info["size"] / 2 ** 20:.1f}/'
+            f'{info["max_size"] / 2 ** 20:.0f} MiB used, {info["evictions"]} evicted')
+
+
+def parse_size(text: str) -> int:
+    """'500M', '2G', '1048576' -> bytes."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', text, re.IGNORECASE)
+    if match is None:
+        raise argparse.ArgumentTypeError(f'invalid size: {text!r}')
+    return int(float(match.group(1)) * 1024 ** ' KMGT'.index(match.group(2).upper() or ' '))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Inspect or trim a synthesis cache.')
+    parser.add_argument('cache_dir')
+    parser.add_argument('--max-size', type=parse_size, default=DEFAULT_MAX_BYTES,
+                        help='size limit, e.g. 500M or 2G (default: 2G)')
+    parser.add_argument('--prune', action='store_true', help='evict down to --max-size now')
+    args = parser.parse_args(argv)
+
+    cache = SynthesisCache(args.cache_dir, args.max_size)
+    if args.prune:
+        removed = cache.evict(args.max_size)
+        print(f'[+] Evicted {removed} entries')
+    entries = cache.entries()
+    print(f'[+] {args.cache_dir}: {len(entries)} entries, {sum(e[1] for e in entries) / 2 ** 20:.1f} MiB '
+          f'(limit {args.max_size / 2 ** 20:.0f} MiB)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
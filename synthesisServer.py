@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+"""
+Local synthesis server that keeps TTS models loaded.
+
+test.sh used to start a fresh ``tts`` process for every checkpoint. Each
+one reloaded Python, the Overflow model and the vocoder. The server
+instead loads each (checkpoint, config, vocoder) once, keeps the most
+recently used ones in memory, and answers requests over HTTP on
+localhost. Models load on background threads, so one model can
+synthesize while others load. Requests for the same model that arrive
+together are run as one batch: identical texts are synthesized only once
+and the rest go through the engine's synthesize_batch together, which
+for Coqui checkpoints gives the same audio as the tts CLI. Every
+response reports its latency, split into queue, load and synthesis time.
+With ``--cache-dir`` waveforms are kept in a synthesisCache shared with
+other processes, so a text already synthesized by the same checkpoint
+and vocoder is only written out again.
+
+``client`` mode replaces the bash checkpoint loop. It sends one request
+per (learning rate, checkpoint) and writes the same
+``<lr>_<checkpoint>.wav`` files, starting the server first if needed.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5391
+DEFAULT_ENGINE = 'synthesisServer:CoquiEngine'
+DEFAULT_VOCODER = 'vocoder_models/en/ljspeech/hifigan_v2'
+
+# (model_path, config_path, vocoder_name)
+ModelKey = Tuple[str, str, Optional[str]]
+
+
+class CoquiEngine:
+    """One TTS checkpoint loaded through Coqui's Synthesizer, as the tts CLI does; vocoders are shared."""
+
+    # (vocoder_name, use_cuda) -> (model, config, audio processor), loaded once per process
+    _vocoders: Dict[Tuple[str, bool], tuple] = {}
+    # Engines load on several threads; the first one downloads and loads a vocoder, the rest wait
+    _vocoders_lock = threading.Lock()
+
+    def __init__(self, model_path: str, config_path: str, vocoder_name: Optional[str] = None,
+                 use_cuda: bool = False):
+        from TTS.utils.synthesizer import Synthesizer
+
+        self.synthesizer = Synthesizer(tts_checkpoint=model_path, tts_config_path=config_path, use_cuda=use_cuda)
+        if not vocoder_name:
+            return
+        with self._vocoders_lock:
+            vocoder = self._vocoders.get((vocoder_name, use_cuda))
+            if vocoder is None:
+                from TTS.utils.manage import ModelManager
+                vocoder_path, vocoder_config, _ = ModelManager(progress_bar=False).download_model(vocoder_name)
+                self.synthesizer._load_vocoder(vocoder_path, vocoder_config, use_cuda)
+                vocoder = (self.synthesizer.vocoder_model, self.synthesizer.vocoder_config,
+                           self.synthesizer.vocoder_ap)
+                self._vocoders[(vocoder_name, use_cuda)] = vocoder
+                return
+        (self.synthesizer.vocoder_model, self.synthesizer.vocoder_config,
+         self.synthesizer.vocoder_ap) = vocoder
+        # _load_vocoder would also switch the output to the vocoder's sample rate
+        self.synthesizer.output_sample_rate = vocoder[1].audio['sample_rate']
+
+    @property
+    def sample_rate(self) -> int:
+        return self.synthesizer.output_sample_rate
+
+    def synthesize(self, text: str):
+        return self.synthesizer.tts(text)
+
+    def synthesize_batch(self, texts: List[str]) -> list:
+        """Waveforms for texts, each exactly as Synthesizer.tts, and so the tts CLI, produces it."""
+        return [self.synthesizer.tts(text) for text in texts]
+
+    def synthesize_padded(self, texts: List[str]) -> list:
+        """
+        Waveforms for a batch of texts: one padded model pass and one padded vocoder pass.
+
+        Faster than synthesize_batch, but texts are not split into sentences and
+        padding touches the last samples, so the audio is close to what
+        Synthesizer.tts produces rather than the same. Meant for comparing checkpoints.
+        """
+        import numpy as np
+        import torch
+
+        model = self.synthesizer.tts_model
+
+        ids = [model.tokenizer.text_to_ids(text) for text in texts]
+        x = torch.zeros(len(ids), max(len(seq) for seq in ids), dtype=torch.long)
+        for i, seq in enumerate(ids):
+            x[i, :len(seq)] = torch.as_tensor(seq, dtype=torch.long)
+        x_lengths = torch.as_tensor([len(seq) for seq in ids], dtype=torch.long)
+        with torch.inference_mode():
+            outputs = model.inference(x, aux_input={'x_lengths': x_lengths})
+        mels = outputs['model_outputs'].detach().cpu().numpy()
+        lengths = outputs.get('model_outputs_len')
+        lengths = [mels.shape[1]] * len(texts) if lengths is None else [int(n) for n in lengths]
+
+        ap = model.ap
+        if self.synthesizer.vocoder_model is None:
+            return self._trim([np.asarray(ap.inv_melspectrogram(mel[:n].T)) for mel, n in zip(mels, lengths)])
+
+        # Same mel conversion as Synthesizer.tts, then the whole batch through the vocoder
+        from TTS.vocoder.utils.generic_utils import interpolate_vocoder_input
+        vocoder_ap = self.synthesizer.vocoder_ap
+        scale = [1, self.synthesizer.vocoder_config['audio']['sample_rate'] / ap.sample_rate]
+        inputs = []
+        for mel, n in zip(mels, lengths):
+            vocoder_input = vocoder_ap.normalize(ap.denormalize(mel[:n].T))
+            if scale[1] != 1:
+                vocoder_input = interpolate_vocoder_input(scale, vocoder_input).squeeze(0).numpy()
+            inputs.append(vocoder_input)
+        frames = max(v.shape[1] for v in inputs)
+        batch = np.stack([np.pad(v, ((0, 0), (0, frames - v.shape[1])), mode='edge') for v in inputs])
+        with torch.inference_mode():
+            waves = self.synthesizer.vocoder_model.inference(torch.as_tensor(batch, dtype=torch.float32))
+        waves = waves.detach().cpu().numpy().reshape(len(inputs), -1)
+        hop_length = vocoder_ap.hop_length
+        return self._trim([wave_[:v.shape[1] * hop_length] for wave_, v in zip(waves, inputs)])
+
+    def _trim(self, waves: list) -> list:
+        """Trim leading and trailing silence from each waveform, as Synthesizer.tts does."""
+        audio = self.synthesizer.tts_config.audio
+        if not ('do_trim_silence' in audio and audio['do_trim_silence']):
+            return waves
+        from TTS.tts.utils.synthesis import trim_silence
+        return [trim_silence(wave_, self.synthesizer.tts_model.ap) for wave_ in waves]
+
+    def save_wav(self, wav, path: str) -> None:
+        self.synthesizer.save_wav(wav, path)
+
+
+def load_engine_factory(spec: str) -> Callable[..., object]:
+    """Resolve a 'module:attribute' engine spec, e.g. the default 'synthesisServer:CoquiEngine'."""
+    module_name, _, attribute = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class _Job:
+    __slots__ = ('text', 'out_path', 'future', 'submitted')
+
+    def __init__(self, text: str, out_path: Optional[str]):
+        self.text = text
+        self.out_path = out_path
+        self.future: Future = Future()
+        self.submitted = time.perf_counter()
+
+
+class SynthesisServer:
+    """Batching scheduler in front of a small LRU cache of loaded engines."""
+
+    def __init__(self,
+                 engine_factory: Callable[..., object],
+                 max_models: int = 4,
+                 max_batch: int = 16,
+                 batch_window: float = 0.05,
+                 use_cuda: bool = False,
+                 cache=None,
+                 log_level: int = logging.INFO):
+        """
+        Args:
+            engine_factory: Called as engine_factory(model_path, config_path, vocoder_name, use_cuda);
+                the result needs synthesize(text) and save_wav(wav, path)
+            max_models: Engines kept loaded or loading; the least recently used idle one is dropped first
+            max_batch: Most requests run back to back on one model before other models get a turn
+            batch_window: Seconds to wait after the first request for more requests to the same model
+            use_cuda: Passed to the engine factory
+            cache: Optional synthesisCache.SynthesisCache consulted before synthesizing
+            log_level: Logging level to use
+        """
+        self.engine_factory = engine_factory
+        self.max_models = max_models
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.use_cuda = use_cuda
+        self.cache = cache
+        self.logger = self._setup_logging(log_level)
+        self.engines: 'OrderedDict[ModelKey, object]' = OrderedDict()
+        # Models with waiting jobs, oldest first
+        self.pending: 'OrderedDict[ModelKey, List[_Job]]' = OrderedDict()
+        # Engines load on their own threads, so one model synthesizes while others load
+        self.loader = ThreadPoolExecutor(max_workers=max_models, thread_name_prefix='load')
+        self.loading = set()
+        self.load_seconds: Dict[ModelKey, float] = {}
+        self.load_errors: Dict[ModelKey, Exception] = {}
+        # Model the scheduler is synthesizing with, never unloaded meanwhile
+        self.active: Optional[ModelKey] = None
+        self.condition = threading.Condition()
+        self.stats = {'requests': 0, 'batches': 0, 'loads': 0, 'failures': 0}
+        self.last_activity = time.monotonic()
+        threading.Thread(target=self._run, name='synthesis', daemon=True).start()
+
+    @staticmethod
+    def _setup_logging(log_level: int) -> logging.Logger:
+        """Configure logging."""
+        logging.basicConfig(
+            level=log_level,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        return logging.getLogger(__name__)
+
+    def submit(self, text: str, model_path: str, config_path: str, vocoder_name: Optional[str] = None,
+               out_path: Optional[str] = None) -> Future:
+        """
+        Queue one synthesis request.
+
+        The future resolves to a dict with the request's latency in milliseconds
+        (queue_ms, load_ms, synth_ms, total_ms), batch_size, cached and out_path,
+        or to the WAV bytes under 'wav' when no out_path was given.
+        """
+        job = _Job(text, out_path)
+        key = (model_path, config_path, vocoder_name or None)
+        with self.condition:
+            self.pending.setdefault(key, []).append(job)
+            self.stats['requests'] += 1
+            self.last_activity = time.monotonic()
+            self._start_loads()
+            self.condition.notify_all()
+        return job.future
+
+    def status(self) -> Dict[str, object]:
+        with self.condition:
+            status = {'models': [list(key) for key in list(self.engines)],
+                      'loading': [list(key) for key in self.loading],
+                      'queued': sum(len(jobs) for jobs in self.pending.values()),
+                      **self.stats}
+        if self.cache is not None:
+            status['cache'] = self.cache.cache_info()
+        return status
+
+    def _start_loads(self) -> None:
+        """Start loading the engine of every pending model, within max_models. Call with the condition held."""
+        for key in self.pending:
+            if key in self.engines or key in self.loading or key in self.load_errors:
+                continue
+            while len(self.engines) + len(self.loading) >= self.max_models:
+                # Only drop engines that nothing is waiting for or running on
+                idle = next((k for k in self.engines if k not in self.pending and k != self.active), None)
+                if idle is None:
+                    return
+                del self.engines[idle]
+                self.load_seconds.pop(idle, None)
+                self.logger.info(f'Unloaded {idle[0]}')
+            self.loading.add(key)
+            self.loader.submit(self._load, key)
+
+    def _load(self, key: ModelKey) -> None:
+        """Load one engine on a loader thread and hand it to the scheduler."""
+        start = time.perf_counter()
+        try:
+            engine = self.engine_factory(key[0], key[1], key[2], self.use_cuda)
+        except Exception as e:
+            self.logger.error(f'Failed to load {key[0]}: {type(e).__name__}: {e}')
+            with self.condition:
+                self.loading.discard(key)
+                self.load_errors[key] = e
+                self.condition.notify_all()
+            return
+        load_seconds = time.perf_counter() - start
+        self.logger.info(f'Loaded {key[0]} in {load_seconds:.1f}s')
+        with self.condition:
+            self.loading.discard(key)
+            self.engines[key] = engine
+            self.load_seconds[key] = load_seconds
+            self.stats['loads'] += 1
+            self.condition.notify_all()
+
+    def _next_batch(self) -> Tuple[ModelKey, List[_Job], Optional[object], float, Optional[Exception]]:
+        """
+        Oldest batch whose model is loaded or failed to load.
+
+        Returns:
+            (key, jobs, engine, seconds spent loading it for this batch (0 when it was resident),
+            load error)
+        """
+        with self.condition:
+            while True:
+                self._start_loads()
+                key = next((k for k in self.pending if k in self.engines or k in self.load_errors), None)
+                if key is not None:
+                    break
+                self.condition.wait()
+            jobs = self.pending[key]
+            error = self.load_errors.pop(key, None)
+            if error is not None:
+                del self.pending[key]
+                return key, jobs, None, 0.0, error
+            # Give concurrent requests for this model a moment to arrive
+            deadline = jobs[0].submitted + self.batch_window
+            while len(jobs) < self.max_batch and time.perf_counter() < deadline:
+                self.condition.wait(deadline - time.perf_counter())
+            batch, rest = jobs[:self.max_batch], jobs[self.max_batch:]
+            del self.pending[key]
+            if rest:
+                # Requeue the overflow behind the other models
+                self.pending[key] = rest
+            self.engines.move_to_end(key)
+            self.active = key
+            return key, batch, self.engines[key], self.load_seconds.pop(key, 0.0), None
+
+    def _run(self) -> None:
+        while True:
+            key, jobs, engine, load_seconds, error = self._next_batch()
+            try:
+                self._run_batch(key, jobs, engine, load_seconds, error)
+            except Exception as e:
+                # The scheduler must outlive any one batch: fail what it left unanswered
+                self.logger.error(f'Batch for {key[0]} failed: {type(e).__name__}: {e}')
+                for job in jobs:
+                    if not job.future.done():
+                        self.stats['failures'] += 1
+                        job.future.set_exception(e)
+            finally:
+                with self.condition:
+                    self.active = None
+                    self.last_activity = time.monotonic()
+
+    def _run_batch(self, key: ModelKey, jobs: List[_Job], engine, load_seconds: float,
+                   error: Optional[Exception]) -> None:
+        """Synthesize one batch and resolve its jobs' futures."""
+        batch_start = time.perf_counter()
+        self.stats['batches'] += 1
+        if error is not None:
+            self.stats['failures'] += len(jobs)
+            for job in jobs:
+                job.future.set_exception(error)
+            return
+
+        # Identical texts in a batch are synthesized once
+        by_text: Dict[str, List[_Job]] = OrderedDict()
+        for job in jobs:
+            by_text.setdefault(job.text, []).append(job)
+        start = time.perf_counter()
+        synthesized = self._synthesize_batch(engine, key, list(by_text))
+        synth_seconds = time.perf_counter() - start
+        for (text, text_jobs), (wav, cached, error) in zip(by_text.items(), synthesized):
+            try:
+                if error is not None:
+                    raise error
+                results = [self._write(engine, wav, job) for job in text_jobs]
+            except Exception as e:
+                self.logger.error(f'Failed to synthesize {text[:40]!r}: {type(e).__name__}: {e}')
+                self.stats['failures'] += len(text_jobs)
+                for job in text_jobs:
+                    job.future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            for job, result in zip(text_jobs, results):
+                result.update(queue_ms=(batch_start - job.submitted) * 1000,
+                              load_ms=load_seconds * 1000,
+                              synth_ms=synth_seconds * 1000,
+                              total_ms=(done - job.submitted) * 1000,
+                              batch_size=len(jobs),
+                              cached=cached)
+                self.logger.info(f'{os.path.basename(key[0])}: {len(text)} chars, batch {len(jobs)}, '
+                                 f'{"cached, " if cached else ""}queue {result["queue_ms"]:.0f} ms, load {result["load_ms"]:.0f} ms, '
+                                 f'synth {result["synth_ms"]:.0f} ms, total {result["total_ms"]:.0f} ms')
+                job.future.set_result(result)
+
+    def _synthesize_batch(self, engine, key: ModelKey,
+                          texts: List[str]) -> List[Tuple[object, bool, Optional[Exception]]]:
+        """(waveform, whether it came from the cache, error) per text; the cache misses run as one batch."""
+        results: List[Optional[Tuple[object, bool, Optional[Exception]]]] = [None] * len(texts)
+        cache_keys: List[Optional[str]] = [None] * len(texts)
+        if self.cache is not None:
+            for i, text in enumerate(texts):
+                try:
+                    # Hashes the checkpoint, which may have been moved or deleted since it loaded
+                    cache_keys[i] = self.cache.key(text, *key)
+                except OSError as e:
+                    self.logger.warning(f'Not caching {text[:40]!r}: {e}')
+                    continue
+                wav = self.cache.get(cache_keys[i])
+                if wav is not None:
+                    results[i] = (wav, True, None)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        batch = [texts[i] for i in missing]
+        try:
+            if hasattr(engine, 'synthesize_batch'):
+                fresh = [(wav, None) for wav in engine.synthesize_batch(batch)]
+            else:
+                fresh = [(engine.synthesize(text), None) for text in batch]
+        except Exception as e:
+            if len(batch) == 1:
+                fresh = [(None, e)]
+            else:
+                # Retry one at a time so only the texts that fail are reported
+                self.logger.warning(f'Batch of {len(batch)} failed ({type(e).__name__}: {e}), retrying one by one')
+                fresh = []
+                for text in batch:
+                    try:
+                        fresh.append((engine.synthesize(text), None))
+                    except Exception as text_error:
+                        fresh.append((None, text_error))
+        for i, (wav, error) in zip(missing, fresh):
+            if error is None and cache_keys[i] is not None:
+                try:
+                    self.cache.put(cache_keys[i], wav)
+                except OSError as e:
+                    self.logger.warning(f'Could not cache {texts[i][:40]!r}: {e}')
+            results[i] = (wav, False, error)
+        return results
+
+    @staticmethod
+    def _write(engine, wav, job: _Job) -> Dict[str, object]:
+        if job.out_path is None:
+            fd, tmp_path = tempfile.mkstemp(suffix='.wav')
+            os.close(fd)
+            try:
+                engine.save_wav(wav, tmp_path)
+                with open(tmp_path, 'rb') as f:
+                    return {'wav': f.read()}
+            finally:
+                os.remove(tmp_path)
+        # Write next to the target and rename, so a file at out_path is always complete
+        directory = os.path.dirname(os.path.abspath(job.out_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{job.out_path}.tmp.wav'
+        engine.save_wav(wav, tmp_path)
+        os.replace(tmp_path, job.out_path)
+        return {'out_path': job.out_path}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """POST /synthesize, GET /health, POST /shutdown."""
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, object]):
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, self.server.synthesis.status())
+        else:
+            self._send_json(404, {'error': f'unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path == '/shutdown':
+            self._send_json(200, {'stopping': True})
+            threading.Thread(target=self.server.shutdown).start()
+            return
+        if self.path != '/synthesize':
+            self._send_json(404, {'error': f'unknown path {self.path}'})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            future = self.server.synthesis.submit(request['text'], request['model_path'], request['config_path'],
+                                                  request.get('vocoder_name'), request.get('out_path'))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f'bad request: {type(e).__name__}: {e}'})
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            self._send_json(500, {'error': f'{type(e).__name__}: {e}'})
+            return
+        wav = result.pop('wav', None)
+        if wav is None:
+            self._send_json(200, result)
+        else:
+            self._send(200, wav, 'audio/wav', {'X-Synthesis-Latency': json.dumps(result)})
+
+    def log_message(self, format, *args):
+        # Requests are logged with their latency by the scheduler
+        pass
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, engine: str = DEFAULT_ENGINE,
+          idle_timeout: Optional[float] = None, **server_args) -> None:
+    """Run the HTTP server until /shutdown, Ctrl-C, or idle_timeout seconds without requests."""
+    synthesis = SynthesisServer(load_engine_factory(engine), **server_args)
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.daemon_threads = True
+    httpd.synthesis = synthesis
+
+    if idle_timeout:
+        def watch_idle():
+            while True:
+                time.sleep(min(idle_timeout, 5.0))
+                with synthesis.condition:
+                    idle = not synthesis.pending and time.monotonic() - synthesis.last_activity > idle_timeout
+                if idle:
+                    synthesis.logger.info(f'Idle for {idle_timeout:.0f}s, stopping')
+                    httpd.shutdown()
+                    return
+        threading.Thread(target=watch_idle, daemon=True).start()
+
+    synthesis.logger.info(f'Serving on http://{host}:{port}')
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        if synthesis.cache is not None:
+            from synthesisCache import format_info
+            synthesis.logger.info(f'Synthesis cache: {format_info(synthesis.cache.cache_info())}')
+
+
+def _call(url: str, path: str, payload: Optional[Dict[str, object]] = None, timeout: float = 600.0):
+    data = None if payload is None else json.dumps(payload).encode('utf-8')
+    request = urllib.request.Request(url + path, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.loads(e.read()).get('error', str(e))) from None
+
+
+def server_alive(url: str) -> bool:
+    try:
+        _call(url, '/health', timeout=2.0)
+        return True
+    except (OSError, RuntimeError, ValueError):
+        return False
+
+
+def ensure_server(host: str, port: int, engine: str, serve_args: List[str], startup_timeout: float = 60.0,
+                  log_path: Optional[str] = None) -> None:
+    """Start a detached server on host:port unless one already answers; it outlives the client."""
+    url = f'http://{host}:{port}'
+    if server_alive(url):
+        return
+    log_file = open(log_path or os.devnull, 'ab')
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), '--host', host, '--port', str(port),
+                      '--engine', engine, 'serve'] + serve_args,
+                     stdout=log_file, stderr=log_file, stdin=subprocess.DEVNULL, start_new_session=True)
+    log_file.close()
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if server_alive(url):
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f'synthesis server did not start on {url}')
+
+
+def checkpoint_jobs(model_base_dir: str, learning_rates: List[str], checkpoints: List[str],
+                    output_dir: str) -> List[Tuple[str, str, str, str, str]]:
+    """(lr, checkpoint, model_path, config_path, out_path) per pair, with test.sh's path layout."""
+    jobs = []
+    for lr in learning_rates:
+        for checkpoint in checkpoints:
+            jobs.append((lr, checkpoint,
+                         f'{model_base_dir}{lr}/checkpoint_{checkpoint}.pth',
+                         f'{model_base_dir}{lr}/config.json',
+                         os.path.join(output_dir, f'{lr}_{checkpoint}.wav')))
+    return jobs
+
+
+def run_client(args: argparse.Namespace) -> int:
+    url = f'http://{args.host}:{args.port}'
+    os.makedirs(args.output_dir, exist_ok=True)
+    todo = []
+    failures = 0
+    for lr, checkpoint, model_path, config_path, out_path in checkpoint_jobs(
+            args.model_base_dir, args.learning_rates, args.checkpoints, args.output_dir):
+        if os.path.exists(out_path):
+            print(f'[+] Output already exists: {out_path}')
+        elif not os.path.isfile(model_path):
+            print(f'[-] Model not found: {model_path}', file=sys.stderr)
+            failures += 1
+        elif not os.path.isfile(config_path):
+            print(f'[-] Config not found: {config_path}', file=sys.stderr)
+            failures += 1
+        else:
+            todo.append((lr, checkpoint, model_path, config_path, out_path))
+    if not todo:
+        return 1 if failures else 0
+
+    if args.spawn:
+        serve_args = ['--idle-timeout', str(args.idle_timeout), '--max-models', str(args.max_models)]
+        if args.cache_dir:
+            serve_args += ['--cache-dir', args.cache_dir, '--cache-size', str(args.cache_size)]
+        ensure_server(args.host, args.port, args.engine, serve_args, log_path=args.server_log)
+
+    def send(job):
+        lr, checkpoint, model_path, config_path, out_path = job
+        payload = {'text': args.text, 'model_path': os.path.abspath(model_path),
+                   'config_path': os.path.abspath(config_path), 'vocoder_name': args.vocoder_name,
+                   'out_path': os.path.abspath(out_path)}
+        return _call(url, '/synthesize', payload)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [(job, executor.submit(send, job)) for job in todo]
+        for (lr, checkpoint, _, _, out_path), future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f'[-] Failed to generate TTS for LR={lr}, Checkpoint={checkpoint}: {e}', file=sys.stderr)
+                failures += 1
+                continue
+            print(f'[+] LR={lr}, Checkpoint={checkpoint} -> {out_path} '
+                  f'(queue {result["queue_ms"]:.0f} ms, load {result["load_ms"]:.0f} ms, '
+                  f'synth {result["synth_ms"]:.0f} ms, total {result["total_ms"]:.0f} ms, '
+                  f'batch {result["batch_size"]}{", cached" if result.get("cached") else ""})')
+    print(f'[+] {len(todo) - failures}/{len(todo)} generated in {time.perf_counter() - start:.1f}s')
+    return 1 if failures else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Keep TTS models loaded and synthesize over local HTTP.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--engine', default=DEFAULT_ENGINE,
+                        help='engine factory as module:attribute (default: %(default)s)')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='run the server in the foreground')
+    serve_parser.add_argument('--max-models', type=int, default=4, help='checkpoints kept loaded at once')
+    serve_parser.add_argument('--max-batch', type=int, default=16)
+    serve_parser.add_argument('--batch-window', type=float, default=0.05,
+                              help='seconds to wait for more requests to the same model')
+    serve_parser.add_argument('--use-cuda', action='store_true')
+    serve_parser.add_argument('--idle-timeout', type=float, default=None,
+                              help='exit after this many seconds without requests')
+    serve_parser.add_argument('--cache-dir', default=None, help='synthesis cache shared with other processes')
+    serve_parser.add_argument('--cache-size', default='2G', help='cache size limit, e.g. 500M or 2G')
+
+    client_parser = subparsers.add_parser('client', help='synthesize the test phrase for every checkpoint')
+    client_parser.add_argument('--text', default='The quick brown fox jumps over the lazy dog.')
+    client_parser.add_argument('--vocoder-name', default=DEFAULT_VOCODER)
+    client_parser.add_argument('--output-dir', default='/tmp/overflow-tts-toolkit/audio/output/testlr')
+    client_parser.add_argument('--model-base-dir', default='/tmp/overflow-tts-toolkit/out',
+                               help='checkpoints are read from <model-base-dir><lr>/checkpoint_<n>.pth')
+    client_parser.add_argument('--learning-rates', nargs='+', default=['1e-3'])
+    client_parser.add_argument('--checkpoints', nargs='+', default=['55500', '56000', '56500'])
+    client_parser.add_argument('--jobs', type=int, default=4, help='requests in flight at once')
+    client_parser.add_argument('--spawn', action='store_true', help='start a server if none is running')
+    client_parser.add_argument('--idle-timeout', type=float, default=1800.0,
+                               help='idle timeout of a server started with --spawn')
+    client_parser.add_argument('--max-models', type=int, default=4,
+                               help='checkpoints a server started with --spawn keeps loaded')
+    client_parser.add_argument('--cache-dir', default=None, help='synthesis cache of a server started with --spawn')
+    client_parser.add_argument('--cache-size', default='2G', help='cache size limit of a server started with --spawn')
+    client_parser.add_argument('--server-log', default=None, help='log file of a server started with --spawn')
+
+    subparsers.add_parser('stop', help='stop a running server')
+    args = parser.parse_args(argv)
+
+    if args.mode == 'serve':
+        cache = None
+        if args.cache_dir:
+            from synthesisCache import SynthesisCache, parse_size
+            cache = SynthesisCache(args.cache_dir, parse_size(args.cache_size))
+        serve(args.host, args.port, args.engine, args.idle_timeout, max_models=args.max_models,
+              max_batch=args.max_batch, batch_window=args.batch_window, use_cuda=args.use_cuda, cache=cache)
+        return 0
+    if args.mode == 'client':
+        return run_client(args)
+    try:
+        _call(f'http://{args.host}:{args.port}', '/shutdown', {})
+    except (OSError, RuntimeError) as e:
+        print(f'[-] No server on {args.host}:{args.port}: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
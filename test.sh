@@ -16,6 +16,11 @@ readonly LOG_FILE="${SCRIPT_DIR}/tts_test_$(date +%Y%m%d_%H%M%S).log"
 : "${MODEL_BASE_DIR:="/tmp/overflow-tts-toolkit/out"}"
 : "${MAX_PARALLEL_JOBS:=4}"
 : "${FAIL_FAST:=false}"
+# Send requests to a resident synthesis server (started on demand) instead of one tts process per checkpoint
+: "${USE_SERVER:=true}"
+: "${SERVER_PORT:=5391}"
+# Waveforms already synthesized for a checkpoint are reused from here across runs
+: "${CACHE_DIR:="/tmp/overflow-tts-toolkit/synthesis_cache"}"
 
 # File extensions and paths
 readonly PTH_EXT=".pth"
@@ -69,6 +74,9 @@ handle_error() {
 # Check required commands
 check_requirements() {
     local required_commands=("tts" "parallel")
+    if [[ "$USE_SERVER" == "true" ]]; then
+        required_commands=("python3")
+    fi
     local missing_commands=()
     
     for cmd in "${required_commands[@]}"; do
@@ -156,6 +164,25 @@ main() {
     check_requirements
     setup_directories
     
+    if [[ "$USE_SERVER" == "true" ]]; then
+        # The server keeps each checkpoint and the vocoder loaded between runs
+        python3 "${SCRIPT_DIR}/synthesisServer.py" --port "$SERVER_PORT" client \
+            --text "$TEST_PHRASES" \
+            --vocoder-name "$VOCODER_NAME" \
+            --output-dir "$OUTPUT_DIR" \
+            --model-base-dir "$MODEL_BASE_DIR" \
+            --learning-rates "${LEARNING_RATES[@]}" \
+            --checkpoints "${CHECKPOINTS[@]}" \
+            --jobs "$MAX_PARALLEL_JOBS" \
+            --spawn \
+            --cache-dir "$CACHE_DIR" \
+            --server-log "${SCRIPT_DIR}/tts_server.log" 2>&1 | tee -a "$LOG_FILE"
+        log_info "TTS checkpoint testing completed"
+        log_info "Results available in: $OUTPUT_DIR"
+        log_info "Log file: $LOG_FILE"
+        return
+    fi
+
     # Create job list for parallel processing
     local job_list=()
     for lr in "${LEARNING_RATES[@]}"; do
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for Praat TextGrid files.
+
+Reads the intervals of one tier without building an object tree for the
+whole file: lines are turned into a stream of values and the intervals
+of the requested tier are yielded as (start, end, label) tuples, stopping
+as soon as that tier ends. Long and short text formats are both
+supported, in UTF-8 or UTF-16.
+
+Labels are handled like praatio's openTextgrid: doubled quotes are
+unescaped, surrounding whitespace is stripped and empty intervals are
+skipped unless asked for.
+"""
+from typing import Iterator, List, Optional, Tuple
+
+_FLAGS = ('<exists>', '<absent>')
+_NUMBER_START = frozenset('0123456789-+.')
+
+Interval = Tuple[float, float, str]
+
+
+def _open_text(path: str):
+    with open(path, 'rb') as f:
+        bom = f.read(2)
+    encoding = 'utf-16' if bom in (b'\xff\xfe', b'\xfe\xff') else 'utf-8-sig'
+    return open(path, 'r', encoding=encoding)
+
+
+def _tokens(lines) -> Iterator[object]:
+    """Yield the values of a TextGrid in file order: floats for numbers, str for quoted text."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] != '"':
+            # 'key = value' in the long format; values stand alone in the short format
+            _, equals, value = line.partition('=')
+            if not equals:
+                # Skips 'item [1]:', 'intervals [2]:', '<exists>' and the like
+                if line[0] in _NUMBER_START:
+                    yield float(line)
+                continue
+            line = value.strip()
+            if line[:1] != '"':
+                if line not in _FLAGS:
+                    yield float(line)
+                continue
+        text = line[1:]
+        if text and text.find('"') == len(text) - 1:
+            yield text[:-1]
+            continue
+        # Quoted text with escaped ("") quotes, possibly spanning lines
+        while text.count('"') % 2 == 0:
+            text += '\n' + next(lines).rstrip('\n')
+        yield text[:text.rstrip().rindex('"')].replace('""', '"')
+
+
+def _tiers(path: str):
+    """Yield (class, name, entries) per tier, where entries is a lazy iterator over raw entries."""
+    with _open_text(path) as f:
+        tokens = _tokens(f)
+        # File type, object class, xmin, xmax, tier count
+        header = [next(tokens) for _ in range(5)]
+        if header[1] != 'TextGrid':
+            raise ValueError(f'{path}: not a TextGrid')
+        for _ in range(int(header[4])):
+            tier_class, name, _, _, size = (next(tokens) for _ in range(5))
+            if tier_class == 'IntervalTier':
+                entries = ((next(tokens), next(tokens), next(tokens)) for _ in range(int(size)))
+            else:
+                entries = ((next(tokens), next(tokens)) for _ in range(int(size)))
+            yield tier_class, name, entries
+            # Drain whatever the caller did not read, to reach the next tier
+            for _ in entries:
+                pass
+
+
+def tier_names(path: str) -> List[str]:
+    """Names of all tiers, in file order."""
+    return [name for _, name, _ in _tiers(path)]
+
+
+def iter_intervals(path: str, tier: Optional[str] = None, keep_empty: bool = False) -> Iterator[Interval]:
+    """
+    Yield (start, end, label) for each interval of a tier, in file order.
+
+    Args:
+        path: TextGrid file
+        tier: Name of an interval tier (default: the first tier)
+        keep_empty: Also yield intervals whose label is empty
+    """
+    for tier_class, name, entries in _tiers(path):
+        if tier is not None and name != tier:
+            continue
+        if tier_class != 'IntervalTier':
+            raise ValueError(f'{path}: tier {name!r} is not an interval tier')
+        for start, end, label in entries:
+            label = label.strip()
+            if label or keep_empty:
+                yield start, end, label
+        return
+    if tier is not None:
+        raise ValueError(f'{path}: no tier named {tier!r}')
+
+
+def read_intervals(path: str, tier: Optional[str] = None, keep_empty: bool = False) -> List[Interval]:
+    """All intervals of a tier as a list; see iter_intervals."""
+    return list(iter_intervals(path, tier, keep_empty))
+
+
+def interval_arrays(path: str, tier: Optional[str] = None, keep_empty: bool = False):
+    """Intervals of a tier as (starts, ends) float64 NumPy arrays plus a list of labels."""
+    import numpy as np
+    starts = []
+    ends = []
+    labels = []
+    for start, end, label in iter_intervals(path, tier, keep_empty):
+        starts.append(start)
+        ends.append(end)
+        labels.append(label)
+    return np.array(starts, dtype=np.float64), np.array(ends, dtype=np.float64), labels
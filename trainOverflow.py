@@ -5,15 +5,81 @@ from trainer import Trainer, TrainerArgs
 from TTS.config.shared_configs import BaseAudioConfig
 from TTS.tts.configs.overflow_config import OverflowConfig
 from TTS.tts.configs.shared_configs import BaseDatasetConfig
-from TTS.tts.datasets import load_tts_samples
+from TTS.tts.datasets import dataset as tts_dataset
 from TTS.tts.models.overflow import Overflow
 from TTS.tts.utils.text.tokenizer import TTSTokenizer
 from TTS.utils.audio import AudioProcessor
 
+import numpy as np
 import torch
+from torch.utils.data import DataLoader
+
+from audioManifest import AudioManifest
+from bucketSampler import DurationBucketBatchSampler, sample_lengths
+from melFeatureStore import MelFeatureStore
+from phonemeCache import PackedPhonemeCache, precompute as precompute_phonemes
+from sampleTable import load_tts_samples
 
 output_path = os.path.dirname(os.path.abspath(__file__))+ "/lr/"
 
+# Training batches are filled with utterances of similar length up to this many
+# padded mel frames (batch size x longest utterance) instead of a fixed batch_size.
+# Set to None to fall back to the stock loader with config.batch_size.
+BATCH_MAX_FRAMES = 4000
+
+# Trimmed mels for every sample are computed once into this store and memory-mapped
+# during training. The store is rebuilt automatically if the audio config changes.
+MEL_STORE_PATH = os.path.join(output_path, "mel_store")
+
+# One packed phoneme cache shared by every run; entries are keyed by the phonemizer
+# settings, so runs with different settings can share it safely.
+PHONEME_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phoneme_cache")
+
+
+def phoneme_settings(tokenizer):
+    """Tokenizer settings that change the token ids produced for a text."""
+    phonemizer = tokenizer.phonemizer
+    return {
+        "phonemizer": phonemizer.name() if phonemizer is not None else None,
+        "phonemizer_version": phonemizer.version() if phonemizer is not None else None,
+        "phonemizer_language": getattr(phonemizer, "language", None),
+        "vocab": list(tokenizer.characters.vocab),
+        "cleaner": getattr(tokenizer.text_cleaner, "__name__", None),
+        "use_phonemes": tokenizer.use_phonemes,
+        "add_blank": tokenizer.add_blank,
+        "use_eos_bos": tokenizer.use_eos_bos,
+    }
+
+
+class PackedPhonemeDataset(tts_dataset.PhonemeDataset):
+    """PhonemeDataset backed by the packed phoneme cache instead of one .npy file per utterance."""
+
+    def __init__(self, samples, tokenizer, cache_path, precompute_num_workers=0):
+        self.samples = samples
+        self.tokenizer = tokenizer
+        self.cache_path = cache_path
+        self.cache = PackedPhonemeCache(cache_path, phoneme_settings(tokenizer))
+        self.precompute(precompute_num_workers)
+
+    def compute_or_load(self, file_name, text, language):
+        ids = self.cache.get(text, language)
+        if ids is None:
+            # Only reached for texts added after precompute; not written from loader workers
+            ids = np.asarray(self.tokenizer.text_to_ids(text, language=language), dtype=np.int32)
+        return ids
+
+    def precompute(self, num_workers=1):
+        precompute_phonemes(
+            self.cache,
+            [(item["text"], item["language"]) for item in self.samples],
+            lambda text, language: self.tokenizer.text_to_ids(text, language=language),
+            num_workers=num_workers,
+        )
+
+
+# TTSDataset builds its phoneme dataset from this module attribute
+tts_dataset.PhonemeDataset = PackedPhonemeDataset
+
 # init configs
 dataset_config = BaseDatasetConfig(
     formatter="ljspeech", meta_file_train="metadata.csv", path="./MyTTSDataset"
@@ -45,7 +111,7 @@ config = OverflowConfig(  # This is the config that is saved for the future use
     text_cleaner="phoneme_cleaners",
     use_phonemes=True,
     phoneme_language="en-us",
-    phoneme_cache_path=os.path.join(output_path, "phoneme_cache"),
+    phoneme_cache_path=PHONEME_CACHE_PATH,
     precompute_num_workers=8,
     mel_statistics_parameter_path=os.path.join(output_path, "lj_parameters.pt"),
     force_generate_statistics=False,
@@ -60,7 +126,35 @@ config = OverflowConfig(  # This is the config that is saved for the future use
 # INITIALIZE THE AUDIO PROCESSOR
 # Audio processor is used for feature extraction and audio I/O.
 # It mainly serves to the dataloader and the training loggers.
-ap = AudioProcessor.init_from_config(config)
+class StoredMelAudioProcessor(AudioProcessor):
+    """
+    AudioProcessor that serves precomputed mels from the feature store to the dataset.
+
+    load_wav returns the stored (num_mels, frames) mel in place of the waveform,
+    which the dataset only passes on to melspectrogram. This holds only while
+    the dataset does not also return waveforms (return_wav=False); with
+    return_wav the mels would reach the model as audio.
+    """
+
+    mel_store = None
+
+    def load_wav(self, filename, sr=None):
+        # For stored files the "waveform" handed to the dataset is the (num_mels, frames) mel view
+        if self.mel_store is not None:
+            mel = self.mel_store.get(filename)
+            if mel is not None:
+                return mel
+        return super().load_wav(filename, sr)
+
+    def melspectrogram(self, y):
+        # Waveforms are 1-D; a 2-D input already is a mel from the store
+        if y.ndim == 2:
+            return y
+        return super().melspectrogram(y)
+
+
+assert not getattr(config, "return_wav", False), "StoredMelAudioProcessor requires return_wav=False"
+ap = StoredMelAudioProcessor(verbose=True, **config.audio)
 
 # INITIALIZE THE TOKENIZER
 # Tokenizer is used to convert text to sequences of token IDs.
@@ -68,10 +162,10 @@ ap = AudioProcessor.init_from_config(config)
 tokenizer, config = TTSTokenizer.init_from_config(config)
 
 # LOAD DATA SAMPLES
-# Each sample is a list of ```[text, audio_file_path, speaker_name]```
-# You can define your custom sample loader returning the list of samples.
-# Or define your custom formatter and pass it to the `load_tts_samples`.
-# Check `TTS.tts.datasets.load_tts_samples` for more details.
+# Samples are read into a compact SampleTable; each one is a mapping with
+# the keys of Coqui's sample dicts (text, audio_file, speaker_name, ...).
+# You can define your custom formatter and pass it to the `load_tts_samples`.
+# Check `sampleTable.load_tts_samples` for more details.
 train_samples, eval_samples = load_tts_samples(
     dataset_config,
     eval_split=True,
@@ -79,11 +173,51 @@ train_samples, eval_samples = load_tts_samples(
     eval_split_size=config.eval_split_size,
 )
 
+# PRECOMPUTE MEL FEATURES
+# Trimming and the STFT run once per file here instead of once per file per epoch.
+mel_store = MelFeatureStore(MEL_STORE_PATH, config.audio.to_dict())
+mel_store.build(
+    [sample["audio_file"] for sample in train_samples + eval_samples],
+    num_workers=config.precompute_num_workers,
+)
+ap.mel_store = mel_store
+
 # INITIALIZE THE MODEL
 # Models take a config object and a speaker manager as input
 # Config defines the details of the model like the number of layers, the size of the embedding, etc.
 # Speaker manager is used by multi-speaker models.
-model = Overflow(config, ap, tokenizer)
+class BucketedOverflow(Overflow):
+    """Overflow whose training loader batches utterances by duration and text length."""
+
+    def get_data_loader(self, config, assets, is_eval, samples, verbose, num_gpus, rank=None):
+        loader = super().get_data_loader(config, assets, is_eval, samples, verbose, num_gpus, rank)
+        if is_eval or BATCH_MAX_FRAMES is None or num_gpus > 1:
+            return loader
+
+        # Durations come from the persistent manifest, so only changed WAVs are reopened
+        wavs_dir = os.path.join(dataset_config.path, "wavs")
+        with AudioManifest(wavs_dir) as manifest:
+            manifest.refresh()
+            durations = manifest.durations()
+        dataset = loader.dataset
+        audio_lengths, text_lengths = sample_lengths(dataset.samples, durations, wavs_dir)
+        batch_sampler = DurationBucketBatchSampler(
+            audio_lengths,
+            text_lengths,
+            max_frames=BATCH_MAX_FRAMES,
+            frames_per_second=config.audio.sample_rate / config.audio.hop_length,
+            seed=config.training_seed,
+        )
+        return DataLoader(
+            dataset,
+            batch_sampler=batch_sampler,
+            collate_fn=dataset.collate_fn,
+            num_workers=config.num_loader_workers,
+            pin_memory=False,
+        )
+
+
+model = BucketedOverflow(config, ap, tokenizer)
 
 
 # init the trainer and 🚀
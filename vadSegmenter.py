@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Energy-based voice activity segmentation.
+
+Cuts long recordings into utterance-sized clips without a forced
+alignment: frame energies are computed in one vectorized pass over the
+memory-mapped samples, speech is tracked with a pair of hysteresis
+thresholds, short pauses are bridged, and segments are held between a
+minimum and maximum duration (long ones are split at their quietest
+frame). Usable as a standalone segmenter or to pre-cut chapters before
+alignment.
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from speechDatasetPreprocessor import export_segments, read_wav_header
+
+
+class EnergyVAD:
+    """Hysteresis energy VAD with duration constraints."""
+
+    def __init__(self,
+                 frame_seconds: float = 0.01,
+                 start_db: float = -40.0,
+                 stop_db: float = -50.0,
+                 relative: bool = False,
+                 min_silence: float = 0.3,
+                 padding: float = 0.1,
+                 min_duration: float = 1.0,
+                 max_duration: float = 15.0,
+                 block_seconds: float = 60.0):
+        """
+        Args:
+            frame_seconds: Analysis frame length
+            start_db: Energy (dBFS) a frame must exceed to start speech
+            stop_db: Energy (dBFS) a frame must fall below to end speech
+            relative: Treat start_db/stop_db as offsets from the recording's
+                99th-percentile frame energy instead of absolute dBFS
+            min_silence: Pauses shorter than this (seconds) do not end a segment
+            padding: Silence kept before and after each segment (seconds)
+            min_duration: Segments shorter than this are dropped, or merged into the piece
+                before them when they are the tail of a split (seconds)
+            max_duration: Segments longer than this are split at their quietest frame;
+                must be at least twice min_duration
+            block_seconds: Audio converted at a time, which bounds memory use
+        """
+        if stop_db > start_db:
+            raise ValueError('stop_db must not be above start_db')
+        if max_duration <= 0:
+            raise ValueError('max_duration must be positive')
+        if min_duration > max_duration / 2:
+            # Otherwise a split could leave a piece shorter than min_duration
+            raise ValueError('min_duration must be at most half of max_duration')
+        self.frame_seconds = frame_seconds
+        self.start_db = start_db
+        self.stop_db = stop_db
+        self.relative = relative
+        self.min_silence = min_silence
+        self.padding = padding
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.block_seconds = block_seconds
+
+    def frame_energies(self, wav_file: str) -> Tuple[np.ndarray, float, float]:
+        """
+        Mean-square energy of every analysis frame in dBFS, over all channels.
+
+        Returns (energies, seconds per analysis frame, duration of the file in seconds).
+        """
+        header = read_wav_header(wav_file)
+        if header is None:
+            raise ValueError(f'{wav_file}: not a PCM WAV')
+        width = header.sample_width
+        frame_bytes = header.channels * width
+        n_frames = header.data_size // frame_bytes
+        raw = np.memmap(wav_file, dtype=np.uint8, mode='r', offset=header.data_pos,
+                        shape=(n_frames, frame_bytes))
+        frame_len = max(1, int(round(self.frame_seconds * header.frame_rate)))
+        n_windows = n_frames // frame_len
+        block = max(1, int(self.block_seconds * header.frame_rate) // frame_len) * frame_len
+        full_scale = float(1 << (8 * width - 1))
+
+        energies = np.empty(n_windows, dtype=np.float64)
+        for start in range(0, n_windows * frame_len, block):
+            chunk = np.ascontiguousarray(raw[start:min(start + block, n_windows * frame_len)])
+            if width == 1:
+                x = chunk.astype(np.float32) - 128.0
+            elif width == 3:
+                b = chunk.reshape(-1, 3).astype(np.int32)
+                x = ((b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8).astype(np.float32)
+            else:
+                x = chunk.view(f'<i{width}').astype(np.float32)
+            x = x.reshape(-1, frame_len * header.channels) / full_scale
+            first = start // frame_len
+            energies[first:first + x.shape[0]] = np.einsum('ij,ij->i', x, x) / x.shape[1]
+        del raw
+        return (10.0 * np.log10(energies + 1e-12), frame_len / float(header.frame_rate),
+                n_frames / float(header.frame_rate))
+
+    def speech_mask(self, energies: np.ndarray) -> np.ndarray:
+        """Per-frame speech flag with hysteresis: on above start_db, off below stop_db."""
+        start_db, stop_db = self.start_db, self.stop_db
+        if self.relative and energies.size:
+            reference = np.percentile(energies, 99)
+            start_db, stop_db = reference + start_db, reference + stop_db
+        # Frames above start_db switch speech on, frames below stop_db switch it off and
+        # frames in between keep the state of the last switch: a forward fill.
+        events = np.full(energies.shape, -1, dtype=np.int8)
+        events[energies > start_db] = 1
+        events[energies < stop_db] = 0
+        last = np.where(events >= 0, np.arange(events.size), -1)
+        np.maximum.accumulate(last, out=last)
+        return (last >= 0) & (events[np.maximum(last, 0)] == 1)
+
+    def segments_from_mask(self,
+                           mask: np.ndarray,
+                           energies: np.ndarray,
+                           frame_seconds: Optional[float] = None) -> List[Tuple[int, int]]:
+        """Turn a speech mask into (start, end) frame ranges that obey the duration limits."""
+        frame_seconds = frame_seconds or self.frame_seconds
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if starts.size == 0:
+            return []
+
+        # Bridge pauses shorter than min_silence
+        keep = (starts[1:] - ends[:-1]) >= self.min_silence / frame_seconds
+        starts = starts[np.concatenate(([True], keep))]
+        ends = ends[np.concatenate((keep, [True]))]
+
+        # Pad, without letting neighbours overlap
+        pad = int(round(self.padding / frame_seconds))
+        starts = np.maximum(starts - pad, 0)
+        ends = np.minimum(ends + pad, mask.size)
+        starts[1:] = np.maximum(starts[1:], ends[:-1])
+
+        min_frames = int(round(self.min_duration / frame_seconds))
+        max_frames = int(round(self.max_duration / frame_seconds))
+        segments = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            split = False
+            # Split overlong segments at the quietest frame that leaves both sides long enough
+            while end - start > max_frames:
+                low = start + min_frames
+                high = min(start + max_frames, end - min_frames)
+                if high <= low:
+                    high = start + max_frames
+                cut = low + int(np.argmin(energies[low:high]))
+                segments.append((start, cut))
+                start = cut
+                split = True
+            if end - start >= min_frames:
+                segments.append((start, end))
+            elif split:
+                # A short tail of a split segment is still speech: keep it with the piece before
+                segments[-1] = (segments[-1][0], end)
+        return segments
+
+    def segment(self, wav_file: str) -> List[Tuple[float, float]]:
+        """(start, end) times in seconds of the speech segments in a WAV file."""
+        energies, seconds_per_frame, duration = self.frame_energies(wav_file)
+        segments = self.segments_from_mask(self.speech_mask(energies), energies, seconds_per_frame)
+        return [(round(start * seconds_per_frame, 3), round(min(end * seconds_per_frame, duration), 3))
+                for start, end in segments]
+
+
+def segment_file(vad: EnergyVAD, wav_file: str, output_dir: str, backend: str = 'auto') -> List[str]:
+    """Write the clips of one recording to output_dir as <base>_<n>.wav and return their tab-separated lines."""
+    base_name = os.path.splitext(os.path.basename(wav_file))[0]
+    segments = vad.segment(wav_file)
+    names = [f'{base_name}_{i + 1}.wav' for i in range(len(segments))]
+    export_segments(wav_file, [(start, end, '') for start, end in segments],
+                    [os.path.join(output_dir, name) for name in names], backend)
+    return [f'{name}\t{wav_file}\t{start:.3f}\t{end:.3f}\n' for name, (start, end) in zip(names, segments)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Cut recordings into utterances by energy, without alignment.')
+    parser.add_argument('inputs', nargs='+', help='WAV files or directories of WAV files')
+    parser.add_argument('--output-dir', default=None,
+                        help='write clips and segments.tsv here; without it segments are only printed')
+    parser.add_argument('--start-db', type=float, default=-40.0)
+    parser.add_argument('--stop-db', type=float, default=-50.0)
+    parser.add_argument('--relative', action='store_true',
+                        help='thresholds are offsets from each recording\'s 99th-percentile frame energy')
+    parser.add_argument('--min-silence', type=float, default=0.3)
+    parser.add_argument('--padding', type=float, default=0.1)
+    parser.add_argument('--min-duration', type=float, default=1.0)
+    parser.add_argument('--max-duration', type=float, default=15.0)
+    parser.add_argument('--backend', default='auto', help='speechDatasetPreprocessor export backend')
+    args = parser.parse_args(argv)
+
+    try:
+        vad = EnergyVAD(start_db=args.start_db, stop_db=args.stop_db, relative=args.relative,
+                        min_silence=args.min_silence, padding=args.padding,
+                        min_duration=args.min_duration, max_duration=args.max_duration)
+    except ValueError as e:
+        parser.error(str(e))
+    wav_files = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            wav_files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.wav'))
+        else:
+            wav_files.append(path)
+
+    failures = 0
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        with open(os.path.join(args.output_dir, 'segments.tsv'), 'w') as segments_file:
+            for wav_file in wav_files:
+                try:
+                    lines = segment_file(vad, wav_file, args.output_dir, args.backend)
+                except Exception as e:
+                    print(f'[-] {wav_file}: {type(e).__name__}: {e}', file=sys.stderr)
+                    failures += 1
+                    continue
+                segments_file.writelines(lines)
+                print(f'[+] {wav_file}: {len(lines)} segments')
+    else:
+        for wav_file in wav_files:
+            for start, end in vad.segment(wav_file):
+                print(f'{wav_file}\t{start:.3f}\t{end:.3f}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())